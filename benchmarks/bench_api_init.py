@@ -0,0 +1,60 @@
+"""
+Cost of instantiating an API class per request, across API classes of different sizes
+
+    python -m benchmarks.bench_api_init
+
+compares the legacy per-request binding (a partial for every Endpoint and Hook in the class)
+with the endpoints and hooks bound lazily on attribute access
+"""
+import time
+from functools import partial
+from utilmeta.core import api, request
+from utilmeta.core.api.endpoint import Endpoint
+from utilmeta.core.api.hook import Hook
+
+
+def make_api(size: int):
+    attrs = {}
+    for i in range(size):
+        def endpoint(self):
+            return 'ok'
+        endpoint.__name__ = f'endpoint_{i}'
+        attrs[endpoint.__name__] = api.get(endpoint)
+
+    def before_all(self):
+        pass
+    attrs['before_all'] = api.before('*')(before_all)
+    return type(f'API{size}', (api.API,), attrs)
+
+
+def legacy_bind(inst: api.API):
+    for key, val in inst.__class__.__dict__.items():
+        if isinstance(val, Endpoint):
+            setattr(inst, key, partial(val, inst))
+        if isinstance(val, Hook):
+            setattr(inst, key, partial(val, inst))
+
+
+def measure(func, rounds: int = 5000):
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+if __name__ == '__main__':
+    req = request.Request(method='get', url='endpoint_0')
+    print(f'{"endpoints":>10} {"lazy (us)":>12} {"legacy (us)":>12}')
+    for size in (1, 10, 30, 100, 300):
+        api_cls = make_api(size)
+
+        def lazy():
+            api_cls(req).endpoint_0()
+
+        def legacy():
+            inst = api_cls(req)
+            legacy_bind(inst)
+            inst.endpoint_0()
+
+        print(f'{size:>10} {measure(lazy):>12.2f} {measure(legacy):>12.2f}')
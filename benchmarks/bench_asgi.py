@@ -0,0 +1,110 @@
+"""
+Per-request overhead of the raw ASGI server adaptor against the starlette adaptor
+
+    python -m benchmarks.bench_asgi
+
+the same API is called through both applications with an in-process ASGI scope
+(no network), so the difference is the cost of the framework request/response objects
+"""
+import asyncio
+import time
+import types
+from starlette.applications import Starlette
+from utilmeta.core import api, request
+from utilmeta.core.api import API
+from utilmeta.core.server.backends.asgi import ASGIServerAdaptor
+from utilmeta.core.server.backends.starlette import StarletteServerAdaptor
+
+REQUESTS = 5000
+
+
+class RootAPI(API):
+    @api.get('items/{id}')
+    def get_item(self, id: int, q: str = None,
+                 token: str = request.HeaderParam('X-Token', default=None)):
+        return {'id': id, 'q': q, 'token': token}
+
+    @api.post
+    def echo(self, data: dict = request.Body):
+        return data
+
+
+def make_config():
+    return types.SimpleNamespace(background=False, asynchronous=True, root_url=None,
+                                 _application=None, production=True)
+
+
+def asgi_app():
+    adaptor = ASGIServerAdaptor(make_config())
+    adaptor.api = RootAPI
+    adaptor._ready = True
+    return adaptor
+
+
+def starlette_app():
+    app = Starlette()
+    StarletteServerAdaptor(make_config()).add_api(app, RootAPI, asynchronous=True)
+    return app
+
+
+HEADERS = [
+    (b'host', b'localhost:8000'),
+    (b'user-agent', b'bench/1.0'),
+    (b'accept', b'application/json'),
+    (b'x-token', b'secret'),
+]
+
+
+def get_scope():
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/items/42', 'raw_path': b'/items/42',
+        'query_string': b'q=test', 'root_path': '', 'headers': HEADERS,
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 8000),
+    }
+
+
+def post_scope():
+    body = b'{"name":"item","tags":["a","b"],"price":1.5}'
+    return dict(
+        get_scope(), method='POST', path='/echo', raw_path=b'/echo', query_string=b'',
+        headers=HEADERS + [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    ), body
+
+
+async def call(app, scope, body: bytes = b''):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    assert sent[0]['status'] == 200, sent
+    return sent
+
+
+async def measure(app, make_scope) -> float:
+    for _ in range(100):
+        scope = make_scope()
+        await call(app, *(scope if isinstance(scope, tuple) else (scope,)))
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        scope = make_scope()
+        await call(app, *(scope if isinstance(scope, tuple) else (scope,)))
+    return (time.perf_counter() - start) / REQUESTS
+
+
+async def main():
+    apps = {'starlette': starlette_app(), 'asgi': asgi_app()}
+    for name, make_scope in (('GET /items/42', get_scope), ('POST /echo', post_scope)):
+        results = {key: await measure(app, make_scope) for key, app in apps.items()}
+        base = results['starlette']
+        for key, elapsed in results.items():
+            print(f'{name:<16} {key:<10} {elapsed * 1e6:8.1f} us/request ({base / elapsed:4.2f}x)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Per-call cost of the @awaitable dispatch
+
+    python -m benchmarks.bench_awaitable
+
+compares the caller frame inspection of the awaitable wrapper
+with the explicit async entry (async_entry) and a plain coroutine function call
+"""
+import asyncio
+import time
+from utilmeta.utils import awaitable, async_entry
+
+
+class Target:
+    def process(self, value):
+        return value
+
+    @awaitable(process)
+    async def process(self, value):
+        return value
+
+    aprocess = async_entry('process')
+
+
+async def plain(value):
+    return value
+
+
+async def run_dispatch(target: Target, rounds: int):
+    for i in range(rounds):
+        await target.process(i)
+
+
+async def run_entry(target: Target, rounds: int):
+    for i in range(rounds):
+        await target.aprocess(i)
+
+
+async def run_plain(target: Target, rounds: int):
+    for i in range(rounds):
+        await plain(i)
+
+
+def run_sync_dispatch(target: Target, rounds: int):
+    for i in range(rounds):
+        target.process(i)
+
+
+async def main(rounds: int = 200000):
+    target = Target()
+    for name, func in [
+        ('awaitable (frame)', run_dispatch),
+        ('async_entry', run_entry),
+        ('plain coroutine', run_plain),
+    ]:
+        await func(target, 1000)    # warm up
+        start = time.perf_counter()
+        await func(target, rounds)
+        print(f'{name:<24} {(time.perf_counter() - start) / rounds * 1e9:8.1f} ns/call')
+
+    start = time.perf_counter()
+    run_sync_dispatch(target, rounds)
+    print(f'{"awaitable (sync frame)":<24} {(time.perf_counter() - start) / rounds * 1e9:8.1f} ns/call')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
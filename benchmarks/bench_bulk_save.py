@@ -0,0 +1,89 @@
+"""
+Cost of Schema.bulk_save against saving the rows one by one, on an in-memory sqlite database
+
+    python -m benchmarks.bench_bulk_save
+
+the rows without pk are inserted by the batched multi-row INSERT ... RETURNING,
+the rows with pk are saved by INSERT ... ON CONFLICT (pk) DO UPDATE,
+or by a pk query + batched UPDATE + INSERT where the database does not support the upsert
+"""
+import time
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=[],
+    USE_TZ=False,
+)
+django.setup()
+
+from django.db import models, connection   # noqa: E402
+from utilmeta.core import orm   # noqa: E402
+from utilmeta.core.orm.backends.django.compiler import DjangoQueryCompiler  # noqa: E402
+
+ROWS = 5000
+
+
+class Record(models.Model):
+    name = models.CharField(max_length=40)
+    score = models.FloatField(default=0)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class RecordSchema(orm.Schema[Record]):
+    id: int = orm.Field(mode='ra', default=None, defer_default=True)
+    name: str
+    score: float
+
+
+def reset():
+    Record.objects.all().delete()
+
+
+def save_each(values):
+    compiler = RecordSchema.__parser__.get_compiler(None)
+    return [compiler.save_data(val) for val in values]
+
+
+def measure(func, data) -> float:
+    values = [RecordSchema.__from__(val) for val in data]
+    start = time.perf_counter()
+    func(values)
+    return time.perf_counter() - start
+
+
+def main():
+    with connection.schema_editor() as editor:
+        editor.create_model(Record)
+
+    creates = [{'name': f'record-{i}', 'score': i * 0.5} for i in range(ROWS)]
+    bulk = lambda values: RecordSchema.bulk_save(values)
+
+    print(f'{ROWS} rows, sqlite {connection.Database.sqlite_version}')
+    t_each = measure(save_each, creates)
+    reset()
+    t_bulk = measure(bulk, creates)
+    print(f'create   one by one: {t_each * 1000:8.1f} ms   bulk: {t_bulk * 1000:8.1f} ms   '
+          f'{t_each / t_bulk:6.1f}x')
+
+    pks = list(Record.objects.order_by('pk').values_list('pk', flat=True))
+    updates = [{'id': pk, 'name': f'record-{i}', 'score': i * 1.5} for i, pk in enumerate(pks)]
+    t_each = measure(save_each, updates)
+    t_bulk = measure(bulk, updates)
+    print(f'update   one by one: {t_each * 1000:8.1f} ms   bulk: {t_bulk * 1000:8.1f} ms   '
+          f'{t_each / t_bulk:6.1f}x')
+
+    # the databases without the ON CONFLICT (pk) upsert (MySQL), the UPDATE ... CASE WHEN statements
+    # of bulk_update save the round trips of a networked database, that the in-memory sqlite does not have
+    DjangoQueryCompiler.bulk_upsertable = False
+    t_bulk = measure(bulk, updates)
+    print(f'update (pk query + batched UPDATE):                 bulk: {t_bulk * 1000:8.1f} ms')
+    assert Record.objects.count() == ROWS
+
+
+if __name__ == '__main__':
+    main()
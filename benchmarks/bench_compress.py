@@ -0,0 +1,32 @@
+"""
+Cost of the compression stage for a hot JSON response
+
+    python -m benchmarks.bench_compress
+
+compares the body compressed on every request
+with the compressed variant served from the cache of CompressPlugin
+"""
+import timeit
+from utilmeta.core import request, response
+from utilmeta.core.api.plugins.compress import CompressPlugin
+
+ROWS = [{'id': i, 'name': f'user-{i}', 'email': f'user-{i}@example.com'} for i in range(500)]
+REQUEST = request.Request(method='get', url='rows', headers={'Accept-Encoding': 'gzip, br;q=0.5'})
+
+
+def stage(plugin: CompressPlugin):
+    resp = response.Response(ROWS, request=REQUEST)
+    resp.body     # the identity body is encoded (and memoized) before the stage
+    return plugin.process_response(resp).body
+
+
+if __name__ == '__main__':
+    uncached = CompressPlugin(encodings=['gzip'], cache_size=0)
+    cached = CompressPlugin(encodings=['gzip'])
+    identity = response.Response(ROWS).body
+    print(f'identity body: {len(identity)} bytes, gzip body: {len(stage(cached))} bytes')
+    n = 500
+    base = timeit.timeit(lambda: response.Response(ROWS, request=REQUEST).body, number=n)
+    for name, plugin in [('gzip', uncached), ('gzip (cached)', cached)]:
+        t = timeit.timeit(lambda: stage(plugin), number=n) - base
+        print(f'{name:>14}: {t / n * 1e6:8.1f} us/response')
@@ -0,0 +1,92 @@
+"""
+Allocations per request of the request context vars
+
+    python -m benchmarks.bench_context_var
+
+compares the legacy RequestContextVar.setup (define a new class on every call)
+with the bound vars cached in the request adaptor
+"""
+import tracemalloc
+import time
+from utilmeta.core import api, request, response
+from utilmeta.core.request import var
+
+
+class SubAPI(api.API):
+    @api.get('item/{pk}')
+    def item(self, pk: int):
+        return pk
+
+
+class RootAPI(api.API):
+    sub: SubAPI
+    response = response.Response
+
+    @api.get
+    def hello(self):
+        return 'world'
+
+
+def legacy_setup(context_var: var.RequestContextVar, req: request.Request):
+    class c:
+        @staticmethod
+        def contains():
+            return context_var.contains(req)
+
+        @staticmethod
+        def get():
+            return context_var.getter(req)
+
+        @staticmethod
+        def set(v):
+            return context_var.setter(req, value=v)
+
+        @staticmethod
+        def delete():
+            return context_var.deleter(req)
+    return c
+
+
+def make_request():
+    return request.Request(method='get', url='sub/item/1')
+
+
+def measure(func, rounds: int = 2000):
+    func()  # warm up
+    tracemalloc.start()
+    total = 0
+    for _ in range(rounds):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6, total / rounds
+
+
+def run_legacy():
+    req = make_request()
+    for _ in range(10):
+        legacy_setup(var.path_params, req).get()
+        legacy_setup(var.unmatched_route, req).get()
+
+
+def run_bound():
+    req = make_request()
+    for _ in range(10):
+        var.path_params.setup(req).get()
+        var.unmatched_route.setup(req).get()
+
+
+def run_request():
+    resp = RootAPI(make_request())()
+    assert resp.status == 200, resp
+
+
+if __name__ == '__main__':
+    for name, func in [('legacy setup x20', run_legacy), ('bound setup x20', run_bound), ('full request', run_request)]:
+        us, peak = measure(func)
+        print(f'{name:<20} {us:8.2f} us/req  {peak / 1024:8.2f} KiB allocated (peak)/req')
@@ -0,0 +1,73 @@
+"""
+Cost of Query.count() by the exact count against the capped count (CountStrategy('capped')),
+on an in-memory sqlite database
+
+    python -m benchmarks.bench_count
+
+the exact count visits all the matched rows, the capped count stops at the limit
+(the planner estimate is not available on sqlite, it falls back to the exact count)
+"""
+import time
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=[],
+    USE_TZ=False,
+)
+django.setup()
+
+from django.db import models, connection   # noqa: E402
+from utilmeta.core import orm   # noqa: E402
+from utilmeta.core.orm.backends.django import expressions as exp   # noqa: E402
+
+ROWS = 500000
+LIMIT = 10000
+REPEAT = 20
+
+
+class Record(models.Model):
+    name = models.CharField(max_length=40)
+    score = models.IntegerField(default=0)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class ExactQuery(orm.Query[Record]):
+    name: str = orm.Filter(query=lambda v: exp.Q(name__contains=v))
+    active: bool = orm.Filter()
+
+
+class CappedQuery(ExactQuery):
+    __count__ = orm.CountStrategy('capped', limit=LIMIT)
+
+
+def measure(query) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        query.count()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    with connection.schema_editor() as editor:
+        editor.create_model(Record)
+    Record.objects.bulk_create([
+        Record(name=f'record-{i}', score=i, active=bool(i % 3)) for i in range(ROWS)
+    ], batch_size=5000)
+
+    print(f'{ROWS} rows, capped at {LIMIT}')
+    for params in ({}, {'active': True}, {'name': '1', 'active': True}):
+        exact = ExactQuery(**params)
+        capped = CappedQuery(**params)
+        t_exact = measure(exact)
+        t_capped = measure(capped)
+        print(f'{str(params):32} exact: {exact.count():>7} {t_exact * 1000:7.2f} ms   '
+              f'capped: {capped.count():>6} {t_capped * 1000:6.2f} ms   {t_exact / t_capped:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
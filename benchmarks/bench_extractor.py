@@ -0,0 +1,35 @@
+"""
+Cost of Endpoint.parse_request on a small GET endpoint
+
+    python -m benchmarks.bench_extractor
+
+compares the generic ContextWrapper loop with the extractor compiled by @api.get(compiled=True)
+"""
+import time
+from utilmeta.core import api, request, response
+
+
+def make_api(compiled: bool):
+    class QueryAPI(api.API):
+        response = response.Response
+
+        @api.get(compiled=compiled)
+        def query(self, page: int, item: str = 'default',
+                  x_id: int = request.HeaderParam('X-Id', default=0)):
+            return page
+    return QueryAPI
+
+
+def measure(endpoint, rounds: int = 5000):
+    reqs = [request.Request(method='get', url='query', query={'page': '3'}, headers={'X-Id': '2'})
+            for _ in range(rounds)]
+    endpoint.parse_request(reqs[0])
+    start = time.perf_counter()
+    for req in reqs:
+        endpoint.parse_request(req)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+if __name__ == '__main__':
+    print(f'{"generic (us)":>14} {"compiled (us)":>14}')
+    print(f'{measure(make_api(False).query):>14.2f} {measure(make_api(True).query):>14.2f}')
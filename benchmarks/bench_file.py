@@ -0,0 +1,50 @@
+"""
+Peak Python memory of serving a large file
+
+    python -m benchmarks.bench_file
+
+compares reading the file into the body (read) with the chunks of ResponseFile
+sliced from the memory map, for the whole file and for a Range request
+"""
+import os
+import tempfile
+import tracemalloc
+from utilmeta.core import request, response
+
+SIZE = 64 * 1024 * 1024
+
+
+def read_body(path):
+    with open(path, 'rb') as f:
+        return len(f.read())
+
+
+def serve(path, **headers):
+    resp = response.Response(file=path, request=request.Request(method='get', url='file', headers=headers))
+    size = 0
+    for chunk in resp.file.iter_chunks(views=True):
+        size += len(chunk)
+    return size
+
+
+def measure(func, *args, **kwargs):
+    tracemalloc.start()
+    size = func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak / 1024
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.bin')
+        with open(path, 'wb') as f:
+            for _ in range(SIZE // (1024 * 1024)):
+                f.write(os.urandom(1024 * 1024))
+        for name, func, kwargs in [
+            ('read()', read_body, {}),
+            ('ResponseFile', serve, {}),
+            ('ResponseFile 206', serve, {'Range': 'bytes=1048576-33554431'}),
+        ]:
+            size, peak = measure(func, path, **kwargs)
+            print(f'{name:>18}: {size / 1024 / 1024:6.1f} MiB served, peak {peak:10.1f} KiB')
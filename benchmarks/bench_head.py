@@ -0,0 +1,46 @@
+"""
+Cost of the HEAD requests against the GET requests of the same endpoint
+
+    python -m benchmarks.bench_head
+
+HEAD runs the endpoint without encoding the body, or skips it entirely
+when the endpoint declares the metadata hooks (etag / last_modified / content_length)
+"""
+import time
+from utilmeta.core import api, request
+from utilmeta.core.response import Response
+from utilmeta.core.api import API
+
+ROWS = [{'id': i, 'name': f'user-{i}', 'score': i * 0.5} for i in range(5000)]
+REQUESTS = 200
+
+
+def rows_etag(self):
+    return f'rows-{len(ROWS)}'
+
+
+class BenchAPI(API):
+    @api.get
+    def rows(self):
+        return [dict(row) for row in ROWS]
+
+    @api.get(etag=rows_etag)
+    def cached(self):
+        return [dict(row) for row in ROWS]
+
+
+def measure(method: str, url: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        resp = BenchAPI(request.Request(method=method, url=url))()
+        if not isinstance(resp, Response):
+            # wrapped by the server adaptor
+            resp = Response(resp)
+        resp.body
+    return (time.perf_counter() - start) / REQUESTS
+
+
+if __name__ == '__main__':
+    for url in ('rows', 'cached'):
+        for method in ('get', 'head'):
+            print(f'{method.upper():<5} /{url:<8} {measure(method, url) * 1000:8.3f} ms/request')
@@ -0,0 +1,83 @@
+"""
+Peak memory and time of Schema.serialize against Schema.iter_serialize over a large table,
+on a temporary sqlite database
+
+    python -m benchmarks.bench_iter_serialize
+
+serialize() holds all the rows and instances, iter_serialize() holds one chunk at a time
+"""
+import os
+import time
+import tempfile
+import tracemalloc
+import django
+from django.conf import settings
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': DB_PATH}},
+    INSTALLED_APPS=[],
+    USE_TZ=False,
+)
+django.setup()
+
+from django.db import models, connection   # noqa: E402
+from utilmeta.core import orm   # noqa: E402
+
+ROWS = 20000
+CHUNK_SIZE = 1000
+
+
+class Record(models.Model):
+    name = models.CharField(max_length=40)
+    score = models.FloatField(default=0)
+    content = models.TextField(default='')
+
+    class Meta:
+        app_label = 'bench'
+
+
+class RecordSchema(orm.Schema[Record]):
+    id: int
+    name: str
+    score: float
+    content: str
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, duration, peak
+
+
+def main():
+    with connection.schema_editor() as editor:
+        editor.create_model(Record)
+    Record.objects.bulk_create([
+        Record(name=f'record-{i}', score=i * 0.5, content='x' * 200) for i in range(ROWS)
+    ], batch_size=5000)
+
+    def serialize():
+        return len(RecordSchema.serialize(Record.objects.all()))
+
+    def iter_serialize():
+        count = 0
+        for _ in RecordSchema.iter_serialize(Record.objects.all(), chunk_size=CHUNK_SIZE):
+            count += 1
+        return count
+
+    print(f'{ROWS} rows')
+    for name, func in [('serialize', serialize), (f'iter_serialize({CHUNK_SIZE})', iter_serialize)]:
+        count, duration, peak = measure(func)
+        assert count == ROWS
+        print(f'{name:24} {duration * 1000:8.1f} ms   peak memory: {peak / 1024 / 1024:7.1f} MiB')
+    os.remove(DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of encoding a typical list-of-dict payload to the response body
+
+    python -m benchmarks.bench_json_codec
+
+compares the previous path (stdlib json.dumps to str, then encode) with the installed codecs,
+on the rows with and without the values encoded by the utype encoders (datetime, Decimal)
+"""
+import json
+import time
+import uuid
+import decimal
+from datetime import datetime
+from utype import JSONEncoder
+from utilmeta.utils.codec import CODECS
+
+
+def make_payload(n: int = 100, plain: bool = False):
+    if plain:
+        return [{
+            'id': i,
+            'uuid': str(uuid.UUID(int=i)),
+            'username': f'user-{i}',
+            'email': f'user-{i}@example.com',
+            'score': i * 0.5,
+            'active': i % 2 == 0,
+            'tags': ['a', 'b', 'c'],
+        } for i in range(n)]
+    return [{
+        'id': i,
+        'uuid': uuid.UUID(int=i),
+        'username': f'user-{i}',
+        'email': f'user-{i}@example.com',
+        'score': i * 0.5,
+        'balance': decimal.Decimal('12.50'),
+        'active': i % 2 == 0,
+        'created_at': datetime(2024, 1, 1, 12, i % 60),
+        'tags': ['a', 'b', 'c'],
+    } for i in range(n)]
+
+
+def measure(func, payload, rounds: int = 500):
+    func(payload)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(payload)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+if __name__ == '__main__':
+    payloads = [make_payload(), make_payload(plain=True)]
+    funcs = {'json.dumps + encode': lambda d: json.dumps(d, cls=JSONEncoder, ensure_ascii=False).encode('utf-8')}
+    for name, codec_cls in CODECS.items():
+        if codec_cls.available():
+            funcs[name] = codec_cls().dumps
+    print(f'{"us / 100 rows":>22} {"typed":>10} {"plain":>10}')
+    for name, func in funcs.items():
+        print(f'{name:>22} {measure(func, payloads[0]):>10.1f} {measure(func, payloads[1]):>10.1f}')
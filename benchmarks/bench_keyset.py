@@ -0,0 +1,80 @@
+"""
+Latency of a deep page by OFFSET (Page / Offset) against the keyset pagination (Cursor),
+on an in-memory sqlite database
+
+    python -m benchmarks.bench_keyset
+
+the OFFSET query scans and discards all the rows before the page,
+the cursor query seeks the index from the last row of the previous page
+"""
+import time
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=[],
+    USE_TZ=False,
+)
+django.setup()
+
+from django.db import models, connection   # noqa: E402
+from utilmeta.core import orm   # noqa: E402
+
+ROWS = 200000
+PAGE_SIZE = 20
+REPEAT = 20
+
+
+class Record(models.Model):
+    name = models.CharField(max_length=40)
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        app_label = 'bench'
+        indexes = [models.Index(fields=['score', 'id'])]
+
+
+class RecordSchema(orm.Schema[Record]):
+    id: int
+    name: str
+    score: int
+
+
+class RecordQuery(orm.Query[Record]):
+    order: list = orm.OrderBy(['score'])
+    offset: int = orm.Offset()
+    cursor: str = orm.Cursor()
+    rows: int = orm.Limit(default=PAGE_SIZE)
+
+
+def measure(query) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        RecordSchema.serialize(query)
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    with connection.schema_editor() as editor:
+        editor.create_model(Record)
+    Record.objects.bulk_create([
+        Record(name=f'record-{i}', score=i % 1000) for i in range(ROWS)
+    ], batch_size=5000)
+
+    print(f'{ROWS} rows, page size {PAGE_SIZE}')
+    for depth in (0, 1000, 10000, 100000, ROWS - PAGE_SIZE):
+        offset_query = RecordQuery(order=['score'], offset=depth)
+        previous = RecordSchema.serialize(RecordQuery(order=['score'], offset=depth - PAGE_SIZE)) if depth else None
+        cursor = RecordQuery(order=['score']).get_next_cursor(previous) if previous else None
+        cursor_query = RecordQuery(order=['score'], cursor=cursor) if cursor else RecordQuery(order=['score'])
+        assert [v.id for v in RecordSchema.serialize(offset_query)] == \
+            [v.id for v in RecordSchema.serialize(cursor_query)]
+        t_offset = measure(offset_query)
+        t_cursor = measure(cursor_query)
+        print(f'rows {depth:>7}+   offset: {t_offset * 1000:8.2f} ms   cursor: {t_cursor * 1000:6.2f} ms   '
+              f'{t_offset / t_cursor:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
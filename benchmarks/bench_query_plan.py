@@ -0,0 +1,91 @@
+"""
+Cost of Schema.serialize over a Query with and without the compiled query plan cache,
+on an in-memory sqlite database
+
+    python -m benchmarks.bench_query_plan
+
+with the cache, the repeated queries of the same shape (filters, orders, scope) only compile the WHERE clause
+"""
+import time
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=[],
+    USE_TZ=False,
+)
+django.setup()
+
+from django.db import models, connection   # noqa: E402
+from utilmeta.core import orm   # noqa: E402
+from utilmeta.core.orm.backends.django import expressions as exp   # noqa: E402
+from utilmeta.core.orm.backends.django.compiler import DjangoQueryCompiler  # noqa: E402
+from utilmeta.core.orm.backends.django.plan import QueryPlanCache  # noqa: E402
+
+REQUESTS = 1000
+
+
+class Team(models.Model):
+    name = models.CharField(max_length=40)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class Member(models.Model):
+    name = models.CharField(max_length=40)
+    score = models.FloatField(default=0)
+    active = models.BooleanField(default=True)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='members')
+
+    class Meta:
+        app_label = 'bench'
+
+
+class MemberSchema(orm.Schema[Member]):
+    id: int
+    name: str
+    score: float
+    team_name: str = orm.Field('team.name')
+
+
+class MemberQuery(orm.Query[Member]):
+    name: str = orm.Filter(query=lambda v: exp.Q(name__icontains=v))
+    active: bool = orm.Filter()
+    order: list = orm.OrderBy({'score': orm.Order(), 'id': orm.Order()})
+    page: int = orm.Page()
+    rows: int = orm.Limit(default=10)
+
+
+def measure() -> float:
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        MemberSchema.serialize(MemberQuery(name=f'm{i % 10}', active=True, order=['-score'], page=i % 5 + 1))
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def main():
+    with connection.schema_editor() as editor:
+        editor.create_model(Team)
+        editor.create_model(Member)
+    teams = Team.objects.bulk_create([Team(name=f'team-{i}') for i in range(10)])
+    Member.objects.bulk_create([Member(name=f'm{i}', score=i, team=teams[i % 10]) for i in range(5000)])
+
+    measure()   # warm up
+    t_plain = measure()
+    cache = DjangoQueryCompiler.plan_cache = QueryPlanCache()
+    try:
+        t_cached = measure()
+    finally:
+        DjangoQueryCompiler.plan_cache = None
+    stats = cache.stats()
+
+    print(f'serialize {REQUESTS} queries of 10 rows')
+    print(f'compile every query: {t_plain * 1e6:8.1f} µs / query')
+    print(f'query plan cache:    {t_cached * 1e6:8.1f} µs / query   {t_plain / t_cached:5.2f}x')
+    print(f'cache: {stats}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Per-request overhead of the RateLimitPlugin engines
+
+    python -m benchmarks.bench_rate_limit [redis://127.0.0.1:6379/0]
+
+measures RateLimitPlugin.process_request (max_rps + max_times) with the in-process engine,
+and with the redis engine if a redis url is given (one lua script eval per limit)
+"""
+import sys
+import time
+from utilmeta.core import request
+from utilmeta.core.api.plugins.rate import RateLimitPlugin, RedisRateLimitEngine
+
+
+def target():
+    pass
+
+
+def measure(plugin: RateLimitPlugin, clients: int, rounds: int = 20000):
+    reqs = [request.Request(method='get', url='', headers={'X-Client': str(i % clients)})
+            for i in range(rounds)]
+    start = time.perf_counter()
+    for req in reqs:
+        plugin.process_request(req, target)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def make_plugin(engine=None):
+    plugin = RateLimitPlugin(
+        max_rps=1e9,
+        max_times=10 ** 9,
+        ban_function=lambda req: req.headers.get('X-Client')
+    )
+    if engine:
+        plugin.engine = engine
+    return plugin
+
+
+if __name__ == '__main__':
+    redis_url = sys.argv[1] if len(sys.argv) > 1 else None
+    print(f'{"clients":>8} {"local (us)":>12} {"redis (us)":>12}')
+    for clients in (1, 100, 10000, 100000):
+        local = measure(make_plugin(), clients)
+        remote = '-'
+        if redis_url:
+            from redis import Redis
+            engine = RedisRateLimitEngine()
+            engine._con = Redis.from_url(redis_url)
+            remote = f'{measure(make_plugin(engine), clients, rounds=5000):.2f}'
+        print(f'{clients:>8} {local:>12.2f} {remote:>12}')
@@ -0,0 +1,52 @@
+"""
+Memory per idle Server-Sent Events connection and the fan-out cost of the EventHub
+
+    python -m benchmarks.bench_sse
+
+every connection is an EventStream over a hub subscription that is waiting for the next event
+(with the heartbeat armed), the broadcast encodes an event once for all the subscribers
+"""
+import asyncio
+import time
+import tracemalloc
+from utilmeta.core.response.sse import EventStream, EventHub
+
+CONNECTIONS = [100, 1000, 10000]
+
+
+async def connect(hub: EventHub, count: int):
+    streams = [EventStream(hub.subscribe(), heartbeat=15).aiter_chunks() for _ in range(count)]
+    # start every connection, they are all waiting for the next event
+    waiting = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+    await asyncio.sleep(0)
+    return streams, waiting
+
+
+async def measure(count: int):
+    hub = EventHub()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    streams, waiting = await connect(hub, count)
+    await asyncio.sleep(0.01)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    hub.publish({'price': 1.0, 'symbol': 'ABC'})
+    await asyncio.gather(*waiting)
+    fanout = time.perf_counter() - start
+
+    for stream in streams:
+        await stream.aclose()
+    return (after - before) / count, fanout
+
+
+async def main():
+    for count in CONNECTIONS:
+        per_connection, fanout = await measure(count)
+        print(f'{count:>6} idle connections: {per_connection / 1024:6.2f} KiB/connection, '
+              f'broadcast delivered in {fanout * 1000:8.2f} ms ({fanout / count * 1e6:5.2f} us/subscriber)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
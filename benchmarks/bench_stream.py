@@ -0,0 +1,41 @@
+"""
+Peak memory of serializing a generator result
+
+    python -m benchmarks.bench_stream
+
+compares the materialized body (list + json dump) with the chunked ResponseStream,
+the peak of the stream should stay flat as the row count grows
+"""
+import json
+import tracemalloc
+from utilmeta.core import response
+
+
+def rows(n: int):
+    for i in range(n):
+        yield {'id': i, 'name': f'user-{i}', 'score': i * 0.5}
+
+
+def materialized(n: int):
+    return len(json.dumps(list(rows(n))).encode())
+
+
+def streamed(n: int):
+    size = 0
+    for chunk in response.Response(rows(n)).stream:
+        size += len(chunk)
+    return size
+
+
+def measure(func, n: int):
+    tracemalloc.start()
+    func(n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+if __name__ == '__main__':
+    print(f'{"rows":>10} {"list (KiB)":>14} {"stream (KiB)":>14}')
+    for n in (1000, 10000, 100000):
+        print(f'{n:>10} {measure(materialized, n):>14.1f} {measure(streamed, n):>14.1f}')
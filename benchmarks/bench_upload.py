@@ -0,0 +1,58 @@
+"""
+Peak Python memory and throughput of parsing a large multipart upload
+
+    python -m benchmarks.bench_upload
+
+compares buffering the whole body before parsing with feeding the streaming parser
+by the chunks as they are received, the file part is spooled to the disk in both cases
+"""
+import os
+import time
+import tracemalloc
+from utilmeta.core.request.multipart import MultipartParser
+
+SIZE = 64 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = 'bench-boundary'
+
+
+def receive():
+    # the body received from the server chunk by chunk
+    yield (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="name"\r\n\r\nbench\r\n'
+           f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="data.bin"\r\n\r\n').encode()
+    block = os.urandom(CHUNK_SIZE)
+    for _ in range(SIZE // CHUNK_SIZE):
+        yield block
+    yield f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def buffered():
+    body = b''.join(receive())
+    return MultipartParser(BOUNDARY).parse([body])
+
+
+def streaming():
+    return MultipartParser(BOUNDARY).parse(receive())
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    form = func()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    file = form['file'][0]
+    size = file.size
+    file.adaptor.file.close()
+    return size, duration, peak / 1024
+
+
+if __name__ == '__main__':
+    for name, func in [
+        ('buffered', buffered),
+        ('streaming', streaming),
+    ]:
+        size, duration, peak = measure(func)
+        print(f'{name:>10}: {size / 1024 / 1024:6.1f} MiB parsed, '
+              f'{size / 1024 / 1024 / duration:8.1f} MiB/s, peak {peak:10.1f} KiB')
@@ -0,0 +1,68 @@
+"""
+Fan-out cost of the websocket room broadcast
+
+    python -m benchmarks.bench_websocket
+
+every member is a WebsocketConnection over an in-memory adaptor with a running sender task,
+the broadcast message is encoded once and enqueued to all the members in one pass
+"""
+import asyncio
+import time
+from utilmeta.core.websocket import WebsocketConnection, Room
+from utilmeta.core.websocket.backends.base import WebsocketAdaptor
+
+MEMBERS = [100, 1000, 10000]
+MESSAGES = 10
+
+
+class NullAdaptor(WebsocketAdaptor):
+    def __init__(self):
+        super().__init__(None)
+        self.received = 0
+
+    @property
+    def subprotocols(self):
+        return []
+
+    async def accept(self, subprotocol=None, headers=None):
+        self.accepted = True
+
+    async def send(self, data):
+        self.received += 1
+
+    async def close(self, code=1000, reason=None):
+        self.closed = True
+
+
+async def measure(count: int):
+    room = Room('bench')
+    adaptors = []
+    for _ in range(count):
+        adaptor = NullAdaptor()
+        conn = WebsocketConnection(adaptor, max_queue=MESSAGES * 2)
+        await conn.accept()
+        room.add(conn)
+        adaptors.append(adaptor)
+
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        room.broadcast({'price': 1.0, 'symbol': 'ABC', 'seq': i})
+    while sum(adaptor.received for adaptor in adaptors) < count * MESSAGES:
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    for conn in list(room.members):
+        await conn.close()
+    return elapsed
+
+
+async def main():
+    for count in MEMBERS:
+        elapsed = await measure(count)
+        total = count * MESSAGES
+        print(f'{count:>6} members x {MESSAGES} messages: {elapsed * 1000:8.2f} ms '
+              f'({elapsed / total * 1e6:5.2f} us/delivery)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
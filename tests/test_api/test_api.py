@@ -3,6 +3,7 @@ from utilmeta.core import api, request
 from utilmeta.core.api import API
 from utilmeta.core import response
 import pytest
+from typing import Dict
 
 
 class TestAPIClass:
@@ -434,6 +435,1020 @@ class TestAPIClass:
                 else:
                     assert content == result, f"{method} {path} failed with {content}"
 
+    def test_router(self):
+        from .api import TestAPI, ParentAPI, SubAPI
+        router = TestAPI._router
+
+        def legacy_match(api_cls, path: str):
+            # the per-route regex scan that the compiled router replaces
+            methods = {}
+            for route in api_cls._routes:
+                for regex in route.regex_list:
+                    if regex.fullmatch(path):
+                        break
+                else:
+                    continue
+                if not route.method:
+                    return route, {}
+                methods.setdefault(route.method, route)
+            return None, methods
+
+        for path in ['', '@special', 'response', 'patch', 'doc/tech', 'doc/tech/3', 'query',
+                     'random/path/to', 'the/api/hello', '@parent', '@parent/sub/test1', 'log/2022/1/INFO']:
+            match = router.match(path)
+            route, methods = legacy_match(TestAPI, path)
+            assert match.route is route, path
+            assert match.methods == methods, path
+
+        match = router.match('@parent/sub/test1')
+        assert match.route.handler is ParentAPI
+        assert match.remaining == 'sub/test1'
+        assert match.next.router is ParentAPI._router
+        assert match.next.route.handler is SubAPI
+        assert match.next.next.router is SubAPI._router
+        assert list(match.next.next.methods) == ['get']
+
+        match = router.match('doc/tech/3')
+        assert match.params['category'] == 'tech'
+        assert match.params['page'] == '3'
+        assert match.methods['get'].handler is TestAPI.get_doc
+
+    def test_context_var(self):
+        req = request.Request(method='get', url='doc/tech')
+        path_params = request.var.path_params.setup(req)
+        assert request.var.path_params.setup(req) is path_params
+        assert not path_params.contains()
+        assert path_params.get() == {}
+        path_params.set({'category': 'tech'})
+        assert path_params.contains()
+        assert request.var.path_params.getter(req) == {'category': 'tech'}
+        path_params.delete()
+        assert not path_params.contains()
+        assert request.var.path_params.setup(request.Request(method='get', url='')) is not path_params
+
+    def test_plugin_chains(self):
+        from utilmeta.utils.plugin import Plugin
+        from utilmeta.core.api.endpoint import process_response, process_request
+
+        class MarkPlugin(Plugin):
+            def process_response(self, resp, endpoint):
+                return resp
+
+        class OtherPlugin(Plugin):
+            def process_response(self, resp, endpoint):
+                return resp
+
+        class PluginAPI(API):
+            @MarkPlugin()
+            @api.get
+            def mark(self):
+                pass
+
+        endpoint = PluginAPI.mark
+        handlers = process_response.iter(endpoint)
+        assert len(handlers) == 1
+        assert process_response.iter(endpoint) is handlers     # compiled once
+        assert process_request.iter(endpoint) == ()
+
+        assert process_response.iter(PluginAPI) == ()
+        PluginAPI._add_plugins(OtherPlugin())
+        assert len(process_response.iter(PluginAPI)) == 1
+        PluginAPI._remove_plugins(OtherPlugin)
+        assert process_response.iter(PluginAPI) == ()
+
+    @pytest.mark.asyncio
+    async def test_async_entry(self):
+        from .api import TestAPI
+        for method, path, query, headers, result, status in [
+            ("get", "doc/tech/3", {}, {}, {"tech": 3}, 200),
+            ("get", "@parent/sub/test1", {}, {'X-Test-ID': 3}, {'test1': 3}, 200),
+            ("get", "query_schema", {"page": 0, "item": "tech"}, {}, ..., 422),
+        ]:
+            api_inst = TestAPI(request.Request(method=method, url=path, query=query, headers=headers))
+            resp = await api_inst.__acall__()
+            assert resp.status == status
+            if result is not ...:
+                assert resp.data == result
+        assert TestAPI.__acall__ is TestAPI.__call__._asyncfunc
+
+    def test_bound_endpoints(self):
+        from .api import TestAPI
+        from utilmeta.core.api.endpoint import Endpoint
+        from utilmeta.core.api.hook import Hook
+        assert isinstance(TestAPI.get_doc, Endpoint)
+        assert isinstance(TestAPI.handle_errors, Hook)
+        inst = TestAPI(request.Request(method='get', url='doc/tech'))
+        assert 'get_doc' not in inst.__dict__
+        assert inst.get_doc(category='tech', page=2) == {'tech': 2}
+        assert inst.get_doc.func is TestAPI.get_doc
+
+    def test_compiled_extractor(self):
+        def make_api(compiled: bool):
+            class ExtractAPI(API):
+                response = response.Response
+
+                @api.post('item/{id}', compiled=compiled)
+                def item(
+                    self,
+                    id: int,
+                    page: int,
+                    item: str = 'default',
+                    x_test_id: int = request.HeaderParam(default=0),
+                    token: str = request.CookieParam(alias='test-token', default=None),
+                    data: Dict[str, int] = request.Body,
+                ):
+                    return [id, page, item, x_test_id, token, data]
+            return ExtractAPI
+
+        cases = [
+            ('item/3', {'page': '2'}, {'X-Test-ID': '5', 'cookie': 'test-token=abc'}, {'a': '1'}),
+            ('item/3', {'page': '2', 'item': 'x'}, {'x-test-id': '5'}, {'a': 1}),
+            ('item/3', {'page': 'x'}, {}, {'a': 1}),
+            ('item/x', {'page': '1'}, {}, {'a': 1}),
+            ('item/3', {}, {}, {'a': 1}),
+            ('item/3', {'page': '2'}, {}, {'a': 'x'}),
+        ]
+        plain, compiled = make_api(False), make_api(True)
+        assert compiled.item.extractor and not plain.item.extractor
+        for path, query, headers, body in cases:
+            results = []
+            for api_cls in (plain, compiled):
+                try:
+                    resp = api_cls(request.Request(method='post', url=path, query=query, data=body, headers=headers))()
+                    results.append((resp.status, resp.data))
+                except Exception as e:
+                    results.append((e.__class__, str(e)))
+            assert results[0] == results[1]
+        resp = compiled(request.Request(
+            method='post', url='item/3', query={'page': '2'},
+            data={'a': '1'}, headers={'X-Test-ID': '5', 'cookie': 'test-token=abc'}
+        ))()
+        assert resp.data == [3, 2, 'default', 5, 'abc', {'a': 1}]
+
+    def test_cors_preflight(self):
+        from datetime import timedelta
+        from utilmeta.core.api.plugins.cors import CORSPlugin
+
+        @CORSPlugin(allow_origin='*', cors_max_age=timedelta(minutes=10))
+        class CORSAPI(API):
+            response = response.Response
+
+            @api.get('item/{id}')
+            def get_item(self, id: int, x_token: str = request.HeaderParam(default=None)):
+                return id
+
+            @api.post('item/{id}')
+            def post_item(self, id: int):
+                return id
+
+        headers = {'Origin': 'http://test.com', 'Access-Control-Request-Method': 'POST'}
+        preflights = [CORSAPI(request.Request(method='options', url='item/1', headers=headers))() for _ in range(2)]
+        for resp in preflights:
+            assert resp.status == 200
+            assert resp.headers['Allow'] == 'GET,POST'
+            assert resp.headers['Access-Control-Allow-Methods'] == 'GET,POST'
+            assert resp.headers['Access-Control-Max-Age'] == '600'
+            assert 'x-token' in resp.headers['Access-Control-Allow-Headers'].split(',')
+        allows = CORSAPI._router.get_allows(CORSAPI._router.match('item/1').methods)
+        assert allows is CORSAPI._router.get_allows(CORSAPI._router.match('item/2').methods)
+
+        resp = CORSAPI(request.Request(method='get', url='item/1', headers={'Origin': 'http://test.com'}))()
+        assert resp.status == 200
+        assert resp.headers['Access-Control-Allow-Origin'] == 'http://test.com'
+        assert 'Access-Control-Max-Age' not in resp.headers
+
+    def test_rate_limit(self):
+        from utilmeta.core.api.plugins.rate import RateLimitPlugin, RateLimitExceeded, LocalRateLimitEngine
+
+        class RateAPI(API):
+            response = response.Response
+
+            @api.get
+            @RateLimitPlugin(max_rps=2, ban_function=lambda req: req.headers.get('X-Client'))
+            def rps(self):
+                return 1
+
+            @api.get
+            @RateLimitPlugin(max_times=3, reset_after=60, ban_function=lambda req: req.headers.get('X-Client'))
+            def times(self):
+                return 1
+
+            @api.get
+            @RateLimitPlugin(max_errors=2, ban_function=lambda req: req.headers.get('X-Client'))
+            def errors(self, fail: bool = False):
+                if fail:
+                    raise ValueError('fail')
+                return 1
+
+        def call(path, client='a', **query):
+            try:
+                return RateAPI(request.Request(
+                    method='get', url=path, query=query, headers={'X-Client': client}))().status
+            except RateLimitExceeded as e:
+                resp = response.Response(error=e)
+                assert int(resp.headers['Retry-After']) >= 1
+                return resp.status
+            except ValueError:
+                return 500
+
+        assert [call('rps') for _ in range(3)] == [200, 200, 429]
+        assert call('rps', client='b') == 200
+        assert [call('times') for _ in range(4)] == [200, 200, 200, 429]
+        assert [call('errors', fail='1') for _ in range(3)] == [500, 500, 429]
+        assert call('errors') == 429
+
+        engine = LocalRateLimitEngine(max_keys=10)
+        for i in range(100):
+            assert engine.take(f'key-{i}', rate=1, capacity=1) == 0
+        assert len(engine) == 10
+        assert engine.take('key-99', rate=1, capacity=1) > 0
+
+    def test_concurrency_limit(self):
+        import time
+        import threading
+        from utilmeta.core.api.plugins.concurrency import ConcurrencyLimitPlugin, Overloaded
+
+        limit = ConcurrencyLimitPlugin(max_concurrency=1, max_queue=1, max_wait=2)
+
+        class LimitAPI(API):
+            response = response.Response
+
+            @api.get
+            @limit
+            def slow(self):
+                time.sleep(0.1)
+                return 1
+
+        statuses = []
+
+        def call():
+            try:
+                statuses.append(LimitAPI(request.Request(method='get', url='slow'))().status)
+            except Overloaded as e:
+                resp = response.Response(error=e)
+                assert resp.headers['Retry-After'] == '1'
+                statuses.append(resp.status)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(statuses) == [200, 200, 503]
+        stats = limit.stats['slow']
+        assert stats['active'] == stats['depth'] == 0
+        assert stats['accepted'] == 2 and stats['rejected'] == 1
+
+        # the service limiter is shared by the plugins with the same parameters
+        shared = ConcurrencyLimitPlugin.shared_service_limiter
+        ConcurrencyLimitPlugin.shared_service_limiter = None
+        try:
+            service = ConcurrencyLimitPlugin(max_service_concurrency=4, max_queue=2, max_wait=1)
+            assert ConcurrencyLimitPlugin(max_service_concurrency=4, max_queue=2, max_wait=1).service_limiter \
+                is service.service_limiter
+            for params in (
+                dict(max_service_concurrency=8, max_queue=2, max_wait=1),
+                dict(max_service_concurrency=4, max_queue=3, max_wait=1),
+                dict(max_service_concurrency=4, max_queue=2),
+            ):
+                with pytest.raises(ValueError):
+                    ConcurrencyLimitPlugin(**params)
+        finally:
+            ConcurrencyLimitPlugin.shared_service_limiter = shared
+
+    @pytest.mark.asyncio
+    async def test_deadline(self):
+        import time
+        import asyncio
+        from utilmeta.utils import get_timeout, get_deadline, DeadlineExceeded
+        from utilmeta.core.api.plugins.deadline import DeadlinePlugin
+
+        class DeadlineAPI(API):
+            response = response.Response
+
+            @api.get
+            @DeadlinePlugin(timeout=5)
+            async def sleep(self, seconds: float = 0):
+                await asyncio.sleep(seconds)
+                return get_timeout(10)
+
+            @api.get
+            @DeadlinePlugin(timeout=5)
+            def budget(self):
+                return get_timeout()
+
+        resp = await DeadlineAPI(request.Request(method='get', url='sleep')).__acall__()
+        assert 4 < float(resp.data) <= 5
+        assert get_deadline() is None
+
+        with pytest.raises(DeadlineExceeded):
+            await DeadlineAPI(request.Request(
+                method='get', url='sleep', query={'seconds': 1}, headers={'X-Request-Timeout': '0.1'})).__acall__()
+        assert get_deadline() is None
+
+        def call(req):
+            # sync call
+            return DeadlineAPI(req)()
+
+        resp = call(request.Request(method='get', url='budget', headers={'X-Request-Timeout': '2'}))
+        assert 1 < float(resp.data) <= 2
+
+        late = request.Request(method='get', url='budget', headers={'X-Request-Timeout': '0.05'})
+        time.sleep(0.1)
+        with pytest.raises(DeadlineExceeded):
+            call(late)
+
+    @pytest.mark.asyncio
+    async def test_streaming_response(self):
+        import json
+        import asyncio
+
+        class NDJSONResponse(response.Response):
+            content_type = 'application/x-ndjson'
+
+        class WrappedResponse(response.Response):
+            result_key = 'data'
+            message_key = 'msg'
+
+        consumed = []
+
+        class StreamAPI(API):
+            response = response.Response
+
+            @api.get
+            def rows(self, n: int = 3):
+                for i in range(n):
+                    consumed.append(i)
+                    yield {'i': i}
+
+            @api.get
+            def lines(self):
+                return NDJSONResponse(({'i': i} for i in range(2)))
+
+            @api.get
+            def table(self):
+                return response.Response(({'a': i, 'b': 'x,y'} for i in range(2)), content_type='text/csv')
+
+            @api.get
+            def wrapped(self):
+                return WrappedResponse(iter(range(3)))
+
+            @api.get
+            async def arows(self):
+                for i in range(3):
+                    yield {'i': i}
+
+        def call(url: str):
+            # sync call
+            return StreamAPI(request.Request(method='get', url=url))()
+
+        resp = call('rows?n=50000')
+        assert resp.stream and not consumed
+        # encoded lazily in chunks
+        chunks = resp.stream.iter_chunks()
+        first = next(chunks)
+        assert first.startswith(b'[{"i":') and 0 < len(consumed) < 50000
+        assert len(json.loads(first + b''.join(chunks))) == 50000
+
+        resp = call('lines')
+        assert resp.content_type == 'application/x-ndjson'
+        # the body does not drain the stream
+        assert resp.body == b''
+        assert [json.loads(line) for line in resp.stream.read().splitlines()] == [{'i': 0}, {'i': 1}]
+
+        resp = call('table')
+        assert resp.stream.read() == b'a,b\r\n0,"x,y"\r\n1,"x,y"\r\n'
+
+        resp = call('wrapped')
+        assert json.loads(resp.stream.read()) == {'data': [0, 1, 2], 'msg': ''}
+
+        resp = await StreamAPI(request.Request(method='get', url='arows')).__acall__()
+        assert resp.stream.asynchronous
+        assert json.loads(await resp.stream.aread()) == [{'i': 0}, {'i': 1}, {'i': 2}]
+
+        # the django response iterates by the mode of the server, not by the iterable
+        from utilmeta.core.response.backends.django import DjangoResponseAdaptor
+        resp = DjangoResponseAdaptor.reconstruct(call('rows'), asynchronous=True)
+        assert resp.is_async
+        assert json.loads(b''.join([chunk async for chunk in resp.streaming_content])) == \
+            [{'i': 0}, {'i': 1}, {'i': 2}]
+        resp = DjangoResponseAdaptor.reconstruct(
+            await StreamAPI(request.Request(method='get', url='arows')).__acall__(), asynchronous=False)
+        assert not resp.is_async
+        # consumed by a WSGI worker thread (without a running loop)
+        body = await asyncio.get_running_loop().run_in_executor(None, lambda: b''.join(resp.streaming_content))
+        assert json.loads(body) == [{'i': 0}, {'i': 1}, {'i': 2}]
+
+        # the consumer cancelled while the sync generator is executing in the worker thread
+        import threading
+        from utilmeta.core.response.stream import ResponseStream
+        started = threading.Event()
+        release = threading.Event()
+        closed = []
+
+        def blocking():
+            try:
+                yield 1
+                started.set()
+                release.wait(5)
+                yield 2
+            finally:
+                closed.append(True)
+
+        stream = ResponseStream(blocking(), chunk_size=1)
+
+        async def consume():
+            async for _ in stream.aiter_chunks():
+                pass
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        threading.Timer(0.05, release.set).start()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert closed == [True]
+
+    def test_json_codec(self):
+        import json
+        import uuid
+        import decimal
+        from datetime import datetime, date
+        from utype import JSONEncoder
+        from utilmeta.utils import get_json_codec, set_json_codec, StdlibJSONCodec, OrjsonCodec
+
+        data = {
+            'id': uuid.UUID(int=1),
+            'price': decimal.Decimal('1.50'),
+            'count': decimal.Decimal('3'),
+            'created': datetime(2020, 1, 1, 12, 30),
+            'date': date(2020, 1, 2),
+            'tags': ('a', 'b'),
+            'big': 2 ** 70,
+            1: 'int key',
+        }
+        expected = json.loads(json.dumps(data, cls=JSONEncoder))
+
+        class CodecAPI(API):
+            response = response.Response
+
+            @api.get
+            def get(self):
+                return data
+
+        origin = get_json_codec()
+        try:
+            for codec in (StdlibJSONCodec, OrjsonCodec):
+                if not codec.available():
+                    continue
+                set_json_codec(codec)
+                assert json.loads(get_json_codec().dumps(data)) == expected
+                resp = CodecAPI(request.Request(method='get'))()
+                assert isinstance(resp.prepare_body(), bytes)
+                assert resp.data == expected
+                body = get_json_codec().dumps(expected)
+                req = request.Request(method='post', data=body, headers={
+                    'Content-Type': 'application/json', 'Content-Length': str(len(body))})
+                assert req.adaptor.get_json() == expected
+        finally:
+            set_json_codec(origin)
+
+        with pytest.raises(ValueError):
+            set_json_codec('unknown')
+        # the stdlib codec is the default, the response bytes are unchanged by the installed codecs
+        from utilmeta.utils.codec import resolve_codec
+        codec = resolve_codec(None)
+        assert isinstance(codec, StdlibJSONCodec)
+        assert codec.dumps({'a': [1, float('nan')]}) == json.dumps({'a': [1, float('nan')]}).encode()
+
+    def test_response_body(self):
+        import tracemalloc
+        from utilmeta.utils import get_json_codec, set_json_codec, StdlibJSONCodec, etag
+        from utilmeta.core.response.backends.django import DjangoResponseAdaptor
+
+        class CountingCodec(StdlibJSONCodec):
+            encoded = 0
+
+            def dumps(self, data) -> bytes:
+                CountingCodec.encoded += 1
+                return super().dumps(data)
+
+        class BodyAPI(API):
+            response = response.Response
+
+            @api.get
+            def rows(self):
+                return [{'id': i, 'name': f'row-{i}'} for i in range(100)]
+
+        origin = get_json_codec()
+        set_json_codec(CountingCodec())
+        try:
+            resp = BodyAPI(request.Request(method='get', url='rows'))()
+            body = resp.body
+            assert resp.body is body and resp.prepare_body() is body
+            assert etag(resp.body) == etag(body)
+            assert resp.content_length == len(body)
+            assert DjangoResponseAdaptor.reconstruct(resp).content == body
+            assert len(resp.data) == 100
+            # encoded exactly once
+            assert CountingCodec.encoded == 1
+
+            # invalidated on content mutation
+            resp.content = [1, 2]
+            assert resp.body == b'[1, 2]'
+            assert CountingCodec.encoded == 2
+        finally:
+            set_json_codec(origin)
+
+        # bytes-like content is passed through without copying
+        content = bytearray(b'x' * 1024 * 1024)
+        resp = response.Response(content=content)
+        tracemalloc.start()
+        buffer = resp.buffer
+        assert resp.prepare_body() is content
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert buffer.obj is content
+        assert peak < 64 * 1024
+        assert bytes(resp.body) == bytes(content)
+
+    def test_compression(self):
+        import gzip
+        import json
+        import zlib
+        from utilmeta.core.api.plugins.compress import CompressPlugin, GzipCompressor
+
+        class CountingGzip(GzipCompressor):
+            compressed = 0
+
+            def compress(self, data: bytes) -> bytes:
+                CountingGzip.compressed += 1
+                return super().compress(data)
+
+        plugin = CompressPlugin(encodings=['gzip'], min_size=512)
+        plugin.compressors['gzip'] = CountingGzip()
+
+        @plugin
+        class CompressAPI(API):
+            response = response.Response
+
+            @api.get
+            def rows(self, n: int = 100):
+                return [{'id': i, 'name': f'row-{i}'} for i in range(n)]
+
+            @api.get
+            def stream(self):
+                for i in range(2000):
+                    yield {'id': i}
+
+            @api.get
+            def encoded(self):
+                return response.Response(b'x' * 2048, headers={'Content-Encoding': 'identity'})
+
+        def call(path, accept_encoding=None):
+            headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+            return CompressAPI(request.Request(method='get', url=path, headers=headers))()
+
+        identity = call('rows')
+        assert identity.headers.get('Content-Encoding') is None
+        assert identity.headers.get('Vary') == 'Accept-Encoding'
+
+        resp = call('rows', 'br;q=1.0, gzip;q=0.8, *;q=0')
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in resp.headers['Vary']
+        assert len(resp.body) < len(identity.body)
+        assert gzip.decompress(resp.body) == identity.body
+        assert CountingGzip.compressed == 1
+
+        # hot response: the compressed body is reused
+        resp = call('rows', 'gzip')
+        assert gzip.decompress(resp.body) == identity.body
+        assert CountingGzip.compressed == 1
+
+        # refused / below the threshold / already encoded
+        assert call('rows', 'gzip;q=0').headers.get('Content-Encoding') is None
+        assert call('rows', 'br').headers.get('Content-Encoding') is None
+        small = call('rows?n=2', 'gzip')
+        assert small.headers.get('Content-Encoding') is None
+        assert small.headers.get('Vary') is None
+        assert call('encoded', 'gzip').headers['Content-Encoding'] == 'identity'
+
+        # streaming responses are compressed chunk by chunk
+        resp = call('stream', '*')
+        assert resp.headers['Content-Encoding'] == 'gzip'
+        decoder = zlib.decompressobj(31)
+        chunks = list(resp.stream)
+        assert len(chunks) > 1
+        first = decoder.decompress(chunks[0])
+        # every chunk is flushed, so it is decodable on arrival
+        assert first.startswith(b'[{')
+        data = first + b''.join(decoder.decompress(c) for c in chunks[1:]) + decoder.flush()
+        assert len(json.loads(data)) == 2000
+
+        # the Vary of the compression is merged, not overwritten
+        resp = response.Response([1], headers={'Vary': 'Cookie'})
+        resp.patch_vary_headers('accept-encoding', 'Cookie')
+        assert resp.headers['Vary'] == 'Cookie, accept-encoding'
+        resp.patch_vary_headers('*')
+        assert resp.headers['Vary'] == '*'
+
+    def test_file_response(self, tmp_path):
+        import os
+        import asyncio
+        from utilmeta.core.response.file import ResponseFile
+        data = os.urandom(200 * 1024)
+        path = tmp_path / 'data.bin'
+        path.write_bytes(data)
+
+        class FileAPI(API):
+            @api.get
+            def path(self):
+                return path
+
+            @api.get
+            def fileobj(self):
+                return open(path, 'rb')
+
+        def call(route='path', **headers):
+            return FileAPI(request.Request(method='get', url=route, headers=headers))()
+
+        resp = call()
+        assert isinstance(resp.file, ResponseFile)
+        assert resp.status == 200
+        assert resp.content_type == 'application/octet-stream'
+        assert resp.headers['Content-Length'] == str(len(data))
+        assert resp.headers['Accept-Ranges'] == 'bytes'
+        assert resp.body == data
+        tag = resp.headers['ETag']
+
+        # conditional requests are answered by the stat
+        assert call(**{'If-None-Match': tag}).status == 304
+        assert call(**{'If-None-Match': f'"other", W/{tag}'}).status == 304
+        not_modified = call(**{'If-Modified-Since': resp.headers['Last-Modified']})
+        assert not_modified.status == 304 and not_modified.file is None and not_modified.body == b''
+        assert call(**{'If-None-Match': '"other"'}).status == 200
+
+        single = call('fileobj', Range='bytes=10-19')
+        assert single.status == 206
+        assert single.headers['Content-Range'] == f'bytes 10-19/{len(data)}'
+        assert single.headers['Content-Length'] == '10'
+        assert single.body == data[10:20]
+        assert call(Range='bytes=-5').body == data[-5:]
+
+        multi = call(Range='bytes=0-4, 100-109')
+        boundary = multi.file.boundary
+        assert multi.status == 206
+        assert multi.content_type == f'multipart/byteranges; boundary={boundary}'
+        body = multi.body
+        assert len(body) == int(multi.headers['Content-Length'])
+        assert body.startswith(f'--{boundary}\r\n'.encode())
+        assert body.endswith(f'--{boundary}--\r\n'.encode())
+        assert b'\r\n\r\n' + data[100:110] + b'\r\n' in body
+
+        unsatisfiable = call(Range=f'bytes={len(data)}-')
+        assert unsatisfiable.status == 416
+        assert unsatisfiable.headers['Content-Range'] == f'bytes */{len(data)}'
+        # malformed ranges and mismatched If-Range serve the whole file
+        assert call(Range='items=0-1').status == 200
+        assert call(Range='bytes=0-9', **{'If-Range': '"other"'}).status == 200
+        assert call(Range='bytes=0-9', **{'If-Range': tag}).status == 206
+
+        # the ranges are sliced from the memory map
+        chunks = list(call(Range='bytes=1-100000').file.iter_chunks(views=True))
+        assert all(isinstance(c, memoryview) for c in chunks)
+        assert b''.join(chunks) == data[1:100001]
+
+        # the async iteration reads the chunks in the worker thread
+        async def aread(file):
+            return [chunk async for chunk in file.aiter_chunks()]
+        chunks = asyncio.run(aread(call(Range='bytes=1-100000').file))
+        assert all(isinstance(c, bytes) for c in chunks)
+        assert b''.join(chunks) == data[1:100001]
+        assert asyncio.run(aread(call('fileobj', Range='bytes=0-4, 100-109').file))
+
+    def test_multipart_upload(self):
+        import os
+        import asyncio
+        from utilmeta.core.file import File
+        from utilmeta.core.request.multipart import MultipartParser
+        from utilmeta.core.api.plugins.upload import UploadLimitPlugin
+        from utilmeta.utils import exceptions
+
+        boundary = 'test-boundary'
+
+        def encode(fields: dict, files: dict) -> bytes:
+            body = b''
+            for key, value in fields.items():
+                body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n'
+                         f'{value}\r\n').encode()
+            for key, (filename, content) in files.items():
+                body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+                         f'Content-Type: application/octet-stream\r\n\r\n').encode() + content + b'\r\n'
+            return body + f'--{boundary}--\r\n'.encode()
+
+        class UploadAPI(API):
+            @api.post
+            @UploadLimitPlugin(max_body_size=512 * 1024, max_part_size=256 * 1024, memory_size=1024)
+            def upload(self, name: str = request.BodyParam, file: File = request.BodyParam):
+                return [name, file.filename, file.size, file.adaptor.file.in_memory, file.file.read() == content]
+
+        def call(body: bytes, **headers):
+            return UploadAPI(request.Request(method='post', url='upload', data=body, headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(len(body)),
+                **headers
+            }))()
+
+        content = os.urandom(200 * 1024)
+        body = encode({'name': 'test'}, {'file': ('data.bin', content)})
+        # the file part exceeding the memory size is spooled to the disk
+        assert call(body) == ['test', 'data.bin', len(content), False, True]
+
+        with pytest.raises(exceptions.RequestEntityTooLarge):
+            call(encode({'name': 'test'}, {'file': ('data.bin', os.urandom(300 * 1024))}))
+        with pytest.raises(exceptions.RequestEntityTooLarge):
+            # rejected by the Content-Length before reading
+            call(body, **{'Content-Length': str(1024 * 1024)})
+
+        # the boundary can be split across the chunks
+        parser = MultipartParser.from_content_type(f'multipart/form-data; boundary="{boundary}"', memory_size=64)
+        form = parser.parse([body[i:i + 7] for i in range(0, len(body), 7)])
+        assert form['name'] == ['test']
+        assert form['file'][0].file.read() == content
+
+        from utilmeta.core.file.backends.upload import UploadedFile
+        small = UploadedFile('small.bin', memory_size=1024)
+        small.write(b'x' * 1024)
+        assert small.in_memory
+        small.write(b'x')
+        assert not small.in_memory
+        small.close()
+        for memory_size in (0, None):
+            # spooled to the disk from the start
+            disk = UploadedFile('disk.bin', memory_size=memory_size)
+            disk.write(b'x')
+            assert not disk.in_memory
+            disk.close()
+
+        with pytest.raises(exceptions.BadRequest):
+            MultipartParser(boundary).parse([body[:-20]])
+        with pytest.raises(exceptions.RequestEntityTooLarge):
+            MultipartParser(boundary, max_field_size=2).parse([body])
+
+        async def async_call():
+            return await UploadAPI(request.Request(method='post', url='upload', data=body, headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+            }))()
+        assert asyncio.run(async_call()) == ['test', 'data.bin', len(content), False, True]
+
+    @pytest.mark.asyncio
+    async def test_event_stream(self):
+        import asyncio
+        from utilmeta.core.response.sse import Event, EventHub
+
+        hub = EventHub(max_queue=2, history=10)
+
+        class EventAPI(API):
+            @api.get(stream='sse', retry=3000)
+            def ticks(self):
+                for i in range(2):
+                    yield Event({'i': i}, id=i, event='tick')
+
+            @api.get(stream='sse', heartbeat=0.05)
+            async def slow(self):
+                await asyncio.sleep(0.12)
+                yield 'line1\nline2'
+
+            @api.get(stream='sse', heartbeat=None)
+            def subscribe(self, last_event_id: str = request.HeaderParam('Last-Event-ID', default=None)):
+                return hub.subscribe(last_event_id)
+
+        resp = await EventAPI(request.Request(method='get', url='ticks'))()
+        assert resp.content_type == 'text/event-stream'
+        assert resp.headers['Cache-Control'] == 'no-cache'
+        assert await resp.stream.aread() == (b'retry: 3000\n\n'
+                             b'id: 0\nevent: tick\ndata: {"i": 0}\n\n'
+                             b'id: 1\nevent: tick\ndata: {"i": 1}\n\n')
+
+        # heartbeat comments are sent while waiting for the next event
+        resp = await EventAPI(request.Request(method='get', url='slow'))()
+        chunks = [chunk async for chunk in resp.stream.aiter_chunks()]
+        assert chunks[0] == b': ping\n\n'
+        assert chunks[-1] == b'data: line1\ndata: line2\n\n'
+
+        for i in range(4):
+            hub.publish({'n': i})
+        # resume after Last-Event-ID, the oldest events are dropped when the queue is full
+        resp = await EventAPI(request.Request(method='get', url='subscribe', headers={'Last-Event-ID': '1'}))()
+        chunks = resp.stream.aiter_chunks()
+        assert await chunks.__anext__() == b'id: 3\ndata: {"n": 2}\n\n'
+        assert await chunks.__anext__() == b'id: 4\ndata: {"n": 3}\n\n'
+        assert len(hub) == 1
+        subscription = list(hub.subscribers)[0]
+        for i in range(3):
+            hub.publish(f'live-{i}')
+        assert subscription.dropped == 1
+        assert await chunks.__anext__() == b'id: 6\ndata: live-1\n\n'
+        await chunks.aclose()
+        assert len(hub) == 0
+
+        # the events published from other threads wake up the first wait of the subscriber
+        import threading
+        subscription = hub.subscribe()
+        assert subscription._loop is asyncio.get_running_loop()
+        threading.Timer(0.02, hub.publish, args=('threaded',)).start()
+        event = await asyncio.wait_for(subscription.__anext__(), timeout=1)
+        assert event.data == 'threaded'
+        subscription.close()
+
+    def test_head_request(self):
+        from datetime import datetime, timezone
+        calls = []
+
+        def item_etag(self, id: int):
+            calls.append('etag')
+            return f'v{id}'
+
+        def item_length(self, id: int):
+            return 9
+
+        class HeadAPI(API):
+            @api.get('item/{id}', etag=item_etag, content_length=item_length,
+                     last_modified=lambda self: datetime(2024, 1, 1, tzinfo=timezone.utc))
+            def item(self, id: int):
+                calls.append('item')
+                return {'id': id}
+
+            @api.get
+            def data(self):
+                calls.append('data')
+                return {'value': 'x' * 100}
+
+            @api.get
+            def text(self):
+                return 'hello'
+
+        # the metadata hooks answer HEAD without calling the endpoint
+        resp = HeadAPI(request.Request(method='head', url='item/10'))()
+        assert calls == ['etag']
+        assert resp.status == 200
+        assert resp.body == b''
+        assert resp.headers['ETag'] == '"v10"'
+        assert resp.headers['Last-Modified'] == 'Mon, 01 Jan 2024 00:00:00 GMT'
+        assert resp.headers['Content-Length'] == '9'
+
+        # GET carries the same validators, the length is computed from the body
+        calls.clear()
+        resp = HeadAPI(request.Request(method='get', url='item/10'))()
+        assert calls == ['etag', 'item']
+        assert resp.body == b'{"id": 10}'
+        assert resp.headers['ETag'] == '"v10"'
+
+        # the result is computed but not encoded, the unknown length is not sent
+        calls.clear()
+        resp = HeadAPI(request.Request(method='head', url='data'))()
+        assert calls == ['data']
+        assert resp.head and resp.body == b''
+        assert resp.content_type == 'application/json'
+        assert resp._body == b'' and 'Content-Length' not in resp.headers
+
+        resp = HeadAPI(request.Request(method='head', url='text'))()
+        assert resp.body == b''
+        assert resp.headers['Content-Length'] == '5'
+
+    def test_websocket(self):
+        import types
+        from starlette.applications import Starlette
+        from starlette.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect
+        from utilmeta.core.websocket import Websocket, ClientEvent, RoomRegistry
+        from utilmeta.core.server.backends.starlette import StarletteServerAdaptor
+        from utilmeta.utils import exceptions
+
+        event = ClientEvent(key='type')
+        disconnected = []
+
+        class ChatSocket(Websocket):
+            rooms = RoomRegistry()
+            token: str = request.QueryParam(default=None)
+
+            def connect(self):
+                if self.token != 'secret':
+                    raise exceptions.PermissionDenied('invalid token')
+
+            @event('join')
+            def join_room(self, room: str):
+                self.join(room)
+                return {'type': 'joined', 'room': room}
+
+            @event('say')
+            async def say(self, room: str, text: str, times: int = 1):
+                self.broadcast(room, {'type': 'said', 'text': text * times})
+
+            def receive(self, message):
+                return {'echo': message}
+
+            def disconnect(self, code: int):
+                disconnected.append(code)
+
+        class RootAPI(API):
+            chat: ChatSocket
+
+            @api.get
+            def hello(self):
+                return 'world'
+
+        config = types.SimpleNamespace(background=False, asynchronous=True, root_url=None,
+                                       _application=None, production=False)
+        app = Starlette()
+        StarletteServerAdaptor(config).add_api(app, RootAPI, asynchronous=True)
+        client = TestClient(app)
+
+        with client.websocket_connect('/chat?token=secret') as a, \
+                client.websocket_connect('/chat?token=secret') as b:
+            a.send_json({'type': 'join', 'room': 'r1'})
+            assert a.receive_json() == {'type': 'joined', 'room': 'r1'}
+            b.send_json({'type': 'join', 'room': 'r1'})
+            assert b.receive_json() == {'type': 'joined', 'room': 'r1'}
+            assert len(ChatSocket.rooms.get('r1')) == 2
+
+            # typed params are parsed by utype, the broadcast reaches all the members
+            a.send_json({'type': 'say', 'room': 'r1', 'text': 'hi', 'times': '2'})
+            assert a.receive_json() == b.receive_json() == {'type': 'said', 'text': 'hihi'}
+
+            a.send_text('plain')
+            assert a.receive_json() == {'echo': 'plain'}
+
+            # the invalid message is answered with the error event, the connection is kept
+            a.send_json({'type': 'say', 'room': 'r1'})
+            error = a.receive_json()
+            assert error['type'] == 'error' and error['status'] == 400
+            a.send_json({'type': 'join', 'room': 'r2'})
+            assert a.receive_json() == {'type': 'joined', 'room': 'r2'}
+
+        assert len(ChatSocket.rooms) == 0
+        assert len(disconnected) == 2
+
+        # rejected in connect() before accepted
+        with pytest.raises(WebSocketDisconnect) as e:
+            with client.websocket_connect('/chat?token=invalid') as c:
+                c.receive_text()
+        assert e.value.code == 1008
+
+        assert client.get('/chat').status_code == 426
+        assert client.get('/hello').text == 'world'
+
+    def test_websocket_backpressure(self):
+        import asyncio
+        from utilmeta.core.websocket import WebsocketConnection, Room
+        from utilmeta.core.websocket.backends.base import WebsocketAdaptor
+
+        class MemoryAdaptor(WebsocketAdaptor):
+            def __init__(self):
+                super().__init__(None)
+                self.sent = []
+                self.close_code = None
+                self.blocked = asyncio.Event()
+
+            @property
+            def subprotocols(self):
+                return []
+
+            async def accept(self, subprotocol=None, headers=None):
+                self.accepted = True
+
+            async def receive(self):
+                await asyncio.sleep(10)
+
+            async def send(self, message):
+                await self.blocked.wait()
+                self.sent.append(message)
+
+            async def close(self, code=1000, reason=None):
+                self.closed = True
+                self.close_code = code
+
+        async def main():
+            fast, slow = MemoryAdaptor(), MemoryAdaptor()
+            fast.blocked.set()
+            room = Room('r')
+            connections = []
+            for adaptor in (fast, slow):
+                conn = WebsocketConnection(adaptor, max_queue=2)
+                await conn.accept()
+                room.add(conn)
+                connections.append(conn)
+            for i in range(5):
+                room.broadcast({'i': i})
+                await asyncio.sleep(0.01)
+            # the slow connection is closed once its queue overflows, the others are not affected
+            assert slow.close_code == WebsocketConnection.POLICY_VIOLATION
+            assert fast.sent == ['{"i": %d}' % i for i in range(5)]
+            await connections[0].close()
+            assert fast.close_code == WebsocketConnection.NORMAL_CLOSURE
+
+        asyncio.run(main())
+
     # def test_private_params(self):
     #     class ParamAPI(API):
     #         @api.post
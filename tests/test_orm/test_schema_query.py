@@ -35,6 +35,250 @@ class TestSchemaQuery:
         assert len(res[1].top_articles) == 2
         assert res[1].top_articles[0].views == 10   # -views
 
+    def test_query_plan_cache(self):
+        from app.schema import UserSchema, UserQuery
+        from utilmeta.core.orm.backends.django.compiler import DjangoQueryCompiler
+        from utilmeta.core.orm.backends.django.plan import QueryPlanCache
+        # opt-in
+        assert DjangoQueryCompiler.plan_cache is None
+        cache = QueryPlanCache()
+
+        def serialize(**query):
+            # top_articles has the updated_at of now
+            return [{k: v for k, v in val.items() if k != 'top_articles'}
+                    for val in UserSchema.serialize(UserQuery(query))]
+
+        # identical to the results without the cache
+        plain = serialize(username_like='b', order=['-views_num'], page=1, rows=2)
+        plain_page = serialize(username_like='a', order=['-views_num'], page=2, rows=2)
+
+        DjangoQueryCompiler.plan_cache = cache
+        try:
+            first = serialize(username_like='a', order=['-views_num'], page=1, rows=2)
+            assert cache.stats()['misses'] == 1
+            assert serialize(username_like='a', order=['-views_num'], page=1, rows=2) == first
+            assert cache.stats()['hits'] == 1
+            # new values of the same shape are bound to the cached SQL
+            assert serialize(username_like='b', order=['-views_num'], page=1, rows=2) == plain
+            assert cache.stats()['hits'] == 2
+            assert serialize(username_like='a', order=['-views_num'], page=2, rows=2) == plain_page
+            assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 1, 'max_size': cache.max_size}
+
+            # aggregate filters (HAVING) are not cached
+            serialize(**{'followers_num>=': 2})
+            assert cache.stats()['size'] == 1
+        finally:
+            DjangoQueryCompiler.plan_cache = None
+
+    @pytest.mark.asyncio
+    async def test_async_query_plan_cache(self):
+        from app.schema import UserSchema, UserQuery
+        from utilmeta.core.orm.backends.django.compiler import DjangoQueryCompiler
+        from utilmeta.core.orm.backends.django.plan import QueryPlanCache
+        cache = DjangoQueryCompiler.plan_cache = QueryPlanCache()
+        try:
+            query = dict(username_like='o', order=['-views_num'], page=1)
+            first = await UserSchema.aserialize(UserQuery(query))
+            second = await UserSchema.aserialize(UserQuery(query))
+        finally:
+            DjangoQueryCompiler.plan_cache = None
+        assert [(val.id, val.followers_num) for val in first] == [(val.id, val.followers_num) for val in second]
+        assert {val.username for val in first} == {'bob', 'tony', 'supervisor'}
+        assert cache.stats()['hits'] == 1
+
+    def test_iter_serialize(self):
+        from app.schema import UserSchema, UserQuery
+
+        def project(values):
+            return [(val.id, val.username, val.followers_num, set(val.liked_slugs), len(val.top_articles))
+                    for val in values]
+
+        query = UserQuery(order=['-followers_num', 'signup_time'])
+        expected = project(UserSchema.serialize(query))
+        assert len(expected) > 2
+        # isolated fields are queried for each chunk
+        assert project(UserSchema.iter_serialize(query, chunk_size=2)) == expected
+        assert project(UserSchema.iter_serialize(UserQuery(username='nobody'))) == []
+
+    @pytest.mark.asyncio
+    async def test_async_iter_serialize(self):
+        from app.schema import UserSchema, UserQuery
+        from app.models import User
+
+        def project(values):
+            return [(val.id, val.username, val.followers_num, set(val.liked_slugs)) for val in values]
+
+        query = UserQuery(order=['-followers_num', 'signup_time'])
+        expected = project(await UserSchema.aserialize(query))
+        values = []
+        async for val in UserSchema.aiter_serialize(query, chunk_size=2):
+            # other queries can be made during the iteration
+            assert await User.objects.filter(pk=val.id).aexists()
+            values.append(val)
+        assert project(values) == expected
+
+        usernames = [user.username async for user in User.objects.filter(pk__lte=3).order_by('pk')]
+        assert usernames == ['alice', 'bob', 'jack']
+        # leave the iteration early
+        async for pk in User.objects.values_list('pk', flat=True).aiterator(chunk_size=1):
+            assert pk
+            break
+
+    def test_cursor_pagination(self):
+        from app.models import User
+        from utilmeta.core import orm
+        from utilmeta.core.orm.backends.django import expressions as exp
+        from utilmeta.utils import exceptions
+        from typing import List
+
+        class UserBrief(orm.Schema[User]):
+            id: int
+            username: str
+
+        class UserCursorQuery(orm.Query[User]):
+            order: List[str] = orm.OrderBy({
+                "followers_num": orm.Order(field=exp.Count("followers")),
+                # null for the users without articles
+                "views_num": orm.Order(field=exp.Sum("contents__article__views")),
+                "views_nulls_first": orm.Order(field=exp.Sum("contents__article__views"), nulls_first=True),
+                User.signup_time: orm.Order(),
+            })
+            cursor: str = orm.Cursor()
+            rows: int = orm.Limit(default=2)
+
+        for order in (['-followers_num', 'signup_time'], ['views_num'], ['-views_num', '-signup_time'],
+                      ['views_nulls_first'], ['-views_nulls_first', 'followers_num'], []):
+            expected = [val.id for val in UserBrief.serialize(UserCursorQuery(order=order, rows=100))]
+            assert len(expected) > 2
+            ids = []
+            cursor = None
+            while True:
+                query = UserCursorQuery(order=order, cursor=cursor) if cursor else UserCursorQuery(order=order)
+                result = UserBrief.serialize(query)
+                ids.extend(val.id for val in result)
+                cursor = query.get_next_cursor(result)
+                if not cursor:
+                    break
+                assert len(ids) <= len(expected)
+            assert ids == expected, order
+
+        first = UserBrief.serialize(UserCursorQuery(order=['views_num']))
+        cursor = UserCursorQuery(order=['views_num']).get_next_cursor(first)
+        # page and offset are ignored with the cursor
+        assert [val.id for val in UserBrief.serialize(UserCursorQuery(order=['views_num'], cursor=cursor))] == \
+            [val.id for val in UserBrief.serialize(UserCursorQuery(order=['views_num'], rows=4))][2:]
+        with pytest.raises(exceptions.BadRequest):
+            # the cursor of another order
+            UserCursorQuery(order=['signup_time'], cursor=cursor).get_queryset()
+        with pytest.raises(exceptions.BadRequest):
+            UserCursorQuery(cursor='invalid').get_queryset()
+
+    @pytest.mark.asyncio
+    async def test_async_cursor_pagination(self):
+        from app.schema import UserSchema
+        from app.models import User
+        from utilmeta.core import orm
+        from utilmeta.core.orm.backends.django import expressions as exp
+        from typing import List
+
+        class UserCursorQuery(orm.Query[User]):
+            order: List[str] = orm.OrderBy({
+                "followers_num": orm.Order(field=exp.Count("followers")),
+                User.signup_time: orm.Order(),
+            })
+            cursor: str = orm.Cursor()
+            rows: int = orm.Limit(default=2)
+
+        order = ['-followers_num', 'signup_time']
+        expected = [val.id for val in await UserSchema.aserialize(UserCursorQuery(order=order, rows=100))]
+        ids = []
+        query = UserCursorQuery(order=order)
+        while True:
+            result = await UserSchema.aserialize(query)
+            ids.extend(val.id for val in result)
+            cursor = await query.aget_next_cursor(result)
+            if not cursor:
+                break
+            query = UserCursorQuery(order=order, cursor=cursor)
+        assert ids == expected
+
+    def test_count_strategy(self, monkeypatch):
+        from app.models import User
+        from app.schema import UserSchema
+        from utilmeta.core import orm
+        from utilmeta.core.cache.config import CacheConnections, Cache
+        from utilmeta.core.cache.backends.django import DjangoCacheAdaptor
+        from utilmeta.core.orm.backends.django import expressions as exp
+
+        total = User.objects.count()
+        assert total > 3
+
+        class CappedQuery(orm.Query[User]):
+            __count__ = orm.CountStrategy('capped', limit=3)
+            username_like: str = orm.Filter(query=lambda v: exp.Q(username__icontains=v))
+
+        assert CappedQuery().count() == 3
+        assert CappedQuery(username_like='alice').count() == 1
+
+        class EstimateQuery(orm.Query[User]):
+            __count__ = orm.CountStrategy('estimate')
+
+        # no planner estimate on sqlite, counted exactly
+        assert EstimateQuery().count() == total
+
+        with pytest.raises(ValueError):
+            orm.CountStrategy('capped', threshold=10)
+        with pytest.raises(ValueError):
+            orm.CountStrategy('approximate')
+
+        cache = Cache(engine='locmem')
+        cache.adaptor = DjangoCacheAdaptor(cache, 'default')
+        monkeypatch.setattr(CacheConnections, 'get', classmethod(lambda cls, alias='default', default=None: cache))
+
+        class CachedQuery(orm.Query[User]):
+            __count__ = orm.CountStrategy(cache='default', timeout=5)
+            admin: bool
+
+        assert CachedQuery().count() == total
+        created = User.objects.create(username='count-cached')
+        try:
+            # served from the cache until it expires
+            assert CachedQuery().count() == total
+            # another filter is another key
+            assert CachedQuery(admin=False).count() == User.objects.filter(admin=False).count()
+        finally:
+            created.delete()
+
+        values, count = UserSchema.serialize_with_count(CappedQuery())
+        assert count == 3
+        assert len(values) == total
+
+    @pytest.mark.asyncio
+    async def test_async_count_strategy(self):
+        from app.models import User
+        from app.schema import UserSchema, UserQuery
+        from utilmeta.core import orm
+
+        total = await User.objects.acount()
+
+        class CappedQuery(orm.Query[User]):
+            __count__ = orm.CountStrategy('capped', limit=3)
+            rows: int = orm.Limit(default=2)
+
+        class EstimateQuery(orm.Query[User]):
+            __count__ = orm.CountStrategy('estimate')
+
+        assert await CappedQuery().acount() == 3
+        assert await EstimateQuery().acount() == total
+
+        values, count = await UserSchema.aserialize_with_count(CappedQuery())
+        assert count == 3
+        assert len(values) == 2
+        query = UserQuery(order=['-followers_num', 'signup_time'], page=1, rows=2)
+        values, count = await UserSchema.aserialize_with_count(query)
+        assert count == total
+        assert [val.id for val in values] == [val.id for val in await UserSchema.aserialize(query)]
+
     def test_scope_and_excludes(self):
         from app.schema import UserSchema, UserQuery
         res1 = UserSchema.serialize(
@@ -193,6 +437,90 @@ class TestSchemaQuery:
     async def test_async_save(self):
         pass
 
+    def test_bulk_save(self):
+        from app.models import User
+        from utilmeta.core import orm
+        from utilmeta.core.orm import exceptions
+
+        class UserSave(orm.Schema[User]):
+            id: int = orm.Field(mode='ra', default=None, defer_default=True)
+            username: str
+            admin: bool = orm.Field(default=False, defer_default=True)
+
+        max_id = User.objects.order_by('-pk').values_list('pk', flat=True).first()
+        admin = User.objects.filter(pk=1).values_list('admin', flat=True).first()
+        try:
+            values = UserSave.bulk_save([
+                {'username': 'bulk-1'},
+                {'id': 1, 'admin': True, 'username': 'alice'},
+                {'username': 'bulk-2', 'admin': True},
+                {'id': max_id + 10, 'username': 'bulk-3'},
+            ])
+            pks = [val.pk for val in values]
+            assert pks[1] == 1
+            assert pks[3] == max_id + 10
+            assert pks[0] and pks[2] and len(set(pks)) == 4
+            assert dict(User.objects.filter(pk__in=pks).values_list('pk', 'username')) == {
+                pks[0]: 'bulk-1', 1: 'alice', pks[2]: 'bulk-2', max_id + 10: 'bulk-3'
+            }
+            assert User.objects.get(pk=1).admin is True
+            assert User.objects.get(pk=pks[2]).admin is True
+
+            # update with the same fields
+            UserSave.bulk_save([{'id': pks[0], 'username': 'bulk-1-new'}], must_update=True)
+            assert User.objects.get(pk=pks[0]).username == 'bulk-1-new'
+
+            with pytest.raises(exceptions.MissingPrimaryKey):
+                UserSave.bulk_save([{'username': 'bulk-4'}], must_update=True)
+            with pytest.raises(exceptions.UpdateFailed):
+                UserSave.bulk_save([{'id': max_id + 20, 'username': 'bulk-5'}], must_update=True)
+            assert not User.objects.filter(username__in=['bulk-4', 'bulk-5']).exists()
+        finally:
+            User.objects.filter(pk__gt=max_id).delete()
+            User.objects.filter(pk=1).update(admin=admin)
+
+    def test_bulk_save_partial(self):
+        from app.models import Follow, User
+        from utilmeta.core import orm
+
+        class FollowSave(orm.Schema[Follow]):
+            id: int = orm.Field(mode='ra', default=None, defer_default=True)
+            user_id: int = orm.Field(default=None, defer_default=True)
+            target_id: int = orm.Field(default=None, defer_default=True)
+
+        follow = Follow.objects.order_by('pk').first()
+        user_id, target_id = follow.user_id, follow.target_id
+        other = User.objects.exclude(pk__in=[user_id, target_id]).exclude(
+            user_followings__target_id=target_id).values_list('pk', flat=True).first()
+        try:
+            # the NOT NULL target_id is not provided: the row is updated instead of upserted
+            values = FollowSave.bulk_save([{'id': follow.pk, 'user_id': other}])
+            assert [val.pk for val in values] == [follow.pk]
+            assert Follow.objects.filter(pk=follow.pk).values_list('user_id', 'target_id').first() == \
+                (other, target_id)
+        finally:
+            Follow.objects.filter(pk=follow.pk).update(user_id=user_id)
+
     @pytest.mark.asyncio
     async def test_async_bulk_save(self):
-        pass
+        from app.models import User
+        from utilmeta.core import orm
+
+        class UserSave(orm.Schema[User]):
+            id: int = orm.Field(mode='ra', default=None, defer_default=True)
+            username: str
+
+        max_id = await User.objects.order_by('-pk').values_list('pk', flat=True).afirst()
+        try:
+            values = await UserSave.abulk_save([
+                {'username': 'async-bulk-1'},
+                {'id': 2, 'username': 'bob'},
+                {'id': max_id + 10, 'username': 'async-bulk-2'},
+            ])
+            pks = [val.pk for val in values]
+            assert pks[1] == 2
+            assert pks[2] == max_id + 10
+            assert pks[0] and pks[0] > max_id
+            assert await User.objects.filter(username__startswith='async-bulk-').acount() == 2
+        finally:
+            await User.objects.filter(pk__gt=max_id).adelete()
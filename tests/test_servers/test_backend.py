@@ -75,3 +75,30 @@ class TestServers:
 
     def test_adapt_tornado(self):
         pass
+
+    def test_adapt_asgi(self):
+        from starlette.testclient import TestClient
+        from utilmeta.core.server.backends.asgi import ASGIServerAdaptor
+        from tests.server.server import service
+        service.set_backend(ASGIServerAdaptor)
+        adaptor: ASGIServerAdaptor = service.adaptor
+        adaptor.adapt(RootAPI, route='/test')
+        client = TestClient(service.application())
+
+        resp = client.get('/api/hello')
+        assert resp.status_code == 200
+        assert resp.json()['data'] == 'world'
+        assert resp.headers['content-length'] == str(len(resp.content))
+        assert client.get('/hello').status_code == 404
+
+        resp = client.get('/test/doc/tech/3', params={'q': 'x', 'secs': 0}, headers={'Host': 'example.com'})
+        assert resp.json()['result'] == ['tech', 3, 'x', 'example.com', 0]
+
+        resp = client.post(
+            '/test/tech',
+            params={'q': 1},
+            data={'name': 'images'},
+            files=[('images', ('a.png', b'a')), ('images', ('b.png', b'b'))],
+            headers={'X-Test-Header': 'test'}
+        )
+        assert resp.json()['result'] == ['tech', 1, 2, 'images', 'test']
@@ -0,0 +1,23 @@
+from .base import Config
+from typing import Optional
+
+
+class JSON(Config):
+    """
+    codec: the JSON codec of the service, "json" (stdlib, default), "orjson", "msgspec" or "auto",
+    "auto" uses orjson if it is installed, otherwise the stdlib json,
+    orjson and msgspec output compact separators and encode NaN / Infinity as null,
+    so the response bytes (and Content-Length / ETag) differ from the stdlib json
+    """
+    codec: Optional[str] = 'json'
+
+    def __init__(self, codec: Optional[str] = 'json'):
+        super().__init__(**locals())
+        self.codec = codec
+
+    def hook(self, service):
+        self.set_codec()
+
+    def set_codec(self):
+        from utilmeta.utils import set_json_codec
+        return set_json_codec(self.codec)
@@ -1,20 +1,24 @@
-from typing import Union, Dict, Type, List
+from typing import Union, Dict, Type, List, Optional
 from utilmeta.utils.error import Error
 from utilmeta.utils.context import ParserProperty
-from utilmeta.utils import Header, EndpointAttr, COMMON_METHODS, awaitable, classonlymethod, distinct_add
+from utilmeta.utils import Header, EndpointAttr, COMMON_METHODS, awaitable, async_entry, \
+    classonlymethod, file_like
 from utilmeta.utils import exceptions as exc
 
 import inspect
 import warnings
+import os
 
-from functools import partial
 from utilmeta.utils import PluginEvent, PluginTarget, Property
 from utype.parser.field import ParserField
 from utype import Options
 from utype.utils.datastructures import unprovided
 from ..response import Response
+from ..response.file import ResponseFile
+from ..response.stream import ResponseStream
 from ..request import Request, var
 from .route import APIRoute
+from .router import APIRouter, RouteMatch, RouteAllows
 from .endpoint import Endpoint
 from .hook import Hook, ErrorHook, BeforeHook, AfterHook
 from . import decorator
@@ -54,6 +58,8 @@ class API(PluginTarget):
     _annotations: Dict[str, type]
     _hook_cls: Type[Hook] = Hook
     _route_cls: Type[APIRoute] = APIRoute
+    _router_cls: Type[APIRouter] = APIRouter
+    _router: APIRouter
     _endpoint_cls: Type[Endpoint] = Endpoint
     _parser_field_cls: Type[ParserField] = ParserField
     _default_error_hooks: Dict[Type[Exception], ErrorHook]
@@ -333,6 +339,7 @@ class API(PluginTarget):
                                      f'route: {repr(api_route.route)} conflict '
                                      f'with api class: {api_routes[api_route.route]}')
         # TODO: test if any static route is override by a higher priority dynamic route
+        cls._router = cls._router_cls(cls._routes)
 
     @classonlymethod
     def __reproduce_with__(cls, generator: decorator.APIGenerator):
@@ -371,29 +378,26 @@ class API(PluginTarget):
         if isinstance(handler, str):
             from utilmeta.utils import import_obj
             handler = import_obj(handler)
-        if isinstance(handler, APIRoute):
-            cls._routes.append(handler)
-            return
-        cls._routes.append(cls._route_cls(
-            handler=handler,
-            route=route,
-            name=route.replace('/', '_'),
-            before_hooks=before_hooks,
-            after_hooks=after_hooks,
-            error_hooks=error_hooks
-        ))
-        cls._validate_routes()     # validate each time there is a new api mount
+        if not isinstance(handler, APIRoute):
+            handler = cls._route_cls(
+                handler=handler,
+                route=route,
+                name=route.replace('/', '_'),
+                before_hooks=before_hooks,
+                after_hooks=after_hooks,
+                error_hooks=error_hooks
+            )
+        if not handler.regex_list:
+            handler.compile_route()
+        cls._routes.append(handler)
+        cls._validate_routes()     # validate each time there is a new api mount (and recompile the router)
 
     def __init__(self, request):
         super().__init__()
         self.request = self._request_cls.apply_for(request)
         self.response = getattr(self, 'response', Response)
+        # endpoints and hooks are bound to the instance when accessed (Endpoint.__get__, Hook.__get__)
         # set request before setup instance, cause this hook may depend on the request context
-        for key, val in self.__class__.__dict__.items():
-            if isinstance(val, Endpoint):
-                setattr(self, key, partial(val, self))
-            if isinstance(val, Hook):
-                setattr(self, key, partial(val, self))
         # set request params for API instance
         # wrapper: RequestContextWrapper = getattr(self.__class__, '_wrapper', None)
         # if wrapper:
@@ -420,43 +424,51 @@ class API(PluginTarget):
         hook = error.get_hook(error_hooks, exact=isinstance(error.exception, exc.Redirect))
         # hook applied before handel_error plugin event
         if hook:
-            result = await hook(self, error)
+            result = await hook.__acall__(self, error)
         else:
-            result = await handle_error(self, error)
+            result = await handle_error.__acall__(self, error)
             # handle_error event can throw an error, or return a valid response
             # if nothing return, it implies that follow the api default error flow
             if result is None:
                 raise error.throw()
-        return await process_response(self, result)
+        return await process_response.__acall__(self, result)
+
+    _ahandle_error = async_entry('_handle_error')
+
+    def _match_route(self, path: str) -> RouteMatch:
+        # the upper API level may already resolved the match of this level in the same pass
+        match_var = var.route_match.setup(self.request)
+        match: Optional[RouteMatch] = match_var.get()
+        if match is None or match.router is not self._router or match.path != path:
+            match = self._router.match(path)
+        match_var.set(match.next)
+        return match
 
     def _resolve(self) -> APIRoute:
-        method_routes: Dict[str, APIRoute] = {}
-        for route in self._routes:
-            if route.match_route(self.request):
-                # path math
-                if not route.method:
-                    # not endpoint
-                    # further API mount
-                    return route
-                # elif route.method == self.request.method and not self.request.is_options:
-                #     # options/cross-origin need to collect methods to generate Allow-Methods
-                #     return route
-                # first match is 1st priority
-                method_routes.setdefault(route.method, route)
+        route_var = var.unmatched_route.setup(self.request)
+        match = self._match_route(route_var.get())
+        if match.params:
+            path_params_var = var.path_params.setup(self.request)
+            path_params: dict = path_params_var.get()
+            path_params.update(match.params)
+            path_params_var.set(path_params)
+        if match.route:
+            # not endpoint
+            # further API mount
+            route_var.set(match.remaining)
+            return match.route
+        method_routes: Dict[str, APIRoute] = match.methods
         if method_routes:
-            allow_methods = var.allow_methods.setup(self.request)
-            allow_headers = var.allow_headers.setup(self.request)
-            route_var = var.unmatched_route.setup(self.request)
-            allow_methods.set(list(method_routes))
-            headers = []
-            for route in method_routes.values():
-                distinct_add(headers, route.header_names)
-            allow_headers.set(headers)
+            # allowed methods and headers are computed once per route set by the router
+            allows = self._router.get_allows(method_routes)
+            var.route_allows.setup(self.request).set(allows)
+            var.allow_methods.setup(self.request).set(allows.methods)
+            var.allow_headers.setup(self.request).set(allows.headers)
             route_var.set('')
             if self.request.method not in method_routes:
                 raise exc.MethodNotAllowed(
                     method=self.request.method,
-                    allows=allow_methods.get()
+                    allows=allows.methods
                 )
             return method_routes[self.request.method]
         raise exc.NotFound(path=self.request.path)
@@ -471,6 +483,12 @@ class API(PluginTarget):
                     result.request = self.request
                 elif Response.is_cls(getattr(self.__class__, 'response', None)):
                     result = self.response(result, request=self.request)
+                elif self.request.is_head or file_like(result) or \
+                        isinstance(result, (ResponseFile, ResponseStream, os.PathLike)):
+                    # files are answered against the conditional and Range headers of the request
+                    # streams constructed by the endpoint (such as the event stream) carry their own headers
+                    # HEAD requests are answered without the body (not encoded)
+                    result = Response(result, request=self.request)
                 response = process_response(self, result)
         except Exception as e:
             response = self._handle_error(Error(e), error_hooks)
@@ -483,19 +501,29 @@ class API(PluginTarget):
             # async with: no
             with self._resolve() as route:
                 error_hooks = route.error_hooks
-                result = await route(self)
+                result = await route.__acall__(self)
                 if isinstance(result, Response):
                     result.request = self.request
                 elif Response.is_cls(getattr(self.__class__, 'response', None)):
                     result = self.response(result, request=self.request)
-                response = await process_response(self, result)
+                elif self.request.is_head or file_like(result) or \
+                        isinstance(result, (ResponseFile, ResponseStream, os.PathLike)):
+                    # files are answered against the conditional and Range headers of the request
+                    # streams constructed by the endpoint (such as the event stream) carry their own headers
+                    # HEAD requests are answered without the body (not encoded)
+                    result = Response(result, request=self.request)
+                response = await process_response.__acall__(self, result)
         except Exception as e:
-            response = await self._handle_error(Error(e), error_hooks)
+            response = await self._ahandle_error(Error(e), error_hooks)
         return response
 
+    __acall__ = async_entry('__call__')
+
     def options(self):
+        allows: Optional[RouteAllows] = var.route_allows.getter(self.request)
         return Response(headers={
-            Header.ALLOW: ','.join(set([m.upper() for m in var.allow_methods.getter(self.request)])),
+            Header.ALLOW: allows.allow_methods if allows else
+            ','.join(set([m.upper() for m in var.allow_methods.getter(self.request)])),
             Header.LENGTH: '0'
         })
 
@@ -508,9 +536,11 @@ class API(PluginTarget):
     @awaitable(__serve__)
     async def __serve__(self, unit):
         if isinstance(unit, Endpoint):
-            return await unit.serve(self)
+            return await unit.aserve(self)
         else:
-            return await unit(self.request)()
+            return await unit(self.request).__acall__()
+
+    __aserve__ = async_entry('__serve__')
 
 
 setup_class.register(API)
@@ -133,6 +133,7 @@ class APIDecoratorWrapper:
                  private: bool = None,
                  priority: int = None,
                  eager: bool = None,
+                 compiled: bool = None,
                  **kwargs,
                  ):
 
@@ -1,16 +1,21 @@
 from utilmeta import utils
 from utilmeta.utils import exceptions as exc
-from typing import Callable, Union, TYPE_CHECKING
+from typing import Callable, Union, Mapping, Optional, List, TYPE_CHECKING
 from utilmeta.utils.plugin import PluginTarget, PluginEvent
 from utilmeta.utils.error import Error
 from utilmeta.utils.context import ContextWrapper, Property
 from utype.parser.base import BaseParser
 from utype.parser.func import FunctionParser
 from utype.parser.field import ParserField
+from utype.utils.datastructures import unprovided
 import inspect
+import asyncio
+from functools import partial
 from ..request import Request, var
-from ..request.properties import QueryParam
+from ..request.properties import QueryParam, RequestParam, Path
 from ..response import Response
+from ..response.stream import ResponseStream
+from ..response.sse import EventStream
 import utype
 
 if TYPE_CHECKING:
@@ -42,13 +47,88 @@ class RequestContextWrapper(ContextWrapper):
         elif prop.__in__ and getattr(prop.__in__, '__ident__', None) == 'header':
             name = val.name.lower()
             if name not in self.header_names:
-                self.header_names += name
+                self.header_names.append(name)
         else:
             headers = getattr(prop, 'headers', None)
             if headers and utils.multi(headers):
                 utils.distinct_add(self.header_names, [str(v).lower() for v in headers])
         return prop.init(val)
 
+    def is_static(self, prop) -> bool:
+        # param that can be looked up directly from a sync mapping (path / query / headers / cookies)
+        p = prop.prop
+        if not isinstance(p, RequestParam):
+            return False
+        cls = p.__class__
+        if cls.getter is not RequestParam.getter or cls.get_value is not RequestParam.get_value:
+            return False
+        if p.__in__ is Path:
+            return True
+        return not getattr(cls.get_mapping, '_awaitable', False)
+
+    def compile(self, asynchronous: bool = False) -> Callable:
+        """
+        Generate the source of a specialized extractor function for the request params,
+        the params with the same mapping source are looked up by their precomputed aliases
+        after the mapping is fetched once, other properties fallback to their getters
+        """
+        namespace = dict(
+            Mapping=Mapping,
+            unprovided=unprovided,
+            isawaitable=inspect.isawaitable,
+            path_params=var.path_params,
+        )
+        groups = {}
+        fallbacks = []
+        for key, prop in self.properties.items():
+            if self.is_static(prop):
+                mapping = 'path' if prop.prop.__in__ is Path else prop.prop.__class__.get_mapping
+                groups.setdefault(mapping, []).append((key, prop))
+            else:
+                fallbacks.append((key, prop))
+
+        if asynchronous:
+            lines = [
+                'async def extract(request):',
+                '    path = await path_params.agetter(request)',
+            ]
+        else:
+            lines = [
+                'def extract(request):',
+                '    path = path_params.getter(request)',
+            ]
+        lines.append('    params = dict(path)')
+
+        for i, (mapping, props) in enumerate(groups.items()):
+            name = 'path'
+            if mapping != 'path':
+                name = f'mapping_{i}'
+                namespace[f'get_mapping_{i}'] = mapping
+                lines.append(f'    {name} = get_mapping_{i}(request)')
+            lines.append(f'    if isinstance({name}, dict) or isinstance({name}, Mapping):')
+            if any(prop.prop.case_insensitive for key, prop in props):
+                lines.append(f'        {name}_lower = {{k.lower(): v for k, v in {name}.items()}}')
+            for key, prop in props:
+                data = f'{name}_lower' if prop.prop.case_insensitive else name
+                branch = 'if'
+                for alias in prop.field.all_aliases:
+                    lines.append(f'        {branch} {repr(alias)} in {data}:')
+                    lines.append(f'            params[{repr(key)}] = {data}[{repr(alias)}]')
+                    branch = 'elif'
+
+        for i, (key, prop) in enumerate(fallbacks):
+            namespace[f'get_{i}'] = prop.get
+            lines.append(f'    value = get_{i}(request)')
+            if asynchronous:
+                lines.append('    if isawaitable(value):')
+                lines.append('        value = await value')
+            lines.append('    if not unprovided(value):')
+            lines.append(f'        params[{repr(key)}] = value')
+
+        lines.append('    return params')
+        exec('\n'.join(lines), namespace)
+        return namespace['extract']
+
 
 class Endpoint(PluginTarget):
     @classmethod
@@ -57,6 +137,13 @@ class Endpoint(PluginTarget):
         if not _cls or not issubclass(_cls, Endpoint):
             # override current class
             _cls = cls
+            stream = getattr(func, 'stream', None)
+            if stream:
+                # @api.get(stream='sse')
+                _cls = STREAM_ENDPOINTS.get(stream)
+                if not _cls:
+                    raise ValueError(f'Invalid endpoint stream: {repr(stream)}, '
+                                     f'must be one of {list(STREAM_ENDPOINTS)}')
 
         kwargs = {}
         for key, val in inspect.signature(_cls).parameters.items():
@@ -74,7 +161,11 @@ class Endpoint(PluginTarget):
                  method: str,
                  plugins: list = None,
                  idempotent: bool = None,
-                 eager: bool = False
+                 eager: bool = False,
+                 compiled: bool = False,
+                 etag: Callable = None,
+                 last_modified: Callable = None,
+                 content_length: Callable = None,
                  ):
 
         super().__init__(plugins=plugins)
@@ -93,6 +184,38 @@ class Endpoint(PluginTarget):
             parse_params=False,
             parse_result=True
         )
+        self.compiled = compiled
+        self.extractor = None
+        self.async_extractor = None
+        if compiled:
+            self.extractor = self.wrapper.compile()
+            self.async_extractor = self.wrapper.compile(asynchronous=True)
+
+        # the cheap metadata hooks, called with the API and the params of the endpoint (that they accept),
+        # the HEAD requests are answered by them without calling the endpoint function
+        self.metadata_hooks = {}
+        for header, hook in ((utils.Header.ETAG, etag),
+                             (utils.Header.LAST_MODIFIED, last_modified),
+                             (utils.Header.LENGTH, content_length)):
+            if hook is None:
+                continue
+            if not callable(hook):
+                raise TypeError(f'{self}: invalid {header} hook: {hook}, must be a function')
+            self.metadata_hooks[header] = (hook, self._get_hook_params(hook))
+
+    @classmethod
+    def _get_hook_params(cls, hook) -> Optional[List[str]]:
+        # the names of the params accepted by the hook (except the API), None if it accepts **kwargs
+        params = list(inspect.signature(hook).parameters.values())[1:]
+        if any(p.kind == p.VAR_KEYWORD for p in params):
+            return None
+        return [p.name for p in params if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+
+    def __get__(self, instance, owner=None):
+        # bind to the API instance lazily when accessed
+        if instance is None:
+            return self
+        return partial(self, instance)
 
     def iter_plugins(self):
         for cls, plugin in self._plugins.items():
@@ -134,7 +257,10 @@ class Endpoint(PluginTarget):
                     api.request = req
                     args, kwargs = self.parse_request(api.request)
                     enter_endpoint(self, api, *args, **kwargs)
-                    response = self(api, *args, **kwargs)
+                    if self.metadata_hooks:
+                        response = self.metadata_response(api, *args, **kwargs)
+                    else:
+                        response = self(api, *args, **kwargs)
                 else:
                     response = req
                 result = self.process_response(response)
@@ -165,15 +291,18 @@ class Endpoint(PluginTarget):
                     retry_index=retry_index,
                     idempotent=self.idempotent
                 )
-                req = await self.process_request(api.request)
+                req = await self.aprocess_request(api.request)
                 if isinstance(req, Request):
                     api.request = req
-                    args, kwargs = await self.parse_request(api.request)
-                    await enter_endpoint(self, api, *args, **kwargs)
-                    response = await self(api, *args, **kwargs)
+                    args, kwargs = await self.aparse_request(api.request)
+                    await enter_endpoint.__acall__(self, api, *args, **kwargs)
+                    if self.metadata_hooks:
+                        response = await self.ametadata_response(api, *args, **kwargs)
+                    else:
+                        response = await self.__acall__(api, *args, **kwargs)
                 else:
                     response = req
-                result = await self.process_response(response)
+                result = await self.aprocess_response(response)
                 if isinstance(result, Request):
                     # need another loop
                     api.request = result
@@ -182,16 +311,18 @@ class Endpoint(PluginTarget):
                     break
             except Exception as e:
                 err = Error(e)
-                result = await self.handle_error(api.request, err)
+                result = await self.ahandle_error(api.request, err)
                 if isinstance(result, Request):
                     api.request = result
                 else:
                     response = result
                     break
             retry_index += 1
-        await exit_endpoint(self, api)
+        await exit_endpoint.__acall__(self, api)
         return response
 
+    aserve = utils.async_entry('serve')
+
     def process_request(self, request: Request) -> Union[Request, Response]:
         for handler in process_request.iter(self):
             try:
@@ -219,6 +350,72 @@ class Endpoint(PluginTarget):
                 request = req
         return request
 
+    aprocess_request = utils.async_entry('process_request')
+
+    def _hook_kwargs(self, params: Optional[List[str]], kwargs: dict) -> dict:
+        if params is None:
+            return kwargs
+        return {key: kwargs[key] for key in params if key in kwargs}
+
+    @classmethod
+    def _metadata_value(cls, header: str, value):
+        if header == utils.Header.ETAG:
+            value = str(value)
+            if not value.startswith(('"', 'W/"')):
+                value = f'"{value}"'
+            return value
+        if header == utils.Header.LAST_MODIFIED:
+            return utils.http_time(value)
+        return int(value)
+
+    def _make_response(self, api: 'API', result, headers: dict):
+        if isinstance(result, Response):
+            for key, value in headers.items():
+                result.headers.setdefault(key, value)
+            return result
+        response_cls = getattr(api, 'response', None)
+        if not Response.is_cls(response_cls):
+            response_cls = Response
+        return response_cls(result, headers=headers, request=api.request)
+
+    def metadata_response(self, api: 'API', *args, **kwargs):
+        """
+        Call the metadata hooks, the HEAD request is answered by the headers without calling the endpoint,
+        the other requests are answered by the result with the same validators
+        (Content-Length of them is computed from the encoded body)
+        """
+        head = api.request.is_head
+        headers = {}
+        for header, (hook, params) in self.metadata_hooks.items():
+            if header == utils.Header.LENGTH and not head:
+                continue
+            value = hook(api, **self._hook_kwargs(params, kwargs))
+            if inspect.isawaitable(value):
+                raise exc.ServerError(f'{self}: awaitable {header} hook detected in sync function')
+            if value is not None:
+                headers[header] = self._metadata_value(header, value)
+        if head:
+            return self._make_response(api, None, headers)
+        return self._make_response(api, self(api, *args, **kwargs), headers)
+
+    @utils.awaitable(metadata_response)
+    async def metadata_response(self, api: 'API', *args, **kwargs):
+        head = api.request.is_head
+        headers = {}
+        for header, (hook, params) in self.metadata_hooks.items():
+            if header == utils.Header.LENGTH and not head:
+                continue
+            value = hook(api, **self._hook_kwargs(params, kwargs))
+            while inspect.isawaitable(value):
+                value = await value
+            if value is not None:
+                headers[header] = self._metadata_value(header, value)
+        if head:
+            return self._make_response(api, None, headers)
+        return self._make_response(api, await self.__acall__(api, *args, **kwargs), headers)
+
+    ametadata_response = utils.async_entry('metadata_response')
+
     def process_response(self, response):
         for handler in process_response.iter(self):
             try:
@@ -256,6 +453,8 @@ class Endpoint(PluginTarget):
                 response = resp
         return response
 
+    aprocess_response = utils.async_entry('process_response')
+
     def handle_error(self, request: Request, e: Error):
         for error_handler in handle_error.iter(self):
             try:
@@ -287,6 +486,8 @@ class Endpoint(PluginTarget):
                 return res
         raise e.throw()
 
+    ahandle_error = utils.async_entry('handle_error')
+
     def __call__(self, *args, **kwargs):
         # with self:
         r = self.executor(*args, **kwargs)
@@ -298,15 +499,28 @@ class Endpoint(PluginTarget):
     async def __call__(self, *args, **kwargs):
         # async with self:
         r = self.executor(*args, **kwargs)
+        if inspect.isawaitable(r):
+            timeout = utils.get_timeout()
+            if timeout is not None:
+                # cancel the execution when the deadline is reached
+                try:
+                    r = await asyncio.wait_for(r, timeout)
+                except asyncio.TimeoutError as e:
+                    raise utils.DeadlineExceeded(f'{self}: deadline exceeded') from e
         while inspect.isawaitable(r):
             # executor is maybe a sync function, which will not need to await
             r = await r
         return r
 
+    __acall__ = utils.async_entry('__call__')
+
     def parse_request(self, request: Request):
         try:
-            kwargs = dict(var.path_params.getter(request))
-            kwargs.update(self.wrapper.parse_context(request))
+            if self.extractor:
+                kwargs = self.extractor(request)
+            else:
+                kwargs = dict(var.path_params.getter(request))
+                kwargs.update(self.wrapper.parse_context(request))
             return self.parser.parse_params((), kwargs, context=self.parser.options.make_context())
         except utype.exc.ParseError as e:
             raise exc.BadRequest(str(e), detail=e.get_detail()) from e
@@ -314,16 +528,67 @@ class Endpoint(PluginTarget):
     @utils.awaitable(parse_request)
     async def parse_request(self, request: Request):
         try:
-            kwargs = dict(await var.path_params.getter(request))
-            kwargs.update(await self.wrapper.parse_context(request))
+            if self.async_extractor:
+                kwargs = await self.async_extractor(request)
+            else:
+                kwargs = dict(await var.path_params.agetter(request))
+                kwargs.update(await self.wrapper.aparse_context(request))
             return self.parser.parse_params((), kwargs, context=self.parser.options.make_context())
             # in base Endpoint, args is not supported
         except utype.exc.ParseError as e:
             raise exc.BadRequest(str(e), detail=e.get_detail()) from e
 
+    aparse_request = utils.async_entry('parse_request')
+
     def generate_call(self):
         pass
 
 
+class SSEEndpoint(Endpoint):
+    """
+    Endpoint of the Server-Sent Events, declared by @api.get(stream='sse'),
+    the result (generator, async generator or EventHub subscription) is sent as text/event-stream,
+    with a heartbeat comment every heartbeat seconds when idle and the reconnection delay (retry, in ms)
+    """
+    stream_cls = EventStream
+
+    def __init__(self, f: Callable, *,
+                 method: str,
+                 plugins: list = None,
+                 idempotent: bool = None,
+                 eager: bool = False,
+                 compiled: bool = False,
+                 stream: str = EventStream.SSE,
+                 heartbeat: float = EventStream.DEFAULT_HEARTBEAT,
+                 retry: int = None,
+                 ):
+        super().__init__(f, method=method, plugins=plugins, idempotent=idempotent, eager=eager, compiled=compiled)
+        self.stream = stream
+        self.heartbeat = heartbeat
+        self.retry = retry
+
+    def make_stream(self, result):
+        if isinstance(result, (Response, ResponseStream)):
+            return result
+        if not self.stream_cls.streamable(result):
+            raise exc.ServerError(f'{self}: invalid event stream result: {result}, '
+                                  f'must be a generator or async generator')
+        return self.stream_cls(result, heartbeat=self.heartbeat, retry=self.retry)
+
+    def __call__(self, *args, **kwargs):
+        return self.make_stream(super().__call__(*args, **kwargs))
+
+    @utils.awaitable(__call__)
+    async def __call__(self, *args, **kwargs):
+        # async_entry cannot be accessed from super()
+        return self.make_stream(await Endpoint.__acall__(self, *args, **kwargs))
+
+    __acall__ = utils.async_entry('__call__')
+
+
+STREAM_ENDPOINTS = {
+    EventStream.SSE: SSEEndpoint
+}
+
 enter_endpoint.register(Endpoint)
 exit_endpoint.register(Endpoint)
@@ -7,6 +7,7 @@ from .endpoint import RequestContextWrapper
 from typing import Callable, Type, TYPE_CHECKING
 import inspect
 import utype
+from functools import partial
 
 
 if TYPE_CHECKING:
@@ -60,6 +61,12 @@ class Hook:
             parse_result=self.parse_result,
         )
 
+    def __get__(self, instance, owner=None):
+        # bind to the API instance lazily when accessed
+        if instance is None:
+            return self
+        return partial(self, instance)
+
     @property
     def hook_all(self):
         return '*' in self.hook_targets
@@ -92,6 +99,8 @@ class Hook:
             r = await r
         return r
 
+    __acall__ = utils.async_entry('__call__')
+
 
 class BeforeHook(Hook):
     hook_type = utils.EndpointAttr.before_hook
@@ -131,21 +140,25 @@ class BeforeHook(Hook):
     @utils.awaitable(parse_request)
     async def parse_request(self, request: Request):
         try:
-            kwargs = dict(await var.path_params.getter(request))
-            kwargs.update(await self.wrapper.parse_context(request))
+            kwargs = dict(await var.path_params.agetter(request))
+            kwargs.update(await self.wrapper.aparse_context(request))
             return self.parser.parse_params((), kwargs, context=self.parser.options.make_context())
             # in base Endpoint, args is not supported
         except utype.exc.ParseError as e:
             raise exceptions.BadRequest(str(e), detail=e.get_detail()) from e
 
+    aparse_request = utils.async_entry('parse_request')
+
     def serve(self, api: 'API'):
         args, kwargs = self.parse_request(api.request)
         return self(api, **kwargs)
 
     @utils.awaitable(serve)
     async def serve(self, api: 'API'):
-        args, kwargs = await self.parse_request(api.request)
-        return await self(api, *args, **kwargs)
+        args, kwargs = await self.aparse_request(api.request)
+        return await self.__acall__(api, *args, **kwargs)
+
+    aserve = utils.async_entry('serve')
 
 
 class AfterHook(Hook):
@@ -0,0 +1,338 @@
+from utype.types import *
+from utilmeta.utils.plugin import Plugin
+from utilmeta.utils import Header, STATUS_WITHOUT_BODY, weak_etag
+from utilmeta.core.request import Request
+from utilmeta.core.response import Response
+from collections import OrderedDict
+import hashlib
+import threading
+import gzip
+import zlib
+
+
+class StreamCompressor:
+    """
+    Incremental compressor of a response stream, every compressed chunk is flushed
+    so the client can decode the chunks as they arrive
+    """
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes]):
+        self._compress = compress
+        self._flush = flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+class Compressor:
+    encoding: str = None
+    default_level: int = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def __init__(self, level: int = None):
+        self.level = self.default_level if level is None else level
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.encoding)}, level={self.level})'
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def compressobj(self) -> StreamCompressor:
+        raise NotImplementedError
+
+
+class GzipCompressor(Compressor):
+    encoding = 'gzip'
+    default_level = 6
+
+    def compress(self, data: bytes) -> bytes:
+        # mtime=0 to make the output deterministic for the same body
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compressobj(self) -> StreamCompressor:
+        # wbits=31: zlib deflate with the gzip header and trailer
+        obj = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return StreamCompressor(
+            compress=lambda data: obj.compress(data) + obj.flush(zlib.Z_SYNC_FLUSH),
+            flush=obj.flush
+        )
+
+
+class BrotliCompressor(Compressor):
+    encoding = 'br'
+    # the quality that fits the dynamic responses, 11 (the default of brotli) is for the static assets
+    default_level = 4
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import brotli   # noqa
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self, level: int = None):
+        super().__init__(level)
+        import brotli
+        self.brotli = brotli
+
+    def compress(self, data: bytes) -> bytes:
+        return self.brotli.compress(data, quality=self.level)
+
+    def compressobj(self) -> StreamCompressor:
+        obj = self.brotli.Compressor(quality=self.level)
+        return StreamCompressor(
+            compress=lambda data: obj.process(data) + obj.flush(),
+            flush=obj.finish
+        )
+
+
+class ZstdCompressor(Compressor):
+    encoding = 'zstd'
+    default_level = 3
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import zstandard   # noqa
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self, level: int = None):
+        super().__init__(level)
+        import zstandard
+        self.zstandard = zstandard
+        self.context = zstandard.ZstdCompressor(level=self.level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.context.compress(data)
+
+    def compressobj(self) -> StreamCompressor:
+        obj = self.context.compressobj()
+        flush_block = self.zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return StreamCompressor(
+            compress=lambda data: obj.compress(data) + obj.flush(flush_block),
+            flush=obj.flush
+        )
+
+
+COMPRESSORS: Dict[str, Type[Compressor]] = {
+    ZstdCompressor.encoding: ZstdCompressor,
+    BrotliCompressor.encoding: BrotliCompressor,
+    GzipCompressor.encoding: GzipCompressor,
+}
+
+
+class CompressPlugin(Plugin):
+    """
+    Compress the response body with the encoding negotiated by the Accept-Encoding of the request,
+    the encodings are preferred in the given order when the client accepts several of them with the same q-value,
+    the encodings whose module is not installed (brotli, zstandard) are skipped
+
+    * the bodies smaller than min_size and the content types out of content_types are not compressed
+    * the streaming responses are compressed chunk by chunk, without buffering the whole body
+    * the compressed bodies are kept in a LRU cache keyed by the ETag (or the digest of the body),
+      so the hot responses (like the ones served by the ServerCache) are not compressed again
+
+    the results that are not Response instances are wrapped by Response, so this plugin
+    should be applied on the root API (or the APIs that declared a response class)
+    """
+    DEFAULT_ENCODINGS = ('zstd', 'br', 'gzip')
+    DEFAULT_CONTENT_TYPES = (
+        'text/',
+        'application/json',
+        'application/x-ndjson',
+        'application/javascript',
+        'application/xml',
+        'application/xhtml+xml',
+        'image/svg+xml',
+    )
+    DEFAULT_MIN_SIZE = 1024
+    # the bodies larger than this are compressed every time instead of being cached
+    DEFAULT_CACHE_ITEM_SIZE = 1024 * 1024
+
+    def __init__(self,
+                 encodings: List[str] = DEFAULT_ENCODINGS,
+                 min_size: int = DEFAULT_MIN_SIZE,
+                 content_types: List[str] = DEFAULT_CONTENT_TYPES,
+                 levels: Dict[str, int] = None,
+                 cache_size: int = 256,
+                 cache_item_size: int = DEFAULT_CACHE_ITEM_SIZE,
+                 compress_streams: bool = True):
+        super().__init__(locals())
+        if isinstance(encodings, str):
+            encodings = [encodings]
+        levels = levels or {}
+        compressors: Dict[str, Compressor] = {}
+        for encoding in encodings:
+            encoding = str(encoding).lower()
+            compressor_cls = COMPRESSORS.get(encoding)
+            if not compressor_cls:
+                raise ValueError(f'{self.__class__.__name__}: invalid encoding: {repr(encoding)}, '
+                                 f'must be in {list(COMPRESSORS)}')
+            if not compressor_cls.available():
+                continue
+            compressors[encoding] = compressor_cls(levels.get(encoding))
+        if not compressors:
+            raise ValueError(f'{self.__class__.__name__}: no available compressor in {encodings}')
+
+        self.compressors = compressors
+        self.min_size = min_size or 0
+        self.content_types = tuple(str(t).lower() for t in content_types or ())
+        self.cache_size = cache_size or 0
+        self.cache_item_size = cache_item_size
+        self.compress_streams = compress_streams
+        # (encoding, etag or digest) -> compressed body
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # Accept-Encoding -> negotiated encoding
+        self._negotiated: Dict[str, Optional[str]] = {}
+
+    def compressible(self, content_type: Optional[str]) -> bool:
+        if not content_type:
+            return False
+        content_type = content_type.split(';')[0].strip().lower()
+        for t in self.content_types:
+            if t.endswith('/'):
+                if content_type.startswith(t):
+                    return True
+            elif content_type == t:
+                return True
+        return content_type.endswith('+json') or content_type.endswith('+xml')
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Select the encoding with the highest q-value in the Accept-Encoding,
+        the order of the encodings of this plugin is used to break the ties
+        """
+        if not accept_encoding:
+            return None
+        if accept_encoding in self._negotiated:
+            return self._negotiated[accept_encoding]
+        qualities = {}
+        for item in accept_encoding.split(','):
+            name, _, params = item.strip().partition(';')
+            name = name.strip().lower()
+            if not name:
+                continue
+            q = 1.0
+            for param in params.split(';'):
+                key, _, value = param.strip().partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            qualities[name] = q
+        default_q = qualities.get('*', 0.0)
+        selected = None
+        selected_q = 0.0
+        for encoding in self.compressors:
+            q = qualities.get(encoding, default_q)
+            if q > selected_q:
+                selected = encoding
+                selected_q = q
+        if len(self._negotiated) < 1024:
+            # the distinct Accept-Encoding values are few in practice
+            self._negotiated[accept_encoding] = selected
+        return selected
+
+    def get_cached(self, key) -> Optional[bytes]:
+        if not self.cache_size:
+            return None
+        with self._lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def set_cached(self, key, value: bytes):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def compress_body(self, encoding: str, body: bytes, etag: str = None) -> bytes:
+        cacheable = self.cache_size and len(body) <= self.cache_item_size
+        key = None
+        if cacheable:
+            # digest is much cheaper than compressing the body again
+            key = (encoding, etag or hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self.get_cached(key)
+            if compressed is not None:
+                return compressed
+        compressed = self.compressors[encoding].compress(body)
+        if cacheable:
+            self.set_cached(key, compressed)
+        return compressed
+
+    def process_response(self, response, api=None):
+        if not isinstance(response, Response):
+            request = getattr(api, 'request', None)
+            if not isinstance(request, Request):
+                return response
+            response = Response(response, request=request)
+        request: Request = response.request
+        if not request:
+            return response
+        if response.adaptor or response.file:
+            # the proxied responses and files are served as is
+            return response
+        if response.status in STATUS_WITHOUT_BODY or response.status == 206:
+            return response
+        if Header.CONTENT_ENCODING in response.headers:
+            # already encoded (by the endpoint or an inner API)
+            return response
+        cache_control = str(response.headers.get(Header.CACHE_CONTROL) or '').lower()
+        if 'no-transform' in cache_control:
+            return response
+
+        stream = response.stream
+        if stream is not None:
+            if not self.compress_streams or not self.compressible(stream.content_type):
+                return response
+            response.patch_vary_headers(Header.ACCEPT_ENCODING)
+            encoding = self.negotiate(request.headers.get(Header.ACCEPT_ENCODING))
+            if not encoding:
+                return response
+            stream.compressor = self.compressors[encoding]
+            response.set_header(Header.CONTENT_ENCODING, encoding)
+            response.headers.pop(Header.LENGTH)
+            if Header.ETAG in response.headers:
+                # the compressed body is not byte-to-byte equal to the identity one
+                response.set_header(Header.ETAG, weak_etag(response.headers.get(Header.ETAG)))
+            return response
+
+        if not self.compressible(response.content_type):
+            return response
+        body = response.body
+        if len(body) < self.min_size:
+            return response
+        response.patch_vary_headers(Header.ACCEPT_ENCODING)
+        encoding = self.negotiate(request.headers.get(Header.ACCEPT_ENCODING))
+        if not encoding:
+            return response
+        etag = response.headers.get(Header.ETAG)
+        if etag and str(etag).startswith('W/'):
+            # a weak tag does not identify the bytes of the body
+            etag = None
+        compressed = self.compress_body(encoding, body, etag=etag)
+        if len(compressed) >= len(body):
+            return response
+        response.content = compressed
+        response.set_header(Header.CONTENT_ENCODING, encoding)
+        response.headers.pop(Header.LENGTH)
+        if Header.ETAG in response.headers:
+            # the compressed body is not byte-to-byte equal to the identity one
+            response.set_header(Header.ETAG, weak_etag(response.headers.get(Header.ETAG)))
+        return response
@@ -0,0 +1,267 @@
+from utype.types import *
+from utilmeta.utils.plugin import Plugin
+from utilmeta.utils.error import Error
+from utilmeta.utils import Header, awaitable, get_interval
+from utilmeta.utils import exceptions
+from utilmeta.core.request import Request
+import threading
+import asyncio
+import heapq
+import math
+
+
+class Overloaded(exceptions.ServiceUnavailable):
+    def __init__(self, message: str = None, retry_after: float = None):
+        self.retry_after = max(1, math.ceil(retry_after or 0))
+        self.append_headers = {Header.RETRY_AFTER: str(self.retry_after)}
+        super().__init__(message)
+
+
+class Waiter:
+    __slots__ = ('priority', 'seq', 'event', 'future', 'granted', 'cancelled')
+
+    def __init__(self, priority: int, seq: int, future: asyncio.Future = None):
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+        self.event = None if future else threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: 'Waiter'):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def notify(self):
+        if self.future is None:
+            self.event.set()
+            return
+
+        def wake(fut: asyncio.Future):
+            if not fut.done():
+                fut.set_result(True)
+        self.future.get_loop().call_soon_threadsafe(wake, self.future)
+
+
+class ConcurrencyLimiter:
+    """
+    Cap the in-flight executions, the excess ones wait in a bounded queue
+    ordered by (priority, arrival), lower priority value is served first,
+    a released slot is handed over to the first waiter directly,
+    both threads (sync) and coroutines (async) can wait in the same queue
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0, max_wait: float = None):
+        if not max_concurrency or max_concurrency < 1:
+            raise ValueError(f'{self.__class__}: max_concurrency must be positive, got {max_concurrency}')
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue or 0
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._queue: List[Waiter] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> dict:
+        return dict(
+            max_concurrency=self.max_concurrency,
+            active=self.active,
+            depth=self.waiting,
+            accepted=self.accepted,
+            rejected=self.rejected,
+            timeouts=self.timeouts,
+        )
+
+    def _enter(self, priority: int, future: asyncio.Future = None) -> Optional[Waiter]:
+        # return None if acquired at once, or the queued waiter
+        # raise Overloaded if the queue is full
+        with self._lock:
+            if self.active < self.max_concurrency and not self.waiting:
+                self.active += 1
+                self.accepted += 1
+                return None
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(f'{self.__class__.__name__}: queue is full')
+            self._seq += 1
+            waiter = Waiter(priority, self._seq, future=future)
+            heapq.heappush(self._queue, waiter)
+            self.waiting += 1
+            return waiter
+
+    def _timeout(self, waiter: Waiter):
+        # the waiter may be granted just after timeout, otherwise reject
+        with self._lock:
+            if waiter.granted:
+                return
+            waiter.cancelled = True
+            self.waiting -= 1
+            self.timeouts += 1
+        raise Overloaded(f'{self.__class__.__name__}: wait timeout')
+
+    def acquire(self, priority: int = 0):
+        waiter = self._enter(priority)
+        if waiter is None:
+            return
+        if not waiter.event.wait(self.max_wait):
+            self._timeout(waiter)
+
+    async def aacquire(self, priority: int = 0):
+        waiter = self._enter(priority, future=asyncio.get_running_loop().create_future())
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait)
+        except asyncio.TimeoutError:
+            self._timeout(waiter)
+        except asyncio.CancelledError:
+            # the waiting task is cancelled, release the slot if it is already granted
+            with self._lock:
+                if not waiter.granted:
+                    waiter.cancelled = True
+                    self.waiting -= 1
+                    raise
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._queue:
+                waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                # hand over the slot to the waiter
+                waiter.granted = True
+                self.waiting -= 1
+                self.accepted += 1
+                waiter.notify()
+                return
+            self.active -= 1
+
+
+class ConcurrencyLimitPlugin(Plugin):
+    """
+    Load shedding for endpoints, cap the in-flight executions of every endpoint (max_concurrency)
+    and of all the endpoints applied with service scope limit (max_service_concurrency),
+    the excess requests wait for at most max_wait seconds in a queue of max_queue,
+    when the queue is full or the wait times out, respond 503 with Retry-After
+    """
+    limiter_cls = ConcurrencyLimiter
+    # shared by all the plugins that specified max_service_concurrency
+    shared_service_limiter: Optional[ConcurrencyLimiter] = None
+    DEFAULT_RETRY_AFTER = 1
+
+    def __init__(self,
+                 max_concurrency: int = None,
+                 max_service_concurrency: int = None,
+                 max_queue: int = 0,
+                 max_wait: Union[int, float, timedelta] = None,
+                 retry_after: Union[int, float, timedelta] = None,
+                 priority: Callable = None):
+        super().__init__(locals())
+        if not max_concurrency and not max_service_concurrency:
+            raise ValueError(f'{self.__class__}: max_concurrency or max_service_concurrency is required')
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = get_interval(max_wait, null=True)
+        self.retry_after = get_interval(retry_after, null=True) or self.DEFAULT_RETRY_AFTER
+        self.priority = priority
+        self.limiters: Dict[Any, ConcurrencyLimiter] = {}
+        self.context_key = f'_concurrency_limiters_{id(self)}'
+
+        if max_service_concurrency:
+            service_limiter = ConcurrencyLimitPlugin.shared_service_limiter
+            if service_limiter is None:
+                service_limiter = ConcurrencyLimitPlugin.shared_service_limiter = self.limiter_cls(
+                    max_service_concurrency, max_queue=max_queue, max_wait=self.max_wait)
+            else:
+                # the limiter is shared, so the plugins need to specify the same parameters
+                params = (max_service_concurrency, max_queue or 0, self.max_wait)
+                shared = (service_limiter.max_concurrency, service_limiter.max_queue, service_limiter.max_wait)
+                if params != shared:
+                    raise ValueError(f'{self.__class__}: service limiter conflicted: '
+                                     f'(max_service_concurrency, max_queue, max_wait) {params}, {shared}')
+            self.service_limiter = service_limiter
+        else:
+            self.service_limiter = None
+
+    @property
+    def stats(self) -> dict:
+        # live queue depth and counters of the endpoints and the service
+        stats = {getattr(target, 'name', str(target)): limiter.stats for target, limiter in self.limiters.items()}
+        if self.service_limiter:
+            stats['*'] = self.service_limiter.stats
+        return stats
+
+    def get_limiters(self, target) -> List[ConcurrencyLimiter]:
+        limiters = []
+        if self.max_concurrency:
+            limiter = self.limiters.get(target)
+            if limiter is None:
+                limiter = self.limiters.setdefault(target, self.limiter_cls(
+                    self.max_concurrency, max_queue=self.max_queue, max_wait=self.max_wait))
+            limiters.append(limiter)
+        if self.service_limiter:
+            limiters.append(self.service_limiter)
+        return limiters
+
+    def get_priority(self, request: Request) -> int:
+        return self.priority(request) if self.priority else 0
+
+    def process_request(self, request: Request, target=None):
+        if request.adaptor.in_context(self.context_key):
+            # the retry loop of the same request holds the slots already
+            return request
+        priority = self.get_priority(request)
+        acquired = []
+        try:
+            for limiter in self.get_limiters(target):
+                limiter.acquire(priority)
+                acquired.append(limiter)
+        except Overloaded as e:
+            for limiter in acquired:
+                limiter.release()
+            raise e.__class__(str(e), retry_after=self.retry_after) from e
+        request.adaptor.update_context(**{self.context_key: acquired})
+        return request
+
+    @awaitable(process_request)
+    async def process_request(self, request: Request, target=None):
+        if request.adaptor.in_context(self.context_key):
+            return request
+        priority = self.get_priority(request)
+        acquired = []
+        try:
+            for limiter in self.get_limiters(target):
+                await limiter.aacquire(priority)
+                acquired.append(limiter)
+        except Overloaded as e:
+            for limiter in acquired:
+                limiter.release()
+            raise e.__class__(str(e), retry_after=self.retry_after) from e
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            raise
+        request.adaptor.update_context(**{self.context_key: acquired})
+        return request
+
+    def release(self, request: Optional[Request]):
+        if not request:
+            return
+        acquired = request.adaptor.get_context(self.context_key)
+        if acquired is None:
+            return
+        request.adaptor.delete_context(self.context_key)
+        for limiter in acquired:
+            limiter.release()
+
+    def handle_error(self, request: Request, e: Error, target=None):
+        self.release(request)
+
+    def exit_endpoint(self, api, target=None):
+        self.release(api.request)
@@ -51,12 +51,19 @@ class CORSPlugin(Plugin):
                 if dh not in allow_headers:
                     allow_headers.append(dh)
 
+        if isinstance(cors_max_age, timedelta):
+            cors_max_age = cors_max_age.total_seconds()
+        if cors_max_age is not None:
+            cors_max_age = int(cors_max_age)
+
         self.allow_origin = allow_origin
         self.cors_max_age = cors_max_age
         self.allow_headers = allow_headers or []
         self.expose_headers = expose_headers
         self.gen_csrf_token = gen_csrf_token
         self.exclude_statuses = exclude_statuses
+        # (route allows, is preflight) -> static CORS headers
+        self._headers_cache = {}
 
     def process_request(self, request: Request, api=None):
         from utilmeta import service
@@ -105,28 +112,47 @@ class CORSPlugin(Plugin):
         if response.status in self.exclude_statuses:
             return response
         if self.cors_required(request):
-            response.update_headers(**{
-                Header.ALLOW_ORIGIN: request.origin or '*',
-                Header.ALLOW_CREDENTIALS: 'true',
-                Header.ALLOW_METHODS: ','.join(set([m.upper() for m in var.allow_methods.getter(request)])),
-            })
-            if request.is_options:
-                if self.allow_headers == '*':
-                    response.set_header(Header.ALLOW_HEADERS, '*')
-                else:
-                    # request_headers = [h.strip().lower() for h in
-                    #                    request.headers.get(Header.OPTIONS_HEADERS, '').split(',')]
-                    allow_headers = list(self.allow_headers or [])
-                    allow_headers.extend([h.lower() for h in var.allow_headers.getter(request)])
-                    if allow_headers:
-                        response.set_header(Header.ALLOW_HEADERS, ','.join(allow_headers))
-
-            if self.expose_headers:
-                response.set_header(Header.EXPOSE_HEADERS, ','.join(set([h.lower() for h in self.expose_headers])))
-            if self.cors_max_age:
-                response.set_header(Header.ACCESS_MAX_AGE, self.cors_max_age)
+            response.set_header(Header.ALLOW_ORIGIN, request.origin or '*')
+            response.update_headers(**self.get_cors_headers(request))
         return response
 
+    def get_cors_headers(self, request: Request) -> dict:
+        """
+        The CORS headers except Access-Control-Allow-Origin,
+        which only depend on the matched routes, so they are cached per route set
+        """
+        allows = var.route_allows.getter(request)
+        key = (allows, request.is_options)
+        if allows is not None:
+            headers = self._headers_cache.get(key)
+            if headers is not None:
+                return headers
+
+        headers = {
+            Header.ALLOW_CREDENTIALS: 'true',
+            Header.ALLOW_METHODS: allows.allow_methods if allows is not None else
+            ','.join(set([m.upper() for m in var.allow_methods.getter(request)])),
+        }
+        if request.is_options:
+            if self.allow_headers == '*':
+                headers[Header.ALLOW_HEADERS] = '*'
+            else:
+                # request_headers = [h.strip().lower() for h in
+                #                    request.headers.get(Header.OPTIONS_HEADERS, '').split(',')]
+                allow_headers = list(self.allow_headers or [])
+                allow_headers.extend([h.lower() for h in var.allow_headers.getter(request)])
+                if allow_headers:
+                    headers[Header.ALLOW_HEADERS] = ','.join(allow_headers)
+            if self.cors_max_age is not None:
+                # the preflight result can be cached by the client
+                headers[Header.ACCESS_MAX_AGE] = str(self.cors_max_age)
+
+        if self.expose_headers:
+            headers[Header.EXPOSE_HEADERS] = ','.join(set([h.lower() for h in self.expose_headers]))
+        if allows is not None:
+            self._headers_cache[key] = headers
+        return headers
+
     def handle_error(self, error, api):
         # if error is uncaught
         return getattr(api, 'response', Response)(error=error, request=api.request)
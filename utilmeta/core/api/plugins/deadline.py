@@ -0,0 +1,75 @@
+from utype.types import *
+from utilmeta.utils.plugin import Plugin
+from utilmeta.utils.error import Error
+from utilmeta.utils import get_interval, DeadlineExceeded, set_deadline, reset_deadline
+from utilmeta.core.request import Request, var
+import time
+
+
+class DeadlinePlugin(Plugin):
+    """
+    Enforce a deadline on the endpoint execution
+    the deadline is derived from the request start time plus the configured timeout,
+    or the timeout (in seconds) of the incoming header if it is smaller,
+    the requests that are already late are rejected before the endpoint is called,
+    the async endpoints are cancelled once the deadline is reached
+    and the remaining budget is available to the downstream calls by utils.get_timeout()
+    """
+    DEFAULT_HEADER = 'X-Request-Timeout'
+
+    def __init__(self,
+                 timeout: Union[int, float, timedelta] = None,
+                 header: Optional[str] = DEFAULT_HEADER,
+                 max_timeout: Union[int, float, timedelta] = None):
+        super().__init__(locals())
+        self.timeout = get_interval(timeout, null=True)
+        self.header = header
+        self.max_timeout = get_interval(max_timeout, null=True)
+        self.context_key = f'_deadline_token_{id(self)}'
+
+    def get_timeout(self, request: Request) -> Optional[float]:
+        timeout = self.timeout
+        if self.header:
+            value = request.headers.get(self.header)
+            if value:
+                try:
+                    header_timeout = float(value)
+                except (TypeError, ValueError):
+                    header_timeout = None
+                if header_timeout is not None:
+                    timeout = header_timeout if timeout is None else min(timeout, header_timeout)
+        if timeout is not None and self.max_timeout:
+            timeout = min(timeout, self.max_timeout)
+        return timeout
+
+    def process_request(self, request: Request, target=None):
+        if request.adaptor.in_context(self.context_key):
+            # the retry loop of the same request keeps the same deadline
+            return request
+        timeout = self.get_timeout(request)
+        if timeout is None:
+            return request
+        # not request.time: it is in the configured time zone (naive if use_tz=False),
+        # the deadline is on the clock of check_deadline() / get_timeout(): time.time()
+        deadline = getattr(request.adaptor, 'timestamp', None) or time.time()
+        deadline += timeout
+        if deadline <= time.time():
+            raise DeadlineExceeded(f'{self.__class__.__name__}: request deadline exceeded before execution')
+        var.deadline.setup(request).set(deadline)
+        request.adaptor.update_context(**{self.context_key: set_deadline(deadline)})
+        return request
+
+    def reset(self, request: Optional[Request]):
+        if not request:
+            return
+        token = request.adaptor.get_context(self.context_key)
+        if token is None:
+            return
+        request.adaptor.delete_context(self.context_key)
+        reset_deadline(token)
+
+    def handle_error(self, request: Request, e: Error, target=None):
+        self.reset(request)
+
+    def exit_endpoint(self, api, target=None):
+        self.reset(api.request)
@@ -1,17 +1,199 @@
 from utype.types import *
 from utilmeta.utils.plugin import Plugin
-from utilmeta.utils import Header
-from utilmeta.core.request import Request
+from utilmeta.utils.error import Error
+from utilmeta.utils import Header, awaitable, get_interval
+from utilmeta.utils import exceptions
+from utilmeta.core.request import Request, var
+from collections import OrderedDict
+import inspect
+import math
+import time
+
+
+class RateLimitExceeded(exceptions.TooManyRequests):
+    def __init__(self, message: str = None, retry_after: float = None):
+        self.retry_after = max(1, math.ceil(retry_after or 0))
+        self.append_headers = {Header.RETRY_AFTER: str(self.retry_after)}
+        super().__init__(message)
+
+
+def get_window_wait(now: float, window: float, offset: float, current: int, previous: int,
+                    limit: int, amount: int = 1, sliding: bool = True) -> float:
+    """
+    Seconds to wait until the hits (weighted previous window + current window) leaves room for the amount
+    """
+    index = (now - offset) // window
+    end = offset + (index + 1) * window
+    room = limit - amount - current
+    if room >= 0 and sliding and previous:
+        # wait for the weight of the previous window to decrease
+        return max(0.0, end - now - window * room / previous)
+    if not sliding or not current:
+        return end - now
+    # the current window is full, wait for it to become the previous window
+    room = limit - amount
+    return end - now + window * (1 - max(0, room) / current)
+
+
+class LocalRateLimitEngine:
+    """
+    In-process engine, the states are stored as immutable tuples and swapped in the dict,
+    so it does not require a lock (concurrent hits of a key may be slightly over-admitted),
+    the memory is bounded by max_keys and the least recently used (idle) keys are evicted first
+    """
+    DEFAULT_MAX_KEYS = 10000
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or self.DEFAULT_MAX_KEYS
+        self.states = OrderedDict()
+
+    def __len__(self):
+        return len(self.states)
+
+    def update(self, key: str, state: tuple):
+        states = self.states
+        states[key] = state
+        try:
+            states.move_to_end(key)
+        except KeyError:
+            # evicted by a concurrent update
+            pass
+        while len(states) > self.max_keys:
+            try:
+                states.popitem(last=False)
+            except KeyError:
+                break
+
+    def take(self, key: str, rate: float, capacity: float, amount: int = 1) -> float:
+        # token bucket, return the seconds to wait, 0 if the tokens are taken
+        now = time.monotonic()
+        state = self.states.get(key)
+        if state is None:
+            tokens = capacity
+        else:
+            tokens, ts = state
+            tokens = min(capacity, tokens + (now - ts) * rate)
+        wait = 0.0
+        if tokens >= amount:
+            tokens -= amount
+        else:
+            wait = (amount - tokens) / rate
+        self.update(key, (tokens, now))
+        return wait
+
+    def hit(self, key: str, limit: int, window: float, amount: int = 1,
+            sliding: bool = True, offset: float = 0) -> float:
+        # sliding window counter, return the seconds to wait, 0 if the hit is accepted
+        now = time.time()
+        index = (now - offset) // window
+        current = previous = 0
+        state = self.states.get(key)
+        if state is not None:
+            idx, cur, prev = state
+            if idx == index:
+                current, previous = cur, prev
+            elif idx == index - 1:
+                previous = cur
+        if not sliding:
+            previous = 0
+        count = current + previous * (1 - (now - offset - index * window) / window)
+        if limit:
+            if count + amount > limit if amount else count >= limit:
+                return get_window_wait(now, window, offset, current, previous,
+                                       limit=limit, amount=amount, sliding=sliding) or 0.001
+        if amount:
+            self.update(key, (index, current + amount, previous))
+        return 0.0
+
+
+class RedisRateLimitEngine:
+    """
+    Shared engine using the redis cache, every check is a single lua script eval
+    """
+
+    def __init__(self, cache_alias: str = 'default'):
+        self.cache_alias = cache_alias
+        self._con = None
+        self._async_con = None
+
+    @property
+    def cache(self):
+        from utilmeta.core.cache import CacheConnections
+        return CacheConnections.get(self.cache_alias)
+
+    @property
+    def con(self):
+        if self._con is None:
+            self._con = self.cache.con
+        return self._con
+
+    @property
+    def async_con(self):
+        if self._async_con is None:
+            self._async_con = self.cache.async_con
+        return self._async_con
+
+    @classmethod
+    def get_window_args(cls, limit: int, window: float, amount: int, sliding: bool, offset: float):
+        return [limit or 0, window, amount, 1 if sliding else 0, offset]
+
+    @classmethod
+    def get_window_result(cls, result, limit: int, window: float, amount: int, sliding: bool, offset: float):
+        now, current, previous, accepted = result
+        if isinstance(now, bytes):
+            now = now.decode()
+        if accepted:
+            return 0.0
+        return get_window_wait(float(now), window, offset, int(current), int(previous),
+                               limit=limit, amount=amount, sliding=sliding) or 0.001
+
+    def take(self, key: str, rate: float, capacity: float, amount: int = 1) -> float:
+        from utilmeta.core.cache.backends.redis.scripts import TOKEN_BUCKET_LUA
+        return float(self.con.eval(TOKEN_BUCKET_LUA, 1, key, rate, capacity, amount))
+
+    @awaitable(take)
+    async def take(self, key: str, rate: float, capacity: float, amount: int = 1) -> float:
+        from utilmeta.core.cache.backends.redis.scripts import TOKEN_BUCKET_LUA
+        return float(await self.async_con.eval(TOKEN_BUCKET_LUA, 1, key, rate, capacity, amount))
+
+    def hit(self, key: str, limit: int, window: float, amount: int = 1,
+            sliding: bool = True, offset: float = 0) -> float:
+        from utilmeta.core.cache.backends.redis.scripts import SLIDING_WINDOW_LUA
+        result = self.con.eval(SLIDING_WINDOW_LUA, 1, key, *self.get_window_args(
+            limit, window, amount, sliding, offset))
+        return self.get_window_result(result, limit, window, amount, sliding, offset)
+
+    @awaitable(hit)
+    async def hit(self, key: str, limit: int, window: float, amount: int = 1,
+                  sliding: bool = True, offset: float = 0) -> float:
+        from utilmeta.core.cache.backends.redis.scripts import SLIDING_WINDOW_LUA
+        result = await self.async_con.eval(SLIDING_WINDOW_LUA, 1, key, *self.get_window_args(
+            limit, window, amount, sliding, offset))
+        return self.get_window_result(result, limit, window, amount, sliding, offset)
 
 
 class RateLimitPlugin(Plugin):
+    """
+    Limit the requests of a client (identified by the ban_function)
+    - max_rps: token bucket that refills max_rps tokens per second
+    - max_times: max requests in a window of reset_after (sliding), or in the cycles
+      of cycle_interval since cycle_start (fixed)
+    - max_errors: max errors in the same window, the client is banned until the window slides
+    the state is stored in the process by default, or in the redis cache if cache_alias is specified
+    """
+    local_engine_cls = LocalRateLimitEngine
+    redis_engine_cls = RedisRateLimitEngine
+    error_cls = RateLimitExceeded
+    DEFAULT_RESET_AFTER = 60
+    KEY_PREFIX = 'utilmeta:rate'
+
     @classmethod
     def ban_user(cls, request: 'Request'):
-        return request.user_id
+        return var.user_id.getter(request)
 
     @classmethod
     def ban_ip(cls, request: 'Request'):
-        return request.ip
+        return str(request.ip_address)
 
     @classmethod
     def ban_session(cls, request: 'Request'):
@@ -23,7 +205,7 @@ class RateLimitPlugin(Plugin):
 
     @classmethod
     def ban_agent(cls, request: 'Request'):
-        return request.ua_string
+        return request.headers.get(Header.USER_AGENT)
 
     @classmethod
     def ban_referrer(cls, request: 'Request'):
@@ -36,6 +218,108 @@ class RateLimitPlugin(Plugin):
                  cache_alias: str = None,
                  reset_after: Union[int, timedelta, float] = None,
                  cycle_start: datetime = None,
-                 cycle_interval: datetime = None,
-                 ban_function: Callable = None):
+                 cycle_interval: Union[int, timedelta, float] = None,
+                 ban_function: Callable = None,
+                 max_keys: int = None):
         super().__init__(locals())
+        if not max_rps and not max_times and not max_errors:
+            raise ValueError(f'{self.__class__}: max_rps, max_times or max_errors is required')
+        if max_rps is not None and max_rps <= 0:
+            raise ValueError(f'{self.__class__}: max_rps must be positive, got {max_rps}')
+
+        self.max_rps = max_rps
+        self.max_times = max_times
+        self.max_errors = max_errors
+        self.cache_alias = cache_alias
+        self.sliding = not cycle_interval
+        self.window = get_interval(cycle_interval or reset_after or self.DEFAULT_RESET_AFTER, ge=0.001)
+        self.offset = cycle_start.timestamp() if isinstance(cycle_start, datetime) else 0
+        self.ban_function = ban_function or self.ban_ip
+
+        if cache_alias:
+            self.engine = self.redis_engine_cls(cache_alias)
+        else:
+            self.engine = self.local_engine_cls(max_keys)
+        self._scopes = {}
+
+    def get_scope(self, target) -> str:
+        scope = self._scopes.get(target)
+        if scope is None:
+            func = getattr(target, 'f', target)
+            name = getattr(func, '__qualname__', None) or getattr(func, '__name__', None) or str(func)
+            scope = self._scopes[target] = f'{getattr(func, "__module__", "")}.{name}'
+        return scope
+
+    def get_key(self, ident, target, kind: str) -> str:
+        return f'{self.KEY_PREFIX}:{kind}:{self.get_scope(target)}:{ident}'
+
+    def reject(self, wait: float, reason: str):
+        raise self.error_cls(f'{self.__class__.__name__}: {reason} exceeded', retry_after=wait)
+
+    def process_request(self, request: Request, target=None):
+        ident = self.ban_function(request)
+        if ident is None:
+            return request
+        if self.max_errors:
+            wait = self.engine.hit(self.get_key(ident, target, 'errors'), self.max_errors, self.window,
+                                   amount=0, sliding=self.sliding, offset=self.offset)
+            if wait:
+                self.reject(wait, 'max_errors')
+        if self.max_rps:
+            wait = self.engine.take(self.get_key(ident, target, 'rps'), self.max_rps, max(1.0, self.max_rps))
+            if wait:
+                self.reject(wait, 'max_rps')
+        if self.max_times:
+            wait = self.engine.hit(self.get_key(ident, target, 'times'), self.max_times, self.window,
+                                   sliding=self.sliding, offset=self.offset)
+            if wait:
+                self.reject(wait, 'max_times')
+        return request
+
+    @awaitable(process_request)
+    async def process_request(self, request: Request, target=None):
+        ident = self.ban_function(request)
+        if ident is None:
+            return request
+        if self.max_errors:
+            wait = self.engine.hit(self.get_key(ident, target, 'errors'), self.max_errors, self.window,
+                                   amount=0, sliding=self.sliding, offset=self.offset)
+            if inspect.isawaitable(wait):
+                wait = await wait
+            if wait:
+                self.reject(wait, 'max_errors')
+        if self.max_rps:
+            wait = self.engine.take(self.get_key(ident, target, 'rps'), self.max_rps, max(1.0, self.max_rps))
+            if inspect.isawaitable(wait):
+                wait = await wait
+            if wait:
+                self.reject(wait, 'max_rps')
+        if self.max_times:
+            wait = self.engine.hit(self.get_key(ident, target, 'times'), self.max_times, self.window,
+                                   sliding=self.sliding, offset=self.offset)
+            if inspect.isawaitable(wait):
+                wait = await wait
+            if wait:
+                self.reject(wait, 'max_times')
+        return request
+
+    def handle_error(self, request: Request, e: Error, target=None):
+        if not self.max_errors or isinstance(e.exception, self.error_cls):
+            return
+        ident = self.ban_function(request)
+        if ident is None:
+            return
+        self.engine.hit(self.get_key(ident, target, 'errors'), 0, self.window,
+                        sliding=self.sliding, offset=self.offset)
+
+    @awaitable(handle_error)
+    async def handle_error(self, request: Request, e: Error, target=None):
+        if not self.max_errors or isinstance(e.exception, self.error_cls):
+            return
+        ident = self.ban_function(request)
+        if ident is None:
+            return
+        r = self.engine.hit(self.get_key(ident, target, 'errors'), 0, self.window,
+                            sliding=self.sliding, offset=self.offset)
+        if inspect.isawaitable(r):
+            await r
@@ -0,0 +1,39 @@
+from utilmeta.utils.plugin import Plugin
+from utilmeta.utils import exceptions
+from utilmeta.core.request import Request, var
+from utilmeta.core.request.multipart import MultipartParser
+
+
+class UploadLimitPlugin(Plugin):
+    """
+    Limit the uploads of the endpoints, the multipart/form-data body is parsed by the streaming parser,
+    which spools the file parts larger than memory_size to the disk,
+    the request that declared a Content-Length over max_body_size is rejected before the body is read,
+    and the body or any part that exceeds the limits while reading is rejected with 413 at once
+    """
+
+    def __init__(self,
+                 max_body_size: int = None,
+                 max_part_size: int = None,
+                 max_field_size: int = MultipartParser.DEFAULT_MAX_FIELD_SIZE,
+                 max_parts: int = MultipartParser.DEFAULT_MAX_PARTS,
+                 memory_size: int = MultipartParser.DEFAULT_MEMORY_SIZE):
+        super().__init__(locals())
+        self.max_body_size = max_body_size
+        self.max_part_size = max_part_size
+        self.limits = dict(
+            max_body_size=max_body_size,
+            max_part_size=max_part_size,
+            max_field_size=max_field_size,
+            max_parts=max_parts,
+            memory_size=memory_size,
+        )
+
+    def process_request(self, request: Request, target=None):
+        if self.max_body_size:
+            length = request.adaptor.content_length
+            if length and length > self.max_body_size:
+                raise exceptions.RequestEntityTooLarge(
+                    f'{self.__class__.__name__}: request body too large: {length} > {self.max_body_size}')
+        var.upload_limits.setup(request).set(self.limits)
+        return request
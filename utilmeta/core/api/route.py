@@ -1,6 +1,6 @@
 import re
 from typing import Union, Dict, Type, List, Optional, TYPE_CHECKING
-from utilmeta.utils import awaitable, get_doc, regular, duplicate, pop, distinct_add, multi
+from utilmeta.utils import awaitable, async_entry, get_doc, regular, duplicate, pop, distinct_add, multi
 
 import inspect
 from functools import partial
@@ -323,16 +323,18 @@ class APIRoute:
                 return api.options()
         else:
             for hook in self.before_hooks:
-                await hook.serve(api)
+                await hook.aserve(api)
 
-        result = await api.__serve__(self.handler)
+        result = await api.__aserve__(self.handler)
 
         for hook in self.after_hooks:
-            result = await hook(api, result) or result
+            result = await hook.__acall__(api, result) or result
             result = hook.process_result(result)
 
         return result
 
+    __acall__ = async_entry('__call__')
+
     def generate(self):
         pass
 
@@ -0,0 +1,154 @@
+from typing import List, Dict, Tuple, Optional
+from utilmeta.utils.constant import Reg
+from utilmeta.utils import distinct_add
+from .route import APIRoute
+
+
+class RouteMatch:
+    """
+    The resolved result of a single API level,
+    if a nested API is matched, the match of the next level is resolved in the same pass
+    and set to the ``next`` attribute
+    """
+    __slots__ = ('router', 'path', 'route', 'params', 'remaining', 'methods', 'next')
+
+    def __init__(self, router: 'APIRouter', path: str):
+        self.router = router
+        self.path = path
+        self.route: Optional[APIRoute] = None
+        self.params: dict = {}
+        self.remaining: str = ''
+        self.methods: Dict[str, APIRoute] = {}
+        self.next: Optional['RouteMatch'] = None
+
+
+class RouteAllows:
+    """
+    The allowed methods and headers of the method routes that matched the same path,
+    computed once per route set and shared across requests, so the lists must not be mutated
+    """
+    __slots__ = ('methods', 'headers', 'allow_methods')
+
+    def __init__(self, routes: Dict[str, APIRoute]):
+        headers = []
+        for route in routes.values():
+            distinct_add(headers, route.header_names)
+        self.methods: List[str] = list(routes)
+        self.headers: List[str] = headers
+        # value of the Allow / Access-Control-Allow-Methods header
+        self.allow_methods: str = ','.join(distinct_add([], [m.upper() for m in self.methods]))
+
+
+class RouteNode:
+    __slots__ = ('children', 'endpoints', 'apis', 'dynamic')
+
+    def __init__(self):
+        self.children: Dict[str, RouteNode] = {}
+        # static endpoint routes that end at this node (exact match)
+        self.endpoints: List[Tuple[int, APIRoute]] = []
+        # static API routes that match this node and every path below
+        self.apis: List[Tuple[int, APIRoute]] = []
+        # routes with path params (or regex chars) that need to match by regex
+        self.dynamic: List[Tuple[int, APIRoute]] = []
+
+    def get_child(self, segment: str) -> 'RouteNode':
+        node = self.children.get(segment)
+        if node is None:
+            node = self.children[segment] = RouteNode()
+        return node
+
+
+class APIRouter:
+    """
+    A prefix tree compiled from the routes of an API class,
+    static segments are resolved by dict lookup, only the routes with path params
+    (whose static prefix matched the path) are tried by their regex,
+    the declaration order of the routes is preserved as the match priority
+    """
+    def __init__(self, routes: List[APIRoute]):
+        self.routes = list(routes)
+        self.root = RouteNode()
+        self.allows: Dict[Tuple[APIRoute, ...], RouteAllows] = {}
+        for index, route in enumerate(self.routes):
+            self.add_route(index, route)
+
+    @classmethod
+    def is_static(cls, segment: str):
+        if '{' in segment:
+            return False
+        for char in segment:
+            if char in Reg.META:
+                return False
+        return True
+
+    def add_route(self, index: int, route: APIRoute):
+        node = self.root
+        segments = route.route.split('/') if route.route else []
+        for seg in segments:
+            if not self.is_static(seg):
+                # the rest of the route will be matched by regex
+                node.dynamic.append((index, route))
+                return
+            node = node.get_child(seg)
+        if route.is_endpoint:
+            node.endpoints.append((index, route))
+        else:
+            node.apis.append((index, route))
+
+    def iter_candidates(self, path: str):
+        # (index, route, remaining), remaining is None for the routes that need a regex match
+        node = self.root
+        candidates = [(index, route, None) for index, route in node.dynamic]
+        offset = 0
+        segments = path.split('/') if path else []
+        for seg in segments:
+            node = node.children.get(seg)
+            if node is None:
+                break
+            offset += len(seg) + 1
+            if node.dynamic:
+                candidates.extend([(index, route, None) for index, route in node.dynamic])
+            if node.apis:
+                remaining = path[offset:]
+                candidates.extend([(index, route, remaining) for index, route in node.apis])
+        else:
+            if node.endpoints:
+                candidates.extend([(index, route, '') for index, route in node.endpoints])
+        if len(candidates) > 1:
+            candidates.sort(key=lambda c: c[0])
+        return candidates
+
+    def match(self, path: str) -> RouteMatch:
+        result = RouteMatch(self, path)
+        params = result.params
+        for index, route, remaining in self.iter_candidates(path):
+            if remaining is None:
+                group = None
+                for regex in route.regex_list:
+                    match = regex.fullmatch(path)
+                    if match:
+                        group = match.groupdict()
+                        break
+                if group is None:
+                    continue
+                remaining = group.pop('_', '')
+                params.update(group)
+
+            if not route.method:
+                # the first matched API route is returned
+                result.route = route
+                result.remaining = remaining
+                router: Optional[APIRouter] = getattr(route.handler, '_router', None)
+                if router is not None:
+                    result.next = router.match(remaining)
+                return result
+            # first match is 1st priority
+            result.methods.setdefault(route.method, route)
+        return result
+
+    def get_allows(self, methods: Dict[str, APIRoute]) -> RouteAllows:
+        key = tuple(methods.values())
+        allows = self.allows.get(key)
+        if allows is None:
+            allows = self.allows[key] = RouteAllows(methods)
+        return allows
@@ -95,6 +95,13 @@ class OpenAPIGenerator(JsonSchemaGenerator):
                     description='a count of the total number of query result',
                 )
                 props[response.count_key] = cnt
+            if response.cursor_key:
+                cursor = dict(self.generate_for_type(str))
+                cursor.update(
+                    title='Cursor',
+                    description='the cursor of the next page, null at the last page',
+                )
+                props[response.cursor_key] = cursor
             if response.state_key:
                 state = dict(self.generate_for_type(str))
                 state.update(
@@ -7,3 +7,5 @@ BATCH_EXISTS_LUA = open(os.path.join(script_path, 'batch_exists.lua')).read()
 BATCH_RELATES_LUA = open(os.path.join(script_path, 'batch_relates.lua')).read()
 BATCH_COUNT_LUA = open(os.path.join(script_path, 'batch_count.lua')).read()
 ALTER_AMOUNT_LUA = open(os.path.join(script_path, 'alter_amount.lua')).read()
+TOKEN_BUCKET_LUA = open(os.path.join(script_path, 'token_bucket.lua')).read()
+SLIDING_WINDOW_LUA = open(os.path.join(script_path, 'sliding_window.lua')).read()
@@ -0,0 +1,32 @@
+--- count hits in the window of KEYS[1], return {now, current, previous, accepted}
+--- the hit (ARGV[3]) is only counted if the limit (ARGV[1], 0 for unlimited) is not exceeded
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local sliding = ARGV[4] == '1'
+local offset = tonumber(ARGV[5])
+if redis.replicate_commands then
+    pcall(redis.replicate_commands)
+end
+local t = redis.call('time')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local index = math.floor((now - offset) / window)
+local current = tonumber(redis.call('hget', key, tostring(index))) or 0
+local previous = 0
+if sliding then
+    previous = tonumber(redis.call('hget', key, tostring(index - 1))) or 0
+end
+local count = current + previous * (1 - (now - offset - index * window) / window)
+local accepted = 1
+if limit > 0 then
+    if (amount > 0 and count + amount > limit) or (amount == 0 and count >= limit) then
+        accepted = 0
+    end
+end
+if accepted == 1 and amount > 0 then
+    current = redis.call('hincrby', key, tostring(index), amount)
+    redis.call('hdel', key, tostring(index - 2))
+    redis.call('pexpire', key, math.ceil(window * 2000))
+end
+return {tostring(now), current, previous, accepted}
@@ -0,0 +1,27 @@
+--- take tokens from the bucket at KEYS[1], return the seconds to wait (0 if the tokens are taken)
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+if redis.replicate_commands then
+    pcall(redis.replicate_commands)
+end
+local t = redis.call('time')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('hmget', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= amount then
+    tokens = tokens - amount
+else
+    wait = (amount - tokens) / rate
+end
+redis.call('hmset', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('pexpire', key, math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
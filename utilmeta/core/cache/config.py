@@ -1,6 +1,6 @@
 from utilmeta.conf.base import Config
 from utilmeta import UtilMeta
-from utilmeta.utils import awaitable, exceptions
+from utilmeta.utils import awaitable, exceptions, check_deadline
 from typing import Dict, List, Optional, Union, Callable, Any, ClassVar
 from datetime import timedelta, datetime
 from utype.utils.datastructures import unprovided
@@ -71,6 +71,8 @@ class Cache(Config):
         self.adaptor.check()
 
     def get_adaptor(self, asynchronous: bool = False) -> 'BaseCacheAdaptor':
+        # fail fast for the cache calls if the deadline of the current request has passed
+        check_deadline()
         if self.asynchronous == asynchronous and self.adaptor:
             return self.adaptor
         if asynchronous:
@@ -1,4 +1,5 @@
-from utilmeta.utils import pop, get_interval, Header, time_now, http_time, COMMON_ERRORS, fast_digest
+from utilmeta.utils import pop, get_interval, Header, time_now, http_time, COMMON_ERRORS, fast_digest, match_etag, \
+    weak_etag
 from utype import type_transform
 from utype.parser.func import FunctionParser
 from utilmeta.utils import exceptions as exc
@@ -342,7 +343,7 @@ class ServerCache(BaseCacheInterface):
             self.etag = etag or resource
 
         if self.etag and self._if_none_match:
-            if self.etag == self._if_none_match:
+            if match_etag(self.etag, self._if_none_match):
                 raise exc.NotModified
 
         if self.last_modified and self._if_modified_since:
@@ -474,7 +475,13 @@ class ServerCache(BaseCacheInterface):
             # do not set headers here, we will set headers in API/Module's __call__
 
         if self.etag_response and not self.etag:
-            self.etag = self.etag_function(result)
+            from utilmeta.core.response import Response
+            if isinstance(result, Response):
+                # streaming responses are not tagged, otherwise the memoized body is used
+                if not result.stream:
+                    self.etag = self.etag_function(result.body)
+            else:
+                self.etag = self.etag_function(result)
 
         self.check_modified()
         # there are 2 cases
@@ -607,4 +614,13 @@ def setup_instance_for_cache(cache: ServerCache, api: API, __attname__: str):
 
 @process_response.hook(API)
 def process_response_for_cache(cache: ServerCache, response: Response):
-    response.update_headers(**cache.headers)
+    headers = cache.headers
+    vary = headers.pop(Header.VARY, None)
+    etag = headers.get(Header.ETAG)
+    if etag and Header.CONTENT_ENCODING in response.headers:
+        # the body is already compressed, so the tag is no longer byte-to-byte
+        headers[Header.ETAG] = weak_etag(etag)
+    response.update_headers(**headers)
+    if vary:
+        # merged with the Vary set by the other plugins (like Accept-Encoding of the compression)
+        response.patch_vary_headers(vary)
@@ -2,7 +2,7 @@ import inspect
 
 from utilmeta.utils import PluginEvent, PluginTarget, \
     Error, awaitable, url_join, file_like, \
-    encode_multipart_form, RequestType, json_dumps
+    encode_multipart_form, RequestType, get_interval, get_timeout, get_json_codec
 from utype.types import *
 from http.cookies import SimpleCookie
 from utilmeta.core.request import Request
@@ -144,7 +144,7 @@ class Client(PluginTarget):
         elif data:
             if isinstance(data, (dict, list, tuple)):
                 content_type = RequestType.JSON
-                body = json_dumps(data).encode(self._charset)
+                body = get_json_codec().encode(data, charset=self._charset)
             elif isinstance(data, bytes):
                 body = data
                 content_type = RequestType.OCTET_STREAM
@@ -237,7 +237,8 @@ class Client(PluginTarget):
         else:
             adaptor: ClientRequestAdaptor = ClientRequestAdaptor.dispatch(req)
             resp = adaptor(
-                timeout=timeout or self._default_timeout,
+                # bounded by the remaining time of the current deadline
+                timeout=get_timeout(get_interval(timeout or self._default_timeout, null=True)),
                 allow_redirects=self._allow_redirects
             )
             response = Response(response=resp, request=req)
@@ -0,0 +1,80 @@
+from tempfile import SpooledTemporaryFile, TemporaryFile
+from .base import FileAdaptor
+import shutil
+import os
+
+
+class UploadedFile:
+    """
+    The file part of a multipart body written by the streaming parser,
+    kept in memory until it exceeds the memory_size, then rolled over to a temporary file on disk
+    (a memory_size of 0 or None writes to the disk from the start)
+    """
+
+    def __init__(self, filename: str = None, content_type: str = None,
+                 headers: dict = None, memory_size: int = None):
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.memory_size = memory_size or 0
+        if self.memory_size:
+            self.file = SpooledTemporaryFile(max_size=self.memory_size)
+        else:
+            # the max_size of 0 for SpooledTemporaryFile never rolls over
+            self.file = TemporaryFile()
+        self.in_memory = bool(self.memory_size)
+        self.size = 0
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.filename)}, size={self.size})'
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+        if self.in_memory and self.size > self.memory_size:
+            # the spooled file rolls over when the written size exceeds its max_size
+            self.in_memory = False
+
+    def seal(self):
+        self.file.seek(0)
+
+    def close(self):
+        self.file.close()
+
+
+class UploadedFileAdaptor(FileAdaptor):
+    file: UploadedFile
+
+    @classmethod
+    def qualify(cls, obj):
+        return isinstance(obj, UploadedFile)
+
+    @property
+    def object(self):
+        return self.file.file
+
+    @property
+    def size(self):
+        return self.file.size
+
+    @property
+    def content_type(self):
+        return self.file.content_type
+
+    @property
+    def filename(self):
+        return self.file.filename
+
+    def save(self, path: str, name: str = None):
+        file_path = path
+        name = name or self.filename
+        if name:
+            file_path = os.path.join(file_path, name)
+
+        fileobj = self.file.file
+        fileobj.seek(0)
+        with open(file_path, 'wb') as fp:
+            # copy by chunks, the spooled file can be larger than the memory
+            shutil.copyfileobj(fileobj, fp)
+        fileobj.seek(0)
+        return file_path
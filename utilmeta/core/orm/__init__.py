@@ -2,6 +2,7 @@ from .plugins.atomic import AtomicPlugin as Atomic
 from .plugins.relate import Relate
 from .fields import *
 from .schema import Schema, Query
+from .count import CountStrategy
 from .backends.base import ModelAdaptor
 from .databases.config import DatabaseConnections, Database
 from .exceptions import *
@@ -5,9 +5,11 @@ from ...fields.field import ParserQueryField
 from . import expressions as exp
 from .constant import PK, ID, SEG
 from django.db import models
-from utilmeta.utils import awaitable, Error, multi, pop
-from typing import List
+from utilmeta.utils import awaitable, Error, multi, pop, check_deadline, get_timeout, DeadlineExceeded
+from typing import List, Iterator, AsyncIterator, Optional
 from .queryset import AwaitableQuerySet
+from .plan import QueryPlan, QueryPlanCache, Uncacheable, freeze
+from asgiref.sync import sync_to_async
 import asyncio
 import warnings
 from datetime import timedelta
@@ -17,6 +19,11 @@ from enum import Enum
 
 class DjangoQueryCompiler(BaseQueryCompiler):
     queryset: models.QuerySet
+    # the compiled values queries of the Query generated querysets (a QueryPlanCache), disabled by default
+    plan_cache: Optional[QueryPlanCache] = None
+    # the query params limit for the databases that does not declare it
+    # (the limit of the PostgreSQL protocol and the MySQL prepared statements)
+    MAX_QUERY_PARAMS = 65535
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -72,6 +79,7 @@ class DjangoQueryCompiler(BaseQueryCompiler):
 
     def set_values(self, values: List[dict]):
         if not values:
+            self.values = []
             return
         elif not isinstance(values, list):
             values = [values]
@@ -84,7 +92,7 @@ class DjangoQueryCompiler(BaseQueryCompiler):
             pk = val[PK]
             if pk is None:
                 continue
-            if pk in pk_list:
+            if pk in pk_map:
                 continue
             pk_list.append(pk)
             pk_map[pk] = val
@@ -105,13 +113,78 @@ class DjangoQueryCompiler(BaseQueryCompiler):
     def get_values(self):
         if self.queryset.query.is_empty():
             return []
+        check_deadline()
+        values_qs, plan, bound = self.prepare_values()
+        if plan:
+            values = plan.fetch(*bound)
+        else:
+            values = list(values_qs)
+        return self.resolve_values(values)
+
+    @awaitable(get_values, bind_service=True)
+    async def get_values(self):
+        if self.queryset.query.is_empty():
+            return []
+        check_deadline()
+        values_qs, plan, bound = self.prepare_values()
+        if plan:
+            if isinstance(self.queryset, AwaitableQuerySet):
+                values = await self.wait_for(plan.afetch(*bound))
+            else:
+                values = await self.wait_for(sync_to_async(plan.fetch)(*bound))
+        elif isinstance(self.queryset, AwaitableQuerySet):
+            values = await self.wait_for(values_qs.result(one=self.context.single))
+        else:
+            values = [val async for val in values_qs]
+        return await self.resolve_values(values)
+
+    def iter_values(self, chunk_size: int = AwaitableQuerySet.DEFAULT_CHUNK_SIZE) -> Iterator[List[dict]]:
+        """
+        Stream the values chunk by chunk (by the server-side cursor if the database supports),
+        the isolated / related fields are queried for each chunk
+        """
+        if self.queryset.query.is_empty():
+            return
+        self.process_fields()
+        chunk = []
+        for val in self.get_values_queryset().iterator(chunk_size=chunk_size):
+            chunk.append(val)
+            if len(chunk) >= chunk_size:
+                yield self.resolve_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self.resolve_chunk(chunk)
+
+    async def aiter_values(self, chunk_size: int = AwaitableQuerySet.DEFAULT_CHUNK_SIZE) -> AsyncIterator[List[dict]]:
+        if self.queryset.query.is_empty():
+            return
         self.process_fields()
-        values = list(self.queryset.values(PK, *self.fields, **self.expressions))
+        chunk = []
+        async for val in self.get_values_queryset().aiterator(chunk_size=chunk_size):
+            chunk.append(val)
+            if len(chunk) >= chunk_size:
+                yield await self.resolve_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield await self.resolve_chunk(chunk)
+
+    def resolve_chunk(self, values: List[dict]) -> List[dict]:
+        # the recursion map is not accumulated over the chunks
+        self.recursive_map = self.context.recursion_map or {}
+        return self.resolve_values(values)
+
+    @awaitable(resolve_chunk, bind_service=True)
+    async def resolve_chunk(self, values: List[dict]) -> List[dict]:
+        self.recursive_map = self.context.recursion_map or {}
+        return await self.resolve_values(values)
+
+    def resolve_values(self, values: List[dict]) -> List[dict]:
         self.set_values(values)
         if not self.values:
             return []
         self._resolve_recursion()
         for field in self.isolated_fields.values():
+            check_deadline()
             try:
                 self.query_isolated_field(field)
             except Exception as e:
@@ -119,17 +192,8 @@ class DjangoQueryCompiler(BaseQueryCompiler):
         self.clear_pks()
         return self.values
 
-    @awaitable(get_values, bind_service=True)
-    async def get_values(self):
-        if self.queryset.query.is_empty():
-            return []
-        self.process_fields()
-        values_qs = self.queryset.values(PK, *self.fields, **self.expressions)
-        if isinstance(self.queryset, AwaitableQuerySet):
-            values = await values_qs.result(one=self.context.single)
-        else:
-            values = [val async for val in values_qs]
-
+    @awaitable(resolve_values, bind_service=True)
+    async def resolve_values(self, values: List[dict]) -> List[dict]:
         self.set_values(values)
 
         if not self.values:
@@ -150,7 +214,7 @@ class DjangoQueryCompiler(BaseQueryCompiler):
 
         if tasks:
             try:
-                await asyncio.gather(*tasks)
+                await self.wait_for(asyncio.gather(*tasks))
                 # use await here to expect throw the exception to terminate the whole query
             except Exception:
                 for t in tasks:
@@ -162,6 +226,77 @@ class DjangoQueryCompiler(BaseQueryCompiler):
         self.clear_pks()
         return self.values
 
+    def get_values_queryset(self):
+        return self.queryset.values(PK, *self.fields, **self.expressions)
+
+    def get_plan_key(self):
+        # only the querysets generated by a Query are cached (by the shape of the query)
+        context = self.context
+        if self.plan_cache is None or context.shape is None:
+            return None
+        if context.force_expressions or context.recursion_map:
+            return None
+        query = self.queryset.query
+        if query.combinator or query.select_for_update:
+            return None
+        try:
+            return (self.parser.obj, self.queryset.db, context.single,
+                    freeze(context.includes), freeze(context.excludes), context.shape)
+        except TypeError:
+            return None
+
+    def prepare_values(self):
+        """
+        Process the fields and get the values queryset,
+        or the query plan with the bound SQL and params (queryset is None)
+        """
+        key = self.get_plan_key()
+        cache = self.plan_cache
+        if key is not None:
+            plan = cache.get(key)
+            if plan is not None:
+                try:
+                    bound = plan.bind(self.queryset)
+                except Uncacheable:
+                    bound = None
+                if bound:
+                    cache.count(hit=True)
+                    plan.restore(self)
+                    return None, plan, bound
+            cache.count(hit=False)
+
+        self.process_fields()
+        values_qs = self.get_values_queryset()
+        if key is not None:
+            try:
+                plan = QueryPlan.build(
+                    self.queryset, values_qs,
+                    fields=list(self.fields),
+                    expressions=dict(self.expressions),
+                    isolated_fields=dict(self.isolated_fields),
+                    pk_fields=set(self.pk_fields),
+                    recursively=self.recursively,
+                )
+                bound = plan.bind(self.queryset)
+            except Uncacheable:
+                pass
+            else:
+                if bound:
+                    cache.set(key, plan)
+                    return values_qs, plan, bound
+        return values_qs, None, None
+
+    @classmethod
+    async def wait_for(cls, aw):
+        # the queries are given the remaining time of the current deadline (if set)
+        timeout = get_timeout()
+        if timeout is None:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, timeout)
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded('query deadline exceeded') from e
+
     def handle_isolated_field(self, field: ParserQueryField, e: Exception):
         prepend = f'{self.parser.name}[{self.parser.model.model}] ' \
                   f'serialize isolated field: [{repr(field.name)}] failed with error: '
@@ -647,25 +782,221 @@ class DjangoQueryCompiler(BaseQueryCompiler):
             await self.queryset.aupdate(**data)
         return self.queryset
 
+    def get_data_pk(self, data):
+        from utilmeta.core.orm.schema import Schema
+        if isinstance(data, Schema):
+            return data.pk
+        if isinstance(data, dict):
+            for p in {PK, ID, *self.parser.pk_names}:
+                pk = data.get(p)
+                if pk is not None:
+                    return pk
+        return None
+
+    @property
+    def bulk_connection(self):
+        from django.db import connections, router
+        return connections[router.db_for_write(self.model.model)]
+
+    @property
+    def multi_table(self) -> bool:
+        meta = self.model.meta
+        return any(getattr(parent, '_meta').concrete_model is not meta.concrete_model
+                   for parent in meta.get_parent_list())
+
+    @property
+    def bulk_insertable(self) -> bool:
+        # the primary keys of the inserted rows need to be returned
+        # and the rows of the multi-table inherited models are inserted in several tables
+        return bool(self.bulk_connection.features.can_return_rows_from_bulk_insert) and not self.multi_table
+
+    @property
+    def bulk_upsertable(self) -> bool:
+        # INSERT ... ON CONFLICT (pk) DO UPDATE, MySQL only supports the conflicts without a target
+        # (ON DUPLICATE KEY) that updates the rows conflicted by any unique key, so it is not used
+        return bool(getattr(self.bulk_connection.features, 'supports_update_conflicts_with_target', False)) \
+            and not self.multi_table
+
+    @property
+    def bulk_required_fields(self) -> List[set]:
+        # the NOT NULL columns that the INSERT of the model instance can not fill (no default or auto value),
+        # INSERT ... ON CONFLICT fails the NOT NULL constraint before the conflict if they are not provided,
+        # each is a set of the name and the attname (like {'target', 'target_id'})
+        required = []
+        for field in self.model.meta.concrete_fields:
+            if field.primary_key or field.null or field.has_default():
+                continue
+            has_db_default = getattr(field, 'has_db_default', None)
+            if has_db_default and has_db_default():
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                continue
+            if field.get_default() is not None:
+                # the empty string of the string fields
+                continue
+            required.append({field.name, field.attname})
+        return required
+
+    def get_bulk_batch_size(self, params: int) -> int:
+        # rows per statement within the query params limit of the database
+        max_params = self.bulk_connection.features.max_query_params or self.MAX_QUERY_PARAMS
+        return max(max_params // max(params, 1), 1)
+
+    def prepare_bulk_data(self, data: list, must_create: bool = False, must_update: bool = False):
+        """
+        Partition the data into the rows to create (model instance, values)
+        and the rows with primary key to save (model instance, update fields, values),
+        the instances are returned in the order of the data to collect the primary keys
+        """
+        model = self.model.model
+        pk_field = self.model.meta.pk
+        pk_names = {pk_field.column, pk_field.attname}
+        instances = []
+        creates = []
+        saves = []
+        for val in data:
+            pk = self.get_data_pk(val)
+            values = self.process_data(val)
+            if pk is None:
+                if must_update:
+                    raise exceptions.MissingPrimaryKey
+                obj = model(**values)
+                creates.append((obj, values))
+            else:
+                obj = model(**values)
+                obj.pk = pk_field.to_python(pk)
+                if must_create:
+                    creates.append((obj, values))
+                else:
+                    fields = tuple(sorted(key for key in values if key not in pk_names))
+                    saves.append((obj, fields, values))
+            instances.append(obj)
+        return instances, creates, saves
+
+    def bulk_save_data(self, data: list, must_create: bool = False, must_update: bool = False):
+        instances, creates, saves = self.prepare_bulk_data(data, must_create=must_create, must_update=must_update)
+        queryset = self.model.get_queryset()
+        fields_num = len(self.model.meta.concrete_fields)
+
+        if saves:
+            if self.bulk_upsertable and not must_update:
+                upserts, saves = self._partition_upserts(saves)
+                for fields, objs in self._group_by_fields(upserts).items():
+                    if fields:
+                        queryset.bulk_create(
+                            objs,
+                            batch_size=self.get_bulk_batch_size(fields_num),
+                            update_conflicts=True,
+                            update_fields=list(fields),
+                            unique_fields=['pk'],
+                        )
+                    else:
+                        # nothing to update, only make sure the rows exists
+                        queryset.bulk_create(objs, batch_size=self.get_bulk_batch_size(fields_num),
+                                             ignore_conflicts=True)
+            if saves:
+                pk_list = [obj.pk for obj, fields, values in saves]
+                batch_size = self.get_bulk_batch_size(1)
+                existing = set()
+                for i in range(0, len(pk_list), batch_size):
+                    existing.update(queryset.filter(pk__in=pk_list[i: i + batch_size]).values_list('pk', flat=True))
+                updates = self._partition_existing(saves, existing, creates, must_update=must_update)
+                for fields, objs in updates.items():
+                    queryset.bulk_update(objs, list(fields), batch_size=self.get_bulk_batch_size(1 + 2 * len(fields)))
+
+        if creates:
+            if self.bulk_insertable:
+                queryset.bulk_create([obj for obj, values in creates],
+                                     batch_size=self.get_bulk_batch_size(fields_num))
+            else:
+                for obj, values in creates:
+                    obj.pk = self.model.create(values).pk
+
+        return [obj.pk for obj in instances]
+
+    @awaitable(bulk_save_data, bind_service=True)
+    async def bulk_save_data(self, data: list, must_create: bool = False, must_update: bool = False):
+        instances, creates, saves = self.prepare_bulk_data(data, must_create=must_create, must_update=must_update)
+        queryset = self.model.get_queryset()
+        fields_num = len(self.model.meta.concrete_fields)
+
+        if saves:
+            if self.bulk_upsertable and not must_update:
+                upserts, saves = self._partition_upserts(saves)
+                for fields, objs in self._group_by_fields(upserts).items():
+                    if fields:
+                        await queryset.abulk_create(
+                            objs,
+                            batch_size=self.get_bulk_batch_size(fields_num),
+                            update_conflicts=True,
+                            update_fields=list(fields),
+                            unique_fields=['pk'],
+                        )
+                    else:
+                        await queryset.abulk_create(objs, batch_size=self.get_bulk_batch_size(fields_num),
+                                                    ignore_conflicts=True)
+            if saves:
+                pk_list = [obj.pk for obj, fields, values in saves]
+                batch_size = self.get_bulk_batch_size(1)
+                existing = set()
+                for i in range(0, len(pk_list), batch_size):
+                    async for pk in queryset.filter(pk__in=pk_list[i: i + batch_size]).values_list('pk', flat=True):
+                        existing.add(pk)
+                updates = self._partition_existing(saves, existing, creates, must_update=must_update)
+                for fields, objs in updates.items():
+                    await queryset.abulk_update(objs, list(fields),
+                                                batch_size=self.get_bulk_batch_size(1 + 2 * len(fields)))
+
+        if creates:
+            if self.bulk_insertable:
+                await queryset.abulk_create([obj for obj, values in creates],
+                                            batch_size=self.get_bulk_batch_size(fields_num))
+            else:
+                for obj, values in creates:
+                    obj.pk = (await self.model.create(values)).pk
+
+        return [obj.pk for obj in instances]
+
+    @classmethod
+    def _group_by_fields(cls, saves: list) -> dict:
+        groups = {}
+        for obj, fields, values in saves:
+            groups.setdefault(fields, []).append(obj)
+        return groups
+
+    def _partition_upserts(self, saves: list) -> tuple:
+        # the rows that provides all the required fields are upserted (INSERT ... ON CONFLICT),
+        # the others (partial updates) are updated if exists or created (like save_data)
+        required = self.bulk_required_fields
+        upserts = []
+        lookups = []
+        for item in saves:
+            values = item[2]
+            if all(names.intersection(values) for names in required):
+                upserts.append(item)
+            else:
+                lookups.append(item)
+        return upserts, lookups
+
+    @classmethod
+    def _partition_existing(cls, saves: list, existing: set, creates: list, must_update: bool = False) -> dict:
+        # the rows that exists are updated (grouped by the fields), the others are created
+        updates = {}
+        for obj, fields, values in saves:
+            if obj.pk in existing:
+                if fields:
+                    updates.setdefault(fields, []).append(obj)
+            elif must_update:
+                raise exceptions.UpdateFailed
+            else:
+                creates.append((obj, values))
+        return updates
+
     def save_data(self, data, must_create: bool = False, must_update: bool = False):
         if multi(data):
-            # TODO: implement bulk create/update
-            pk_list = []
-            for val in data:
-                pk = self.save_data(val)
-                if pk is not None:
-                    pk_list.append(pk)
-            return pk_list
+            return self.bulk_save_data(list(data), must_create=must_create, must_update=must_update)
         else:
-            from utilmeta.core.orm.schema import Schema
-            pk = None
-            if isinstance(data, Schema):
-                pk = data.pk
-            elif isinstance(data, dict):
-                for p in {PK, ID, *self.parser.pk_names}:
-                    pk = data.get(p)
-                    if pk is not None:
-                        break
+            pk = self.get_data_pk(data)
             data = self.process_data(data)
             if pk is None:
                 # create
@@ -690,24 +1021,9 @@ class DjangoQueryCompiler(BaseQueryCompiler):
     @awaitable(save_data, bind_service=True)
     async def save_data(self, data, must_create: bool = False, must_update: bool = False):
         if multi(data):
-            # TODO: implement bulk create/update
-            pk_list = []
-            for val in data:
-                pk = await self.save_data(val, must_create=must_create, must_update=must_update)
-                if pk is not None:
-                    pk_list.append(pk)
-            return pk_list
+            return await self.bulk_save_data(list(data), must_create=must_create, must_update=must_update)
         else:
-            from utilmeta.core.orm.schema import Schema
-            pk = None
-            if isinstance(data, Schema):
-                pk = data.pk
-            elif isinstance(data, dict):
-                for p in {PK, ID, *self.parser.pk_names}:
-                    pk = data.get(p)
-                    if pk is not None:
-                        break
-
+            pk = self.get_data_pk(data)
             data = self.process_data(data)
             if pk is None:
                 if must_update:
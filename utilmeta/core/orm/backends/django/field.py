@@ -162,8 +162,9 @@ class DjangoModelFieldAdaptor(ModelFieldAdaptor):
     def type(self) -> type:
         return self._get_type(self.field)
 
-    @property
+    @cached_property
     def params(self) -> dict:
+        # field.deconstruct() is costly and checked for every row in process_data (is_writable)
         return self._get_params(self.field)
 
     @cached_property
@@ -2,11 +2,20 @@ from . import expressions as exp
 from ..base import ModelFieldAdaptor
 from utilmeta.core.orm.fields.filter import ParserFilter
 from utilmeta.core.orm.fields.order import Order
-from django.db import models
+from utilmeta.core.orm.fields.pagination import Cursor
+from utilmeta.core.orm.count import CountStrategy
+from .queryset import AwaitableQuerySet
+from django.db import models, connections
 from django.db.models import Q
-from utilmeta.utils import multi
+from django.core.exceptions import ValidationError, EmptyResultSet
+from asgiref.sync import sync_to_async
+from utilmeta.utils import multi, SEG
+from utilmeta.utils import exceptions as exc
 from utilmeta.utils.error import Error
+from typing import List, Tuple, Optional
 import warnings
+import hashlib
+import json
 from utilmeta.core.orm.generator import BaseQuerysetGenerator
 
 
@@ -36,8 +45,11 @@ class DjangoQuerysetGenerator(BaseQuerysetGenerator):
 
     def get_queryset(self, base=None) -> models.QuerySet:
         qs = self._get_unsliced_qs(base)
+        keys = self.get_keys(qs.db) if self.keyset else None
         if self.orders:
             qs = qs.order_by(*self.orders)
+        if keys and self.cursor:
+            qs = self.apply_cursor(qs, keys)
         # if not qs.query.order_by and \
         #         not qs.query.distinct and \
         #         not qs.query.combinator and \
@@ -45,16 +57,292 @@ class DjangoQuerysetGenerator(BaseQuerysetGenerator):
         #     qs = qs.distinct()
         if self.slice and not qs.query.is_sliced:
             qs = qs[self.slice]
+        if base is None:
+            self.shape = self.get_shape(qs)
         return qs
 
+    def get_shape(self, qs: models.QuerySet) -> tuple:
+        # the values are reduced to the types (and the lengths of the multiple values)
+        # the querysets of the same shape are compiled to the same SQL except the params and limits
+        values = []
+        for key, value in self.values.items():
+            values.append((key, type(value).__name__, len(value) if multi(value) else None))
+        return (
+            tuple(values),
+            tuple(str(order) for order in self.orders),
+            qs.query.is_sliced
+        )
+
+    def get_keys(self, using: str) -> List[Tuple[str, bool, Optional[bool]]]:
+        """
+        The keys of the keyset pagination from the orders: (name, descending, nulls after the values),
+        nulls after the values is None if the key cannot be null,
+        the pk is appended to the orders (if not ordered by) to make the order of the rows total
+        """
+        nulls_largest = connections[using].features.nulls_order_largest
+        pk_names = {'pk', self.model.meta.pk.name, self.model.meta.pk.attname}
+        keys = []
+        for order in self.orders:
+            nulls_first = nulls_last = False
+            if isinstance(order, str) and order != '?':
+                desc = order.startswith('-')
+                name = order.lstrip('-')
+            elif isinstance(order, exp.OrderBy) and isinstance(order.expression, exp.F):
+                desc = order.descending
+                name = order.expression.name
+                nulls_first = bool(order.nulls_first)
+                nulls_last = bool(order.nulls_last)
+            else:
+                raise ValueError(f'{self.__class__}: order: {order} is not supported by the cursor pagination')
+            if name in pk_names:
+                keys.append((name, desc, None))
+                break
+            if not self.is_nullable(name):
+                nulls_after = None
+            elif nulls_first or nulls_last:
+                nulls_after = nulls_last
+            else:
+                nulls_after = desc != nulls_largest
+            keys.append((name, desc, nulls_after))
+        else:
+            self.orders.append('pk')
+            keys.append(('pk', False, None))
+        return keys
+
+    def is_nullable(self, name: str) -> bool:
+        if name in self.annotates:
+            return not isinstance(self.annotates[name], exp.Count)
+        if SEG in name:
+            # the relation might be null
+            return True
+        field = self.model.get_field(name, silently=True)
+        return field.is_nullable if field else True
+
+    @classmethod
+    def get_cursor_q(cls, keys: List[Tuple[str, bool, Optional[bool]]], values: list) -> Optional[Q]:
+        """
+        The rows after the cursor: (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND pk > z),
+        the comparison of each key follows its direction and the nulls position, so the mixed asc / desc orders
+        are supported that the row value comparison (a, b, pk) > (x, y, z) is not
+        """
+        q = None
+        eq = Q()
+        for (name, desc, nulls_after), value in zip(keys, values):
+            if value is None:
+                after = None if nulls_after else Q(**{f'{name}__isnull': False})
+            else:
+                after = Q(**{f'{name}__lt' if desc else f'{name}__gt': value})
+                if nulls_after:
+                    after |= Q(**{f'{name}__isnull': True})
+            if after is not None:
+                q = eq & after if q is None else q | (eq & after)
+            eq &= Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+        if q is None:
+            return None
+        name, desc, nulls_after = keys[0]
+        value = values[0]
+        if len(keys) > 1 and value is not None:
+            # the bound of the leading key, the index range scan starts from the cursor
+            bound = Q(**{f'{name}__lte' if desc else f'{name}__gte': value})
+            if nulls_after:
+                bound |= Q(**{f'{name}__isnull': True})
+            q = bound & q
+        return q
+
+    @classmethod
+    def get_key_names(cls, keys: List[Tuple[str, bool, Optional[bool]]]) -> List[str]:
+        return [('-' if desc else '') + name for name, desc, nulls_after in keys]
+
+    def apply_cursor(self, qs: models.QuerySet, keys: List[Tuple[str, bool, Optional[bool]]]) -> models.QuerySet:
+        try:
+            names, values = Cursor.decode(self.cursor)
+        except ValueError as e:
+            raise exc.BadRequest(str(e)) from e
+        if names != self.get_key_names(keys):
+            raise exc.BadRequest(f'Invalid cursor: orders {names} not match the query orders')
+        q = self.get_cursor_q(keys, values)
+        if q is None:
+            return qs.none()
+        try:
+            return qs.filter(q)
+        except (ValueError, TypeError, ValidationError) as e:
+            raise exc.BadRequest(f'Invalid cursor values: {e}') from e
+
+    def _get_cursor_qs(self, result: list, base=None):
+        if not result:
+            return None, None
+        qs = self._get_unsliced_qs(base)
+        if not self.limit or len(result) < self.limit:
+            # the last page
+            return None, None
+        last = result[-1]
+        if isinstance(last, models.Model):
+            pk = last.pk
+        elif isinstance(last, dict):
+            pk = getattr(last, 'pk', None)
+            if pk is None:
+                pk = last.get('pk', last.get(self.model.meta.pk.attname))
+        else:
+            pk = last
+        if pk is None:
+            raise ValueError(f'{self.__class__}: primary key of the last row is required to get the next cursor')
+        keys = self.get_keys(qs.db)
+        return keys, qs.filter(pk=pk).values(*[name for name, desc, nulls_after in keys])
+
+    def get_next_cursor(self, result: list, base=None) -> Optional[str]:
+        """
+        The cursor of the page after the result (the serialized rows of the queryset),
+        the key values of the last row are queried by its pk, None if there are no more rows
+        """
+        keys, qs = self._get_cursor_qs(result, base)
+        if qs is None:
+            return None
+        row = qs.first()
+        if row is None:
+            return None
+        return Cursor.encode(self.get_key_names(keys), [row[name] for name, desc, nulls_after in keys])
+
+    async def aget_next_cursor(self, result: list, base=None) -> Optional[str]:
+        keys, qs = self._get_cursor_qs(result, base)
+        if qs is None:
+            return None
+        if isinstance(qs, AwaitableQuerySet):
+            row = await qs.result(one=True)
+        else:
+            row = await qs.afirst()
+        if row is None:
+            return None
+        return Cursor.encode(self.get_key_names(keys), [row[name] for name, desc, nulls_after in keys])
+
     def count(self, base=None) -> int:
         qs = self._get_unsliced_qs(base)
-        return qs.count()
+        strategy = self.parser.count_strategy
+        if strategy.exact:
+            return qs.count()
+        cache, key = self.get_count_cache(qs, strategy)
+        if key:
+            value = cache.get(key)
+            if value is not None:
+                return value
+        if strategy.method == strategy.CAPPED:
+            value = qs[:strategy.limit].count()
+        elif strategy.method == strategy.ESTIMATE:
+            value = self.estimate_count(qs, self.fetch_estimate(qs), strategy.threshold)
+        else:
+            value = qs.count()
+        if key:
+            cache.set(key, value, timeout=strategy.timeout)
+        return value
 
     # @awaitable(count)
     async def acount(self, base=None) -> int:
         qs = self._get_unsliced_qs(base)
-        return await qs.acount()
+        strategy = self.parser.count_strategy
+        if strategy.exact:
+            return await qs.acount()
+        cache, key = self.get_count_cache(qs, strategy)
+        if key:
+            value = await cache.get(key)
+            if value is not None:
+                return value
+        if strategy.method == strategy.CAPPED:
+            value = await qs[:strategy.limit].acount()
+        elif strategy.method == strategy.ESTIMATE:
+            value = await self.aestimate_count(qs, await self.afetch_estimate(qs), strategy.threshold)
+        else:
+            value = await qs.acount()
+        if key:
+            await cache.set(key, value, timeout=strategy.timeout)
+        return value
+
+    def get_count_cache(self, qs: models.QuerySet, strategy: CountStrategy):
+        """
+        The cache and the key (by the hash of the count query) of the cached count, (None, None) if not cached
+        """
+        if not strategy.cache:
+            return None, None
+        from utilmeta.core.cache.config import CacheConnections
+        try:
+            sql, params = qs.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return None, None
+        ident = f'{strategy.method}:{strategy.limit}:{strategy.threshold}:{qs.db}:{sql}:{params!r}'
+        key = f'{strategy.KEY_PREFIX}:{self.model.meta.label_lower}:{hashlib.sha1(ident.encode()).hexdigest()}'
+        return CacheConnections.get(strategy.cache), key
+
+    @classmethod
+    def get_estimate_query(cls, qs: models.QuerySet) -> Optional[Tuple[str, list]]:
+        """
+        The SQL of the planner estimate of the count of the queryset, None if not supported,
+        postgres: reltuples of the table, or the rows of the EXPLAIN plan if filtered,
+        mysql: TABLE_ROWS of information_schema for the queryset without filters
+        """
+        connection = connections[qs.db]
+        query = qs.query
+        filtered = bool(query.where) or bool(query.distinct) or bool(query.combinator)
+        table = qs.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            if not filtered:
+                return 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', \
+                    [connection.ops.quote_name(table)]
+            try:
+                sql, params = qs.order_by().query.sql_with_params()
+            except EmptyResultSet:
+                return None
+            return f'EXPLAIN (FORMAT JSON) {sql}', list(params)
+        if connection.vendor == 'mysql' and not filtered:
+            return 'SELECT TABLE_ROWS FROM information_schema.TABLES ' \
+                   'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [table]
+        return None
+
+    @classmethod
+    def parse_estimate(cls, value) -> Optional[int]:
+        if value is None:
+            return None
+        if isinstance(value, (str, bytes)):
+            # the EXPLAIN (FORMAT JSON) output
+            value = json.loads(value)
+        if isinstance(value, list):
+            value = value[0]['Plan']['Plan Rows'] if value else None
+        if value is None or value < 0:
+            # reltuples is -1 if the table has never been analyzed
+            return None
+        return int(value)
+
+    def fetch_estimate(self, qs: models.QuerySet) -> Optional[int]:
+        estimate = self.get_estimate_query(qs)
+        if not estimate:
+            return None
+        with connections[qs.db].cursor() as cursor:
+            cursor.execute(*estimate)
+            row = cursor.fetchone()
+        return self.parse_estimate(row[0] if row else None)
+
+    async def afetch_estimate(self, qs: models.QuerySet) -> Optional[int]:
+        if not isinstance(qs, AwaitableQuerySet):
+            return await sync_to_async(self.fetch_estimate)(qs)
+        estimate = self.get_estimate_query(qs)
+        if not estimate:
+            return None
+        row = await qs.connections_cls.get(qs.db).fetchone(*estimate)
+        return self.parse_estimate(list(row.values())[0] if row else None)
+
+    @classmethod
+    def estimate_count(cls, qs: models.QuerySet, estimate: Optional[int], threshold: int) -> int:
+        if estimate is None:
+            return qs.count()
+        if estimate >= threshold:
+            return estimate
+        # the estimate of a small result is not reliable, count it up to the threshold
+        return qs[:threshold].count()
+
+    @classmethod
+    async def aestimate_count(cls, qs: models.QuerySet, estimate: Optional[int], threshold: int) -> int:
+        if estimate is None:
+            return await qs.acount()
+        if estimate >= threshold:
+            return estimate
+        return await qs[:threshold].acount()
 
     def process_filter(self, field: ParserFilter, value):
         if field.model_field and field.model_field.is_exp:
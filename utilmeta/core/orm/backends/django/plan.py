@@ -0,0 +1,231 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, List, Any
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.sql import Query
+from django.db.models.sql.where import WhereNode
+from django.core import exceptions as exc
+
+FullResultSet = getattr(exc, 'FullResultSet', None)
+PLACEHOLDER = re.compile(r'%[%s]')
+
+
+class Uncacheable(Exception):
+    pass
+
+
+def freeze(value):
+    # hashable key of the includes / excludes of the context (nested dict or list)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(freeze(v) for v in value)
+    hash(value)
+    return value
+
+
+class QueryPlan:
+    """
+    The compiled values query of a schema over the queryset generated by a Query,
+    the SQL is split around the WHERE clause: the select/from params before it and the order params after it
+    are fixed by the query shape, so a repeated query only compiles its WHERE clause to bind the new values,
+    LIMIT/OFFSET are not in the compiled SQL, they are appended from the slice of the queryset
+    """
+
+    def __init__(self, queryset: QuerySet, sql: str, where: str,
+                 pre_params: list, post_params: list, fields: list, expressions: dict,
+                 isolated_fields: dict, pk_fields: set, recursively: bool):
+        self.using = queryset.db
+        # the plan does not keep the filters (values) and the slice of the first queryset alive,
+        # only the select of the values queryset is used to convert the rows of afetch()
+        detached = queryset._chain()
+        detached.query.where = WhereNode()
+        detached.query.clear_limits()
+        self.queryset = detached
+        self.sql = sql
+        self.where = where
+        self.pre_params = pre_params
+        self.post_params = post_params
+        self.fields = fields
+        self.expressions = expressions
+        self.isolated_fields = isolated_fields
+        self.pk_fields = pk_fields
+        self.recursively = recursively
+
+        query = queryset.query
+        selected = getattr(query, 'selected', None)
+        if selected:
+            self.names = list(selected)
+        else:
+            self.names = [
+                *query.extra_select,
+                *query.values_select,
+                *query.annotation_select,
+            ]
+        self.converters = {}
+
+    @classmethod
+    def compile_where(cls, query: Query, using: str) -> Tuple[str, list]:
+        split = getattr(query.where, 'split_having_qualify', None)
+        if not split:
+            raise Uncacheable('django version does not support')
+        where, having, qualify = split()
+        if having is not None or qualify is not None:
+            # aggregate or window filters
+            raise Uncacheable('having or qualify')
+        try:
+            sql, params = query.get_compiler(using).compile(where)
+        except exc.EmptyResultSet:
+            raise Uncacheable('empty result')
+        except Exception as e:
+            if FullResultSet and isinstance(e, FullResultSet):
+                return '', []
+            raise
+        return sql, list(params)
+
+    @classmethod
+    def build(cls, base: QuerySet, queryset: QuerySet, **state) -> 'QueryPlan':
+        """
+        Compile the values queryset (queryset) of the generated queryset (base)
+        """
+        using = queryset.db
+        where, where_params = cls.compile_where(base.query, using)
+        compiler = queryset.query.get_compiler(using)
+        try:
+            sql, params = compiler.as_sql(with_limits=False)
+        except exc.EmptyResultSet:
+            raise Uncacheable('empty result')
+        params = list(params)
+        if where:
+            marker = ' WHERE ' + where
+            if sql.count(marker) != 1:
+                raise Uncacheable('where clause not located')
+            index = sql.index(marker)
+            pre = PLACEHOLDER.findall(sql[:index]).count('%s')
+        else:
+            if ' WHERE ' in sql:
+                raise Uncacheable('where clause not located')
+            pre = len(params)
+        end = pre + len(where_params)
+        if params[pre:end] != where_params:
+            raise Uncacheable('where params not matched')
+        plan = cls(
+            queryset,
+            sql=sql,
+            where=where,
+            pre_params=params[:pre],
+            post_params=params[end:],
+            **state
+        )
+        fields = [s[0] for s in compiler.select[0:compiler.col_count]]
+        plan.converters = compiler.get_converters(fields)
+        return plan
+
+    def bind(self, base: QuerySet) -> Optional[Tuple[str, list]]:
+        """
+        Get the SQL and params for the generated queryset (base), None if its WHERE clause is not the same
+        """
+        where, where_params = self.compile_where(base.query, self.using)
+        if where != self.where:
+            return None
+        sql = self.sql
+        query = base.query
+        if query.is_sliced:
+            sql = f'{sql} {connections[self.using].ops.limit_offset_sql(query.low_mark, query.high_mark)}'
+        return sql, self.pre_params + where_params + self.post_params
+
+    def convert(self, rows) -> List[dict]:
+        names = self.names
+        indexes = range(len(names))
+        converters = self.converters
+        if converters:
+            connection = connections[self.using]
+            converters = list(converters.items())
+            result = []
+            for row in rows:
+                row = list(row)
+                for pos, (convs, expression) in converters:
+                    value = row[pos]
+                    for converter in convs:
+                        value = converter(value, expression, connection)
+                    row[pos] = value
+                result.append({names[i]: row[i] for i in indexes})
+            return result
+        return [{names[i]: row[i] for i in indexes} for row in rows]
+
+    def fetch(self, sql: str, params: list) -> List[dict]:
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return self.convert(cursor.fetchall())
+
+    async def afetch(self, sql: str, params: list) -> List[dict]:
+        # for the AwaitableQuerySet, the rows are converted like AwaitableQuerySet.result()
+        db = self.queryset.connections_cls.get(self.using)
+        values = await db.fetchall(sql, params)
+        return list(self.queryset._convert_raw_values(values, query=self.queryset.query))
+
+    def restore(self, compiler):
+        # the state of the compiler after process_fields()
+        compiler.fields = list(self.fields)
+        compiler.expressions = dict(self.expressions)
+        compiler.isolated_fields = dict(self.isolated_fields)
+        compiler.pk_fields = set(self.pk_fields)
+        compiler.recursively = compiler.recursively or self.recursively
+
+
+class QueryPlanCache:
+    """
+    A bounded (least recently used) cache of the query plans, with the hit and miss counts,
+    it is opt-in for the compiler:
+
+        DjangoQueryCompiler.plan_cache = QueryPlanCache()
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._plans: 'OrderedDict[Any, QueryPlan]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, key) -> Optional[QueryPlan]:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+            return plan
+
+    def count(self, hit: bool):
+        # a plan got by get() is a miss if it can not bind the queryset
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key, plan: QueryPlan):
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._plans),
+                'max_size': self.max_size,
+            }
@@ -1,4 +1,5 @@
 import inspect
+import asyncio
 from django.db.models import QuerySet, Manager, Model, sql, AutoField
 from django.db.models.options import Options
 from django.db.models.query import ValuesListIterable, NamedValuesListIterable, \
@@ -39,23 +40,60 @@ class AwaitableQuerySet(QuerySet):
     def __init__(self, model, query=None, using=None, hints=None):
         super().__init__(model, query=query or self.query_cls(model), using=using, hints=hints)
 
+    DEFAULT_CHUNK_SIZE = 2000
+
     def __aiter__(self):
-        async def generator():
-            for item in await self.result():
-                if self._iterable_class == ModelIterable:
-                    yield self.fill_model_instance(item)
-                # elif self._iterable_class == ValuesListIterable:
-                #     yield tuple(item.values())
-                # elif self._iterable_class == FlatValuesListIterable:
-                #     v = tuple(item.values())
-                #     if v:
-                #         yield v[0]
-                # elif self._iterable_class == NamedValuesListIterable:
-                #     from collections import namedtuple
-                #     yield namedtuple(self.model.__name__, field_names=list(item))(*item.values())
-                else:
-                    yield item
-        return generator()
+        return self.aiterator()
+
+    async def aiterator(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Stream the results by the server-side cursor of the async database, converted chunk by chunk,
+        the cursor is consumed in another task (with its own connection) and handed over by a queue of one chunk,
+        so the memory is constant and other queries can be made during the iteration
+        """
+        if chunk_size is None or chunk_size <= 0:
+            raise ValueError("Chunk size must be strictly positive.")
+        try:
+            q, params = self.compiler.as_sql()
+        except exceptions.EmptyResultSet:
+            return
+        db = self.connections_cls.get(self.db)
+        queue = asyncio.Queue(maxsize=1)
+
+        async def produce():
+            try:
+                chunk = []
+                async for row in db.async_iterate(q, params, chunk_size=chunk_size):
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        await queue.put(chunk)
+                        chunk = []
+                if chunk:
+                    await queue.put(chunk)
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                for item in self._convert_raw_values(chunk, query=self.query):
+                    if self._iterable_class == ModelIterable:
+                        yield self.fill_model_instance(item)
+                    else:
+                        yield item
+        finally:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except (Exception, asyncio.CancelledError):
+                    pass
 
     def as_sql(self) -> Tuple[str, tuple]:
         return self.compiler.as_sql()
@@ -1,7 +1,7 @@
 from .parser import SchemaClassParser
 from .fields.field import ParserQueryField
 from .context import QueryContext
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterator, AsyncIterator
 from utilmeta.utils import awaitable
 from utype import unprovided
 
@@ -89,6 +89,12 @@ class BaseQueryCompiler:
     async def get_values(self) -> List[dict]:
         raise NotImplementedError
 
+    def iter_values(self, chunk_size: int = None) -> Iterator[List[dict]]:
+        raise NotImplementedError
+
+    def aiter_values(self, chunk_size: int = None) -> AsyncIterator[List[dict]]:
+        raise NotImplementedError
+
     def process_data(self, data: dict):
         if not isinstance(data, dict):
             return {}
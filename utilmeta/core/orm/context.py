@@ -10,6 +10,8 @@ class QueryContext(DataClass):
     recursion_map: Optional[dict] = None
     force_expressions: Optional[dict] = None
     force_raise_error: bool = False
+    # the filter / order shape of the Query that generated the queryset (the key of the query plan)
+    shape: Optional[tuple] = None
 
     # @classmethod
     # def init(cls):
@@ -0,0 +1,54 @@
+from typing import Optional
+
+
+class CountStrategy:
+    """
+    How Query.count() / acount() counts the filtered rows, declared on the Query class by __count__
+
+        class ArticleQuery(orm.Query[Article]):
+            __count__ = orm.CountStrategy('capped', limit=10000)
+
+    * exact: SELECT COUNT(*) over the filtered queryset
+    * estimate: the estimate of the query planner (postgres: reltuples of the table / EXPLAIN of the query,
+      mysql: TABLE_ROWS of information_schema for the queryset without filters),
+      the estimates below the threshold (or not available) are counted by a capped count of the threshold
+    * capped: SELECT COUNT(*) FROM (... LIMIT limit), the count stops at the limit
+
+    with a cache alias, the count is cached by the hash of the query (in timeout seconds)
+    """
+    EXACT = 'exact'
+    ESTIMATE = 'estimate'
+    CAPPED = 'capped'
+    METHODS = (EXACT, ESTIMATE, CAPPED)
+    DEFAULT_LIMIT = 10000
+    DEFAULT_THRESHOLD = 1000
+    KEY_PREFIX = 'utilmeta:orm:count'
+
+    def __init__(self, method: str = EXACT, *,
+                 limit: int = None,
+                 threshold: int = None,
+                 cache: Optional[str] = None,
+                 timeout: int = 10):
+        if method not in self.METHODS:
+            raise ValueError(f'{self.__class__.__name__}: invalid method: {repr(method)}, must in {self.METHODS}')
+        if method == self.CAPPED:
+            limit = limit or self.DEFAULT_LIMIT
+        elif limit:
+            raise ValueError(f'{self.__class__.__name__}: limit is only for the capped count')
+        if method == self.ESTIMATE:
+            threshold = self.DEFAULT_THRESHOLD if threshold is None else threshold
+        elif threshold is not None:
+            raise ValueError(f'{self.__class__.__name__}: threshold is only for the estimate count')
+        self.method = method
+        self.limit = limit
+        self.threshold = threshold
+        self.cache = cache
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.method)}, limit={self.limit}, ' \
+               f'threshold={self.threshold}, cache={repr(self.cache)}, timeout={self.timeout})'
+
+    @property
+    def exact(self) -> bool:
+        return self.method == self.EXACT and not self.cache
@@ -41,6 +41,9 @@ class BaseDatabaseAdaptor:
     def fetchall(self, sql, params=None):
         raise NotImplementedError
 
+    def iterate(self, sql, params=None, chunk_size: int = None):
+        raise NotImplementedError
+
     def transaction(self, savepoint=None, isolation=None, force_rollback: bool = False):
         raise NotImplementedError
 
@@ -3,7 +3,7 @@ from utilmeta.conf.base import Config
 from utilmeta import UtilMeta
 from utilmeta.utils import awaitable, exceptions
 from typing import Dict, List, Optional, Union, Any
-from typing import ContextManager, AsyncContextManager
+from typing import ContextManager, AsyncContextManager, AsyncIterator
 from .base import BaseDatabaseAdaptor
 from .encode import EncodeDatabasesAsyncAdaptor
 
@@ -151,6 +151,9 @@ class Database(Config):
     async def fetchall(self, sql, params=None) -> List[dict]:
         return await self.get_adaptor(True).fetchall(sql, params)
 
+    def async_iterate(self, sql, params=None, chunk_size: int = None) -> AsyncIterator[dict]:
+        return self.get_adaptor(True).iterate(sql, params, chunk_size=chunk_size)
+
     def transaction(self, savepoint=None, isolation=None, force_rollback: bool = False) -> ContextManager:
         return self.get_adaptor(False).transaction(savepoint, isolation, force_rollback=force_rollback)
 
@@ -1,5 +1,6 @@
 from .base import BaseDatabaseAdaptor
 from typing import Mapping, TYPE_CHECKING
+from functools import lru_cache
 import re
 
 if TYPE_CHECKING:
@@ -23,6 +24,16 @@ if TYPE_CHECKING:
 #   but such mistake will definitely happens in the complex query
 
 
+ARRAY_PARAM = re.compile(r'%s::[a-zA-Z0-9()]+\[\]')
+
+
+@lru_cache(maxsize=1024)
+def _parse_sql(sql: str, num: int) -> str:
+    # the same SQL (like the cached query plans) is only parsed once
+    sql = ARRAY_PARAM.sub('%s', sql)     # match array (only for postgres)
+    return sql % tuple(f':param{i}' for i in range(0, num))
+
+
 class EncodeDatabasesAsyncAdaptor(BaseDatabaseAdaptor):
     asynchronous = True
 
@@ -123,10 +134,7 @@ class EncodeDatabasesAsyncAdaptor(BaseDatabaseAdaptor):
         if isinstance(params, Mapping):
             return sql, {key: str(val) for key, val in params.items()}
         elif isinstance(params, (list, tuple)):
-            # regex = re.compile('%s::[a-zA-Z0-9()]+\[\]')
-            sql = re.compile('%s::[a-zA-Z0-9()]+\[\]').sub('%s', sql)     # match array (only for postgres)
-            replaces = tuple(f':param{i}' for i in range(0, len(params)))
-            sql = sql % replaces
+            sql = _parse_sql(sql, len(params))
             params = {f'param{i}': params[i] for i in range(0, len(params))}
             # print('parsed:', sql, params)
             return sql, params
@@ -155,6 +163,36 @@ class EncodeDatabasesAsyncAdaptor(BaseDatabaseAdaptor):
         values = await db.fetch_all(sql, params)
         return [dict(val._mapping) for val in values] if values else []
 
+    async def iterate(self, sql, params=None, chunk_size: int = None):
+        """
+        Stream the rows by the server-side cursor (postgres cursor in a transaction, sqlite stepping,
+        the unbuffered SSDictCursor for mysql)
+        """
+        db = await self.connect()       # lazy connect
+        if self.async_engine in ('aiomysql', 'asyncmy'):
+            # the cursor of databases is buffered for mysql
+            if self.async_engine == 'aiomysql':
+                from aiomysql.cursors import SSDictCursor
+            else:
+                from asyncmy.cursors import SSDictCursor
+            async with db.connection() as connection:
+                cursor = await connection.raw_connection.cursor(SSDictCursor)
+                try:
+                    # the format (%s) params is used by the mysql drivers
+                    await cursor.execute(sql, params)
+                    while True:
+                        rows = await cursor.fetchmany(chunk_size or 1000)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield dict(row)
+                finally:
+                    await cursor.close()
+            return
+        sql, params = self._parse_sql_params(sql, params)
+        async for val in db.iterate(sql, params):
+            yield dict(val._mapping)
+
     def transaction(self, savepoint=None, isolation=None, force_rollback: bool = False):
         db = self.get_db()
         return db.transaction(force_rollback=force_rollback, isolation=isolation)
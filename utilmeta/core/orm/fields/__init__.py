@@ -1,5 +1,5 @@
 from .field import QueryField as Field
 from .order import OrderBy, Order
 from .filter import Filter
-from .pagination import Page, Offset, Limit
+from .pagination import Page, Offset, Limit, Cursor
 from .scope import Scope
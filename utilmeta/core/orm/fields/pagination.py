@@ -1,4 +1,8 @@
-from utype import Field, types
+import json
+import base64
+from decimal import Decimal
+from typing import Tuple, List
+from utype import Field, types, JSONEncoder
 
 
 class Page(Field):
@@ -23,3 +27,43 @@ class Limit(Field):
 
     def __init__(self, ge: int = 0, required: bool = False, **kwargs):
         super().__init__(**kwargs, required=required, ge=ge)
+
+
+class Cursor(Field):
+    """
+    Keyset pagination: the opaque token carries the values of the active orders and the pk
+    of the last row of the previous page, the next page is queried by WHERE (a, b, pk) > (...)
+    instead of OFFSET, so the latency does not grow with the depth of the page
+    (Page and Offset are ignored when the cursor is given)
+
+        class ArticleQuery(orm.Query[Article]):
+            order: list = orm.OrderBy(['created_at', 'views'])
+            cursor: str = orm.Cursor()
+            rows: int = orm.Limit(default=20)
+
+        query = ArticleQuery(order=['-created_at'], cursor=token)
+        result = ArticleSchema.serialize(query)
+        next_cursor = query.get_next_cursor(result)     # None at the last page
+    """
+    type = str
+
+    def __init__(self, required: bool = False, **kwargs):
+        super().__init__(**kwargs, required=required)
+
+    @classmethod
+    def encode(cls, keys: List[str], values: list) -> str:
+        # decimals are kept as strings to not lose the precision
+        values = [str(v) if isinstance(v, Decimal) else v for v in values]
+        data = json.dumps([keys, values], cls=JSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).rstrip(b'=').decode('ascii')
+
+    @classmethod
+    def decode(cls, token: str) -> Tuple[List[str], list]:
+        try:
+            data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            keys, values = json.loads(data)
+        except Exception as e:
+            raise ValueError(f'Invalid cursor: {repr(token)}') from e
+        if not isinstance(keys, list) or not isinstance(values, list) or len(keys) != len(values):
+            raise ValueError(f'Invalid cursor: {repr(token)}')
+        return keys, values
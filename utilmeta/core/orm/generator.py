@@ -1,9 +1,9 @@
 from .parser import QueryClassParser
 from .fields.filter import ParserFilter
 from .fields.order import Order, ParserOrderBy
-from .fields.pagination import Page, Limit, Offset
+from .fields.pagination import Page, Limit, Offset, Cursor
 from .fields.scope import Scope
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from .context import QueryContext
 # from utilmeta.utils import awaitable
 
@@ -21,8 +21,11 @@ class BaseQuerysetGenerator:
         self.page = None
         self.limit = None
         self.offset = None
+        self.cursor = None
         self.includes = None
         self.excludes = None
+        # the filter / order shape of the generated queryset, None if a base queryset is given
+        self.shape = None
 
     def process_data(self):
         for key, value in self.values.items():
@@ -43,17 +46,35 @@ class BaseQuerysetGenerator:
     async def acount(self, base=None) -> int:
         raise NotImplementedError
 
+    @property
+    def keyset(self) -> bool:
+        # the query class declares a Cursor field, the rows are ordered by the keys (orders + pk)
+        for field in self.parser.fields.values():
+            if isinstance(field.field, Cursor):
+                return True
+        return False
+
+    def get_next_cursor(self, result: list, base=None) -> Optional[str]:
+        raise NotImplementedError
+
+    async def aget_next_cursor(self, result: list, base=None) -> Optional[str]:
+        raise NotImplementedError
+
     def get_context(self, **kwargs):
         kwargs.update(
             includes=self.includes,
-            excludes=self.excludes
+            excludes=self.excludes,
+            shape=self.shape
         )
         return QueryContext(**kwargs)
 
     @property
     def slice(self) -> slice:
         offset = self.offset
-        if offset is None:
+        if self.cursor:
+            # the rows before the cursor are excluded by the keyset condition
+            offset = None
+        elif offset is None:
             if self.page and self.limit:
                 offset = (self.page - 1) * self.limit
         if offset is not None:
@@ -90,6 +111,8 @@ class BaseQuerysetGenerator:
             self.offset = value
         elif isinstance(field.field, Limit):
             self.limit = value
+        elif isinstance(field.field, Cursor):
+            self.cursor = value
         elif isinstance(field.field, Scope):
             if field.field.excluded:
                 self.excludes = Scope.get_scope_value(value)
@@ -14,7 +14,12 @@ class QueryClassParser(ClassParser):
     def __init__(self, obj, *args, **kwargs):
         model = getattr(obj, '__model__', None)
         from .backends.base import ModelAdaptor
+        from .count import CountStrategy
         self.model = ModelAdaptor.dispatch(model) if model else None
+        count = getattr(obj, '__count__', None)
+        if count is not None and not isinstance(count, CountStrategy):
+            raise TypeError(f'{obj}: __count__ must be a CountStrategy, got {count}')
+        self.count_strategy: CountStrategy = count or CountStrategy()
         super().__init__(obj, *args, **kwargs)
 
     @property
@@ -1,5 +1,6 @@
 import utype
-from typing import TypeVar, Type, List
+import asyncio
+from typing import TypeVar, Type, List, Iterator, AsyncIterator, Optional, Tuple
 from utilmeta.core import request as req
 from .parser import SchemaClassParser, QueryClassParser
 # from .generator import BaseQuerysetGenerator
@@ -110,6 +111,43 @@ class Schema(utype.Schema):
             values.append(cls.__from__(val, cls.__serialize_options__))
         return values
 
+    @classmethod
+    def serialize_with_count(cls: Type[T], query: 'Query', context=None) -> Tuple[List[T], int]:
+        """
+        Serialize the page of the query, with the count of all the rows (by the count strategy of the query)
+        """
+        cls: Type[Schema]
+        return cls.serialize(query, context=context), query.count()
+
+    @classmethod
+    async def aserialize_with_count(cls: Type[T], query: 'Query', context=None) -> Tuple[List[T], int]:
+        # the page and the count are queried concurrently
+        cls: Type[Schema]
+        values, count = await asyncio.gather(cls.aserialize(query, context=context), query.acount())
+        return values, count
+
+    @classmethod
+    def iter_serialize(cls: Type[T], queryset, context=None, chunk_size: int = None) -> Iterator[T]:
+        """
+        Serialize the queryset chunk by chunk (by the server-side cursor if the database supports),
+        to export large tables with constant memory
+        """
+        cls: Type[Schema]
+        compiler = cls._get_compiler(queryset, context=context)
+        kwargs = dict(chunk_size=chunk_size) if chunk_size else {}
+        for chunk in compiler.iter_values(**kwargs):
+            for val in chunk:
+                yield cls.__from__(val, cls.__serialize_options__)
+
+    @classmethod
+    async def aiter_serialize(cls: Type[T], queryset, context=None, chunk_size: int = None) -> AsyncIterator[T]:
+        cls: Type[Schema]
+        compiler = cls._get_compiler(queryset, context=context)
+        kwargs = dict(chunk_size=chunk_size) if chunk_size else {}
+        async for chunk in compiler.aiter_values(**kwargs):
+            for val in chunk:
+                yield cls.__from__(val, cls.__serialize_options__)
+
     @classmethod
     def init(cls: Type[T], queryset, context=None) -> T:
         # initialize this schema with the given queryset (first element)
@@ -214,6 +252,8 @@ class Query(utype.Schema):
     __parser__: QueryClassParser
     __field__ = req.Query
     __model__ = None
+    # the CountStrategy of count() / acount(), exact count by default
+    __count__ = None
 
     # ----
     # consider this schema instance might be setattr/delattr after initialization
@@ -239,6 +279,16 @@ class Query(utype.Schema):
             raise NotImplementedError
         return await self.__parser__.get_generator(self).acount(base)
 
+    def get_next_cursor(self, result: list, base=None) -> Optional[str]:
+        if not self.__parser__.model:
+            raise NotImplementedError
+        return self.__parser__.get_generator(self).get_next_cursor(result, base)
+
+    async def aget_next_cursor(self, result: list, base=None) -> Optional[str]:
+        if not self.__parser__.model:
+            raise NotImplementedError
+        return await self.__parser__.get_generator(self).aget_next_cursor(result, base)
+
     def get_context(self):
         return self.__parser__.get_generator(self).get_context()
 
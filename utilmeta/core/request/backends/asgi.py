@@ -0,0 +1,160 @@
+from utype.types import *
+from urllib.parse import parse_qsl
+from http.cookies import SimpleCookie
+from ipaddress import ip_address
+from utilmeta.utils import async_to_sync, cached_property, Headers, Header, LOCAL_IP
+from utilmeta.utils import exceptions as exc
+from .base import RequestAdaptor, get_request_ip
+
+
+class ASGIRequestAdaptor(RequestAdaptor):
+    """
+    Adapt the raw ASGI HTTP connection (scope and receive) without a framework request in between,
+    the headers are decoded on the first access, the body is read from the receive channel
+    (chunk by chunk for the streaming multipart parser)
+    """
+    request: dict
+
+    def __init__(self, scope: dict, receive: Callable, route: str = None, *args, **kwargs):
+        super().__init__(scope, route, *args, **kwargs)
+        self.scope = scope
+        self.receive = receive
+        self._body: Optional[bytes] = None
+        self._streamed = False
+
+    @classmethod
+    def reconstruct(cls, adaptor: 'RequestAdaptor'):
+        pass
+
+    def gen_csrf_token(self):
+        pass
+
+    def check_csrf_token(self) -> bool:
+        pass
+
+    @cached_property
+    def headers(self) -> Headers:
+        headers = Headers({})
+        store = headers._store
+        for key, value in self.scope.get('headers') or ():
+            key = key.decode('latin-1')
+            value = value.decode('latin-1')
+            lower = key.lower()
+            if lower in store:
+                # the repeated headers are combined like the other backends
+                separator = '; ' if lower == 'cookie' else ', '
+                value = store[lower][1] + separator + value
+            store[lower] = (key, value)
+        return headers
+
+    @property
+    def address(self):
+        addr = get_request_ip(self.headers)
+        if addr:
+            return addr
+        client = self.scope.get('client')
+        try:
+            return ip_address(client[0])
+        except (TypeError, ValueError):
+            # no client (unix socket) or not an ip address (test clients)
+            return ip_address(LOCAL_IP)
+
+    @property
+    def request_method(self) -> str:
+        return self.scope.get('method', 'GET')
+
+    @property
+    def scheme(self):
+        return self.scope.get('scheme') or 'http'
+
+    @property
+    def path(self):
+        return self.scope.get('path') or '/'
+
+    @property
+    def query_string(self):
+        return (self.scope.get('query_string') or b'').decode('latin-1')
+
+    @property
+    def encoded_path(self):
+        path, query = self.path, self.query_string
+        if query:
+            return path + '?' + query
+        return path
+
+    @property
+    def url(self) -> str:
+        host = self.headers.get('host')
+        if not host:
+            server = self.scope.get('server')
+            host = f'{server[0]}:{server[1]}' if server else LOCAL_IP
+        return f'{self.scheme}://{host}{self.encoded_path}'
+
+    @property
+    def query_params(self):
+        query = {}
+        for key, value in parse_qsl(self.query_string, keep_blank_values=True):
+            query.setdefault(key.rstrip('[]'), []).append(value)
+        return {k: val[0] if len(val) == 1 else val for k, val in query.items()}
+
+    @cached_property
+    def cookies(self):
+        cookie = SimpleCookie(self.headers.get(Header.COOKIE) or '')
+        return {k: v.value for k, v in cookie.items()}
+
+    async def aiter_stream(self, chunk_size: int):
+        if self._body is not None:
+            if self._body:
+                yield self._body
+            return
+        if self._streamed:
+            raise RuntimeError(f'{self.__class__.__name__}: request body is already consumed')
+        self._streamed = True
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                raise exc.BadRequest('client disconnected before the request body is received')
+            chunk = message.get('body')
+            if chunk:
+                yield chunk
+            if not message.get('more_body'):
+                break
+
+    async def async_read(self) -> bytes:
+        if self._body is None:
+            chunks = [chunk async for chunk in self.aiter_stream(0)]
+            self._body = b''.join(chunks)
+        return self._body
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            return async_to_sync(self.async_read)()
+        return self._body
+
+    def get_form(self):
+        if self.multipart_type:
+            if self._body is None:
+                return async_to_sync(self.aparse_multipart)()
+            return self.parse_multipart()
+        form = {}
+        for key, value in parse_qsl(self.body.decode(), keep_blank_values=True):
+            form.setdefault(key, []).append(value)
+        return form
+
+    def iter_stream(self, chunk_size: int):
+        # the body is already read (the async reads are not available in the sync context)
+        body = self.body
+        if body:
+            yield body
+
+    async def async_load(self):
+        try:
+            if self.multipart_type and self._body is None:
+                return await self.aparse_multipart()
+            await self.async_read()
+            return self.get_content()
+        except (NotImplementedError, exc.HttpError):
+            raise
+        except Exception as e:
+            raise exc.UnprocessableEntity(f'process request body failed with error: {e}')
@@ -1,12 +1,13 @@
 from urllib.parse import urlsplit, urlunsplit
 from typing import Optional
 from utilmeta.utils import MetaMethod, CommonMethod, Header, \
-    RequestType, cached_property, time_now, gen_key
+    RequestType, cached_property, time_now, gen_key, get_json_codec
 from utilmeta.utils import exceptions as exc
 from utilmeta.utils import LOCAL_IP
 from ipaddress import ip_address
 from utilmeta.utils.adaptor import BaseAdaptor
 import json
+import time
 from collections.abc import Mapping
 
 
@@ -35,12 +36,17 @@ class RequestAdaptor(BaseAdaptor):
         self.args = args
         self.kwargs = kwargs
         self.time = time_now()
+        # the wall clock timestamp of the request start, independent of the configured time zone
+        self.timestamp = time.time()
 
         self._context = {}
+        # context vars bound to this request, see RequestContextVar.setup
+        self.context_vars = {}
         self._override_method = None
         self._override_route = None
         self._override_query = None
         self._override_data = None
+        self._multipart = None
 
         # self.logger = config.preference.logger_cls()  # root request context logger
         # self.json_decoder_cls = config.preference.json_decoder_cls
@@ -190,6 +196,10 @@ class RequestAdaptor(BaseAdaptor):
             return False
         return content_type in (RequestType.FORM_URLENCODED, RequestType.FORM_DATA)
 
+    @property
+    def multipart_type(self):
+        return self.content_type == RequestType.FORM_DATA
+
     @property
     def file_type(self):
         content_type = self.content_type
@@ -209,8 +219,9 @@ class RequestAdaptor(BaseAdaptor):
         if not self.content_length:
             # Empty content
             return None
-        import json
-        return json.loads(self.body, cls=self.json_decoder_cls)
+        if self.json_decoder_cls is not json.JSONDecoder:
+            return json.loads(self.body, cls=self.json_decoder_cls)
+        return get_json_codec().loads(self.body)
 
     def get_xml(self):
         from xml.etree.ElementTree import XMLParser
@@ -230,6 +241,39 @@ class RequestAdaptor(BaseAdaptor):
     def get_form(self):
         raise NotImplementedError
 
+    def iter_stream(self, chunk_size: int):
+        # iterate the raw body chunks as they are received
+        raise NotImplementedError
+
+    async def aiter_stream(self, chunk_size: int):
+        for chunk in self.iter_stream(chunk_size):
+            yield chunk
+
+    def get_multipart_parser(self):
+        from ..multipart import MultipartParser
+        from ..var import upload_limits
+        return MultipartParser.from_content_type(
+            self.headers.get(Header.TYPE),
+            content_length=self.content_length,
+            **(self.get_context(upload_limits.key) or {})
+        )
+
+    def parse_multipart(self) -> dict:
+        """
+        Parse the multipart/form-data body by the streaming parser,
+        the file parts are spooled to the disk and the limits are checked while reading
+        """
+        if self._multipart is None:
+            parser = self.get_multipart_parser()
+            self._multipart = parser.parse(self.iter_stream(parser.chunk_size))
+        return self._multipart
+
+    async def aparse_multipart(self) -> dict:
+        if self._multipart is None:
+            parser = self.get_multipart_parser()
+            self._multipart = await parser.aparse(self.aiter_stream(parser.chunk_size))
+        return self._multipart
+
     def get_text(self):
         return self.body.decode()
 
@@ -273,7 +317,7 @@ class RequestAdaptor(BaseAdaptor):
             pass
         try:
             return self.get_content()
-        except NotImplementedError:
+        except (NotImplementedError, exc.HttpError):
             raise
         except Exception as e:
             raise exc.UnprocessableEntity(f'process request body failed with error: {e}')
@@ -290,7 +334,7 @@ class RequestAdaptor(BaseAdaptor):
         self.__dict__['body'] = await self.async_read()
         try:
             return self.get_content()
-        except NotImplementedError:
+        except (NotImplementedError, exc.HttpError):
             raise
         except Exception as e:
             raise exc.UnprocessableEntity(f'process request body failed with error: {e}')
@@ -65,7 +65,17 @@ class DjangoRequestAdaptor(RequestAdaptor):
                 load_call()
                 request.META['REQUEST_METHOD'] = m
 
+    def iter_stream(self, chunk_size: int):
+        while True:
+            chunk = self.request.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
     def get_form(self):
+        if self.multipart_type and not hasattr(self.request, '_files'):
+            # not yet parsed by django
+            return self.parse_multipart()
         self.load_form_data(self.request)
         data = parse_query_dict(self.request.POST)
         parsed_files = {}
@@ -78,8 +78,20 @@ class StarletteRequestAdaptor(RequestAdaptor):
         return self.request.headers
 
     def get_form(self):
+        if self.multipart_type and self.streamable:
+            return async_to_sync(self.aparse_multipart)()
         return self.process_form(async_to_sync(self.request.form)())
 
+    @property
+    def streamable(self) -> bool:
+        # the form is not yet parsed by starlette (such as in the middlewares)
+        return getattr(self.request, '_form', None) is None
+
+    async def aiter_stream(self, chunk_size: int):
+        async for chunk in self.request.stream():
+            if chunk:
+                yield chunk
+
     def process_form(self, data: FormData):
         form = {}
         for key, value in data.multi_items():
@@ -97,6 +109,8 @@ class StarletteRequestAdaptor(RequestAdaptor):
 
     async def async_load(self):
         try:
+            if self.multipart_type and self.streamable:
+                return await self.aparse_multipart()
             if self.form_type:
                 data = await self.request.form()
                 return self.process_form(data)
@@ -104,7 +118,7 @@ class StarletteRequestAdaptor(RequestAdaptor):
                 return await self.request.json()
             self.__dict__['body'] = await self.request.body()
             return self.get_content()
-        except NotImplementedError:
+        except (NotImplementedError, exc.HttpError):
             raise
         except Exception as e:
             raise exc.UnprocessableEntity(f'process request body failed with error: {e}')
@@ -38,7 +38,18 @@ class WerkzeugRequestAdaptor(RequestAdaptor):
     def headers(self):
         return self.request.headers
 
+    def iter_stream(self, chunk_size: int):
+        stream = self.request.stream
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
     def get_form(self):
+        if self.multipart_type and 'form' not in self.request.__dict__:
+            # not yet parsed by werkzeug
+            return self.parse_multipart()
         form = dict(self.request.form)
         parsed_files = {}
         for key, files in self.request.files.lists():
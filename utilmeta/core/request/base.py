@@ -97,8 +97,26 @@ class DummyRequestAdaptor(RequestAdaptor):
     def get_form(self):
         if isinstance(self.request.data, dict):
             return self.request.data
+        if self.multipart_type and self.request.data is not None:
+            return self.parse_multipart()
         return None
 
+    def iter_stream(self, chunk_size: int):
+        data = self.request.data
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            view = memoryview(data)
+            for i in range(0, len(view), chunk_size):
+                yield bytes(view[i:i + chunk_size])
+        elif hasattr(data, 'read'):
+            while True:
+                chunk = data.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        elif data is not None:
+            # iterable of the body chunks
+            yield from data
+
     @property
     def body(self) -> bytes:
         return self.request.data
@@ -111,6 +129,8 @@ class DummyRequestAdaptor(RequestAdaptor):
         return self.request.data
 
     async def async_load(self):
+        if self.multipart_type and not isinstance(self.request.data, dict):
+            return await self.aparse_multipart()
         return self.get_content()
 
 
@@ -167,6 +187,11 @@ class Request:
     def is_options(self):
         return self.adaptor.request_method.lower() == MetaMethod.OPTIONS
 
+    @property
+    def is_head(self):
+        # HEAD is served by the GET endpoint, the response is sent without the body
+        return self.adaptor.request_method.lower() == MetaMethod.HEAD
+
     @property
     def path(self) -> str:
         return self.adaptor.path
@@ -0,0 +1,287 @@
+"""
+Streaming parser of the multipart/form-data bodies, the body is fed chunk by chunk
+as it is read from the server, the file parts are written into spooled temporary files,
+so the memory does not grow with the upload size
+"""
+from utype.types import *
+from typing import Iterable, AsyncIterable
+from urllib.parse import unquote
+from utilmeta.utils import exceptions as exc
+from utilmeta.core.file.base import File
+from utilmeta.core.file.backends.upload import UploadedFile, UploadedFileAdaptor
+import re
+
+__all__ = ['MultipartParser']
+
+_OPTION_REGEX = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+def parse_options_header(value: str) -> Tuple[str, Dict[str, str]]:
+    # form-data; name="field"; filename="a.txt" -> ('form-data', {'name': 'field', 'filename': 'a.txt'})
+    if not value:
+        return '', {}
+    main, _, rest = value.partition(';')
+    options = {}
+    for key, val in _OPTION_REGEX.findall(';' + rest):
+        val = val.strip()
+        if len(val) >= 2 and val[0] == val[-1] == '"':
+            val = val[1:-1].replace('\\\\', '\\').replace('\\"', '"')
+        key = key.lower()
+        if key.endswith('*'):
+            # RFC 5987: charset'language'percent-encoded
+            charset, _, encoded = val.partition("'")
+            _, _, encoded = encoded.partition("'")
+            try:
+                val = unquote(encoded, encoding=charset or 'utf-8', errors='strict')
+            except (LookupError, UnicodeDecodeError):
+                continue
+            key = key[:-1]
+        elif key in options:
+            # the extended value takes precedence
+            continue
+        options[key] = val
+    return main.strip().lower(), options
+
+
+class MultipartPart:
+    __slots__ = ('name', 'headers', 'file', 'data', 'charset')
+
+    def __init__(self, name: str, headers: Dict[str, str], file: UploadedFile = None, charset: str = None):
+        self.name = name
+        self.headers = headers
+        self.file = file
+        self.data = bytearray() if file is None else None
+        self.charset = charset
+
+    @property
+    def size(self) -> int:
+        return self.file.size if self.file is not None else len(self.data)
+
+    def write(self, data):
+        if self.file is not None:
+            self.file.write(data)
+        else:
+            self.data += data
+
+
+class MultipartParser:
+    """
+    multipart/form-data parser fed by the body chunks,
+    the limits are enforced while reading so the oversize requests are rejected
+    before the rest of the body is received
+
+    * max_body_size: the total size of the body, also checked by the Content-Length before reading
+    * max_part_size: the size of every file part
+    * max_field_size: the size of every non-file part (kept in memory)
+    * memory_size: the file parts larger than this are rolled over to the disk
+    """
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+    DEFAULT_MEMORY_SIZE = 1024 * 1024
+    DEFAULT_MAX_FIELD_SIZE = 1024 * 1024
+    DEFAULT_MAX_PARTS = 1000
+    MAX_HEADERS_SIZE = 16 * 1024
+
+    PREAMBLE = 0
+    BOUNDARY = 1
+    HEADERS = 2
+    BODY = 3
+    END = 4
+
+    @classmethod
+    def get_boundary(cls, content_type: str) -> bytes:
+        main, options = parse_options_header(content_type or '')
+        boundary = options.get('boundary')
+        if main != 'multipart/form-data' or not boundary:
+            raise exc.BadRequest(f'Invalid multipart content type: {repr(content_type)}, boundary is required')
+        if len(boundary) > 200:
+            raise exc.BadRequest('Invalid multipart boundary: too long')
+        return boundary.encode('latin-1')
+
+    def __init__(self, boundary: Union[str, bytes],
+                 charset: str = 'utf-8',
+                 content_length: int = None,
+                 max_body_size: int = None,
+                 max_part_size: int = None,
+                 max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+                 max_parts: int = DEFAULT_MAX_PARTS,
+                 memory_size: int = DEFAULT_MEMORY_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if isinstance(boundary, str):
+            boundary = boundary.encode('latin-1')
+        if max_body_size and content_length and content_length > max_body_size:
+            # rejected before any bytes of the body is read
+            raise exc.RequestEntityTooLarge(f'Request body too large: {content_length} > {max_body_size}')
+        self.boundary = boundary
+        self.delimiter = b'\r\n--' + boundary
+        self.charset = charset or 'utf-8'
+        self.max_body_size = max_body_size
+        self.max_part_size = max_part_size
+        self.max_field_size = max_field_size
+        self.max_parts = max_parts
+        self.memory_size = memory_size
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+
+        # the leading CRLF let the first boundary be matched by the same delimiter
+        self._buffer = bytearray(b'\r\n')
+        self._state = self.PREAMBLE
+        self._part: Optional[MultipartPart] = None
+        self._parts: List[MultipartPart] = []
+        self.received = 0
+
+    @classmethod
+    def from_content_type(cls, content_type: str, **kwargs) -> 'MultipartParser':
+        return cls(cls.get_boundary(content_type), **kwargs)
+
+    def feed(self, data: bytes):
+        if not data:
+            return
+        self.received += len(data)
+        try:
+            if self.max_body_size and self.received > self.max_body_size:
+                raise exc.RequestEntityTooLarge(f'Request body too large: exceed {self.max_body_size}')
+            self._buffer += data
+            self._process()
+        except Exception:
+            self.close()
+            raise
+
+    def _process(self):
+        buffer = self._buffer
+        delimiter = self.delimiter
+        while True:
+            if self._state == self.BODY:
+                index = buffer.find(delimiter)
+                if index < 0:
+                    # keep the tail that might be the start of the delimiter
+                    safe = len(buffer) - len(delimiter) + 1
+                    if safe > 0:
+                        self._write(buffer[:safe])
+                        del buffer[:safe]
+                    return
+                self._write(buffer[:index])
+                del buffer[:index + len(delimiter)]
+                self._end_part()
+                self._state = self.BOUNDARY
+            elif self._state == self.BOUNDARY:
+                if len(buffer) < 2:
+                    return
+                if buffer[:2] == b'--':
+                    self._state = self.END
+                    continue
+                index = buffer.find(b'\r\n')
+                if index < 0:
+                    if len(buffer) > 1024:
+                        raise exc.BadRequest('Invalid multipart body: malformed boundary')
+                    return
+                if buffer[:index].strip(b' \t'):
+                    raise exc.BadRequest('Invalid multipart body: malformed boundary')
+                del buffer[:index + 2]
+                self._state = self.HEADERS
+            elif self._state == self.HEADERS:
+                if buffer[:2] == b'\r\n':
+                    # part without headers
+                    headers = b''
+                    del buffer[:2]
+                else:
+                    index = buffer.find(b'\r\n\r\n')
+                    if index < 0:
+                        if len(buffer) > self.MAX_HEADERS_SIZE:
+                            raise exc.RequestEntityTooLarge('Multipart part headers too large')
+                        return
+                    headers = bytes(buffer[:index])
+                    del buffer[:index + 4]
+                self._start_part(headers)
+                self._state = self.BODY
+            elif self._state == self.PREAMBLE:
+                index = buffer.find(delimiter)
+                if index < 0:
+                    tail = len(buffer) - len(delimiter) + 1
+                    if tail > 0:
+                        del buffer[:tail]
+                    return
+                del buffer[:index + len(delimiter)]
+                self._state = self.BOUNDARY
+            else:
+                # epilogue is ignored
+                buffer.clear()
+                return
+
+    def _start_part(self, raw_headers: bytes):
+        if self.max_parts and len(self._parts) >= self.max_parts:
+            raise exc.RequestEntityTooLarge(f'Too many multipart parts: exceed {self.max_parts}')
+        try:
+            text = raw_headers.decode('utf-8')
+        except UnicodeDecodeError:
+            text = raw_headers.decode('latin-1')
+        headers = {}
+        for line in text.split('\r\n'):
+            key, sep, value = line.partition(':')
+            if not sep:
+                continue
+            headers[key.strip().lower()] = value.strip()
+        disposition, options = parse_options_header(headers.get('content-disposition', ''))
+        name = options.get('name')
+        if disposition != 'form-data' or name is None:
+            raise exc.BadRequest('Invalid multipart part: form-data name is required')
+        content_type = headers.get('content-type')
+        file = None
+        if 'filename' in options:
+            file = UploadedFile(
+                filename=options['filename'],
+                content_type=content_type,
+                headers=headers,
+                memory_size=self.memory_size
+            )
+        _, type_options = parse_options_header(content_type or '')
+        self._part = MultipartPart(name, headers, file=file, charset=type_options.get('charset'))
+        self._parts.append(self._part)
+
+    def _write(self, data):
+        if not data:
+            return
+        part = self._part
+        size = part.size + len(data)
+        if part.file is not None:
+            if self.max_part_size and size > self.max_part_size:
+                raise exc.RequestEntityTooLarge(f'Uploaded file too large: exceed {self.max_part_size}')
+        elif self.max_field_size and size > self.max_field_size:
+            raise exc.RequestEntityTooLarge(f'Form field too large: exceed {self.max_field_size}')
+        part.write(data)
+
+    def _end_part(self):
+        if self._part and self._part.file is not None:
+            self._part.file.seal()
+        self._part = None
+
+    def finish(self) -> Dict[str, list]:
+        if self._state != self.END:
+            self.close()
+            raise exc.BadRequest('Invalid multipart body: unexpected end of the body')
+        form = {}
+        charset = self.charset
+        for part in self._parts:
+            if part.name == '_charset_' and part.file is None:
+                # the charset of the form specified by the browser
+                charset = bytes(part.data).decode('ascii', errors='replace').strip() or charset
+        for part in self._parts:
+            if part.file is not None:
+                value = File(UploadedFileAdaptor(part.file))
+            else:
+                value = part.data.decode(part.charset or charset, errors='replace')
+            form.setdefault(part.name, []).append(value)
+        return form
+
+    def parse(self, chunks: Iterable[bytes]) -> Dict[str, list]:
+        for chunk in chunks:
+            self.feed(chunk)
+        return self.finish()
+
+    async def aparse(self, chunks: AsyncIterable[bytes]) -> Dict[str, list]:
+        async for chunk in chunks:
+            self.feed(chunk)
+        return self.finish()
+
+    def close(self):
+        for part in self._parts:
+            if part.file is not None:
+                part.file.close()
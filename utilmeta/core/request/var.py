@@ -2,7 +2,7 @@ import warnings
 
 
 from typing import Callable
-from utilmeta.utils import awaitable
+from utilmeta.utils import awaitable, async_entry
 from utilmeta.utils.context import Property
 from utype.utils.datastructures import unprovided
 import inspect
@@ -12,6 +12,36 @@ if TYPE_CHECKING:
     from .base import Request
 
 
+class BoundContextVar:
+    """
+    A context var bound to a request, allocated at most once per (var, request)
+    and cached in the request adaptor
+    """
+    __slots__ = ('var', 'request')
+
+    def __init__(self, var: 'RequestContextVar', request: 'Request'):
+        self.var = var
+        self.request = request
+
+    def contains(self):
+        return self.var.contains(self.request)
+
+    def get(self):
+        return self.var.getter(self.request)
+
+    @awaitable(get)
+    async def get(self):
+        return await self.var.agetter(self.request)
+
+    aget = async_entry('get')
+
+    def set(self, v):
+        return self.var.setter(self.request, value=v)
+
+    def delete(self):
+        return self.var.deleter(self.request)
+
+
 class RequestContextVar(Property):
     def __init__(self, key: str, cached: bool = False, static: bool = False,
                  default=None, factory: Callable = None):
@@ -25,30 +55,14 @@ class RequestContextVar(Property):
         self.cached = cached
         self.static = static
 
-    def setup(self, request: 'Request'):
-        class c:
-            @staticmethod
-            def contains():
-                return self.contains(request)
-
-            @staticmethod
-            def get():
-                return self.getter(request)
-
-            @staticmethod
-            @awaitable(get)
-            async def get():
-                return await self.getter(request)
-
-            @staticmethod
-            def set(v):
-                return self.setter(request, value=v)
-
-            @staticmethod
-            def delete():
-                return self.deleter(request)
-
-        return c
+    def setup(self, request: 'Request') -> BoundContextVar:
+        bound_vars = request.adaptor.context_vars
+        bound = bound_vars.get(id(self))
+        if bound is None:
+            # the bound var holds a reference to this var, so the id will not be reused
+            # during the lifetime of the request
+            bound = bound_vars[id(self)] = BoundContextVar(self, request)
+        return bound
 
     def contains(self, request: 'Request'):
         return request.adaptor.in_context(self.key)
@@ -92,6 +106,8 @@ class RequestContextVar(Property):
             self.setter(request, r)
         return r
 
+    agetter = async_entry('getter')
+
     def setter(self, request: 'Request', value, field=None):
         if self.static and self.contains(request):
             return
@@ -123,4 +139,9 @@ time = RequestContextVar('_time', factory=lambda request: request.adaptor.time,
 path_params = RequestContextVar('_path_params', default=dict)
 allow_methods = RequestContextVar('_allow_methods', default=list)
 allow_headers = RequestContextVar('_allow_headers', default=list)
+route_allows = RequestContextVar('_route_allows')    # precomputed allows of the matched method routes
 unmatched_route = RequestContextVar('_unmatched_route', factory=lambda request: request.adaptor.route)
+route_match = RequestContextVar('_route_match')
+deadline = RequestContextVar('_deadline')     # timestamp of the execution deadline
+upload_limits = RequestContextVar('_upload_limits')   # limits of the streaming multipart parser
+websocket = RequestContextVar('_websocket')     # the websocket adaptor of the handshake request
@@ -2,6 +2,7 @@ from utilmeta import utils
 from utype.types import *
 from utilmeta.utils.adaptor import BaseAdaptor
 import json
+import codecs
 from http.cookies import SimpleCookie
 
 
@@ -125,9 +126,11 @@ class ResponseAdaptor(BaseAdaptor):
         return self.body.decode(encoding=self.charset or 'utf-8', errors='replace')
 
     def get_json(self) -> Union[dict, list]:
-        text = self.get_text()
-        import json
-        return json.loads(text, cls=self.json_decoder_cls)
+        if self.json_decoder_cls is not json.JSONDecoder:
+            return json.loads(self.get_text(), cls=self.json_decoder_cls)
+        if self.charset and codecs.lookup(self.charset).name != 'utf-8':
+            return utils.get_json_codec().loads(self.get_text())
+        return utils.get_json_codec().loads(self.body)
 
     def get_xml(self):
         from xml.etree.ElementTree import XMLParser
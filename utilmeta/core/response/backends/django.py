@@ -14,8 +14,14 @@ class DjangoResponseAdaptor(ResponseAdaptor):
         return isinstance(obj, HttpResponseBase)
 
     @classmethod
-    def reconstruct(cls, resp: Union['ResponseAdaptor', 'Response']):
+    def reconstruct(cls, resp: Union['ResponseAdaptor', 'Response'], asynchronous: bool = None):
+        """
+        asynchronous: the view is served by ASGI (async) or WSGI (sync),
+        the streams and files are iterated in the same mode, otherwise django buffers
+        (a sync iterator under ASGI) or re-wraps (an async iterator under WSGI) the whole iterator
+        """
         from utilmeta.core.response import Response
+        from utilmeta.core.response.file import ResponseFile
         if isinstance(resp, ResponseAdaptor):
             resp = Response(response=resp)
         elif not isinstance(resp, Response):
@@ -28,9 +34,24 @@ class DjangoResponseAdaptor(ResponseAdaptor):
             charset=resp.charset,
             headers=resp.prepare_headers()
         )
+        if resp.stream:
+            stream = resp.stream
+            if asynchronous is None:
+                # not called by the server adaptor, follows the stream
+                asynchronous = stream.asynchronous
+            # ResponseStream iterates the sync iterables in a worker thread for aiter_chunks()
+            # and drives the async iterables in an event loop for iter_chunks()
+            return StreamingHttpResponse(
+                stream.aiter_chunks() if asynchronous else stream.iter_chunks(), **kwargs)
+        if isinstance(resp.file, ResponseFile):
+            file = resp.file
+            if file.whole:
+                # django hands the file to wsgi.file_wrapper (sendfile of the WSGI server)
+                return FileResponse(file.open(), **kwargs)
+            return StreamingHttpResponse(file.aiter_chunks() if asynchronous else file.iter_chunks(), **kwargs)
         if resp.file:
             return FileResponse(resp.file, **kwargs)
-        return HttpResponse(resp.body, **kwargs)
+        return HttpResponse(resp.buffer, **kwargs)
 
     @property
     def status(self):
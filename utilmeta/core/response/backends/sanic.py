@@ -1,4 +1,4 @@
-from sanic.response import HTTPResponse
+from sanic.response import HTTPResponse, ResponseStream
 
 try:
     from sanic.response import Header
@@ -23,14 +23,30 @@ class SanicResponseAdaptor(ResponseAdaptor):
     @classmethod
     def reconstruct(cls, resp: Union['ResponseAdaptor', 'Response']):
         from utilmeta.core.response import Response
+        from utilmeta.core.response.file import ResponseFile
 
         if isinstance(resp, ResponseAdaptor):
             resp = Response(response=resp)
         elif not isinstance(resp, Response):
             resp = Response(resp)
 
+        # the streams and the files are written chunk by chunk
+        stream = resp.stream or (resp.file if isinstance(resp.file, ResponseFile) else None)
+        if stream:
+            async def streaming_fn(response):
+                # write() waits for the transport to drain
+                async for chunk in stream.aiter_chunks():
+                    await response.write(chunk)
+
+            return ResponseStream(
+                streaming_fn,
+                status=resp.status,
+                headers=Header(resp.prepare_headers()),
+                content_type=resp.content_type
+            )
+
         response = HTTPResponse(
-            resp.prepare_body(),
+            resp.buffer,
             status=resp.status,
             headers=Header(resp.prepare_headers()),
             content_type=resp.content_type
@@ -1,6 +1,7 @@
 from starlette.responses import Response as HttpResponse
-from starlette.responses import StreamingResponse
+from starlette.responses import StreamingResponse, FileResponse
 from .base import ResponseAdaptor
+from utilmeta.utils import Header
 from typing import TYPE_CHECKING, Union
 
 
@@ -18,6 +19,7 @@ class StarletteResponseAdaptor(ResponseAdaptor):
     @classmethod
     def reconstruct(cls, resp: Union['ResponseAdaptor', 'Response']):
         from utilmeta.core.response import Response
+        from utilmeta.core.response.file import ResponseFile
 
         if isinstance(resp, ResponseAdaptor):
             resp = Response(response=resp)
@@ -28,13 +30,28 @@ class StarletteResponseAdaptor(ResponseAdaptor):
             status_code=resp.status,
             media_type=resp.content_type
         )
-        if resp.file:
+        if resp.stream:
+            # async iteration, the sync iterables are advanced in the worker thread
+            response = StreamingResponse(resp.stream.aiter_chunks(), **kwargs)
+        elif isinstance(resp.file, ResponseFile):
+            file = resp.file
+            if file.whole and file.path:
+                # served by the ASGI server (http.response.pathsend) when supported
+                file.close()
+                response = FileResponse(file.path, stat_result=file.stat, **kwargs)
+            else:
+                # the ranges are read in the worker thread
+                response = StreamingResponse(file.aiter_chunks(), **kwargs)
+        elif resp.file:
             response = StreamingResponse(resp.file, **kwargs)
         else:
-            response = HttpResponse(resp.body, **kwargs)
+            response = HttpResponse(resp.buffer, **kwargs)
         for key, val in resp.prepare_headers():
             # set values in this way cause headers is a List[Tuple]
             response.headers[key] = val
+        if resp.head and Header.LENGTH not in resp.headers:
+            # the length of the body that is not encoded for HEAD is unknown (not 0)
+            del response.headers[Header.LENGTH]
         return response
 
     @property
@@ -1,26 +1,76 @@
 from .base import ResponseAdaptor
 from werkzeug.wrappers import Response as WerkzeugResponse
+from werkzeug.wsgi import wrap_file
 from typing import Union
 
 
+class WerkzeugFileResponse(WerkzeugResponse):
+    """
+    Hand the file to the wsgi.file_wrapper of the server (sendfile in gunicorn / uWSGI),
+    which is only known from the environ when the response is called
+    """
+    chunk_size = 256 * 1024
+
+    def get_app_iter(self, environ):
+        status = self.status_code
+        if environ['REQUEST_METHOD'] == 'HEAD' or 100 <= status < 200 or status in (204, 304):
+            self.response.close()
+            return ()
+        return wrap_file(environ, self.response, self.chunk_size)
+
+
 class WerkzeugResponseAdaptor(ResponseAdaptor):
     response: WerkzeugResponse
 
     @classmethod
     def reconstruct(cls, resp: Union['ResponseAdaptor', 'WerkzeugResponse']):
         from utilmeta.core.response import Response
+        from utilmeta.core.response.file import ResponseFile
 
         if isinstance(resp, ResponseAdaptor):
             resp = Response(response=resp)
         elif not isinstance(resp, Response):
             resp = Response(resp)
 
-        return WerkzeugResponse(
+        if isinstance(resp.file, ResponseFile):
+            file = resp.file
+            if file.whole:
+                response = WerkzeugFileResponse(
+                    file.open(),
+                    status=resp.status,
+                    headers=resp.prepare_headers(),
+                    content_type=resp.content_type,
+                    direct_passthrough=True
+                )
+                response.chunk_size = file.chunk_size
+                return response
+            return WerkzeugResponse(
+                file.iter_chunks(),
+                status=resp.status,
+                headers=resp.prepare_headers(),
+                content_type=resp.content_type,
+                direct_passthrough=True
+            )
+
+        if resp.stream:
+            return WerkzeugResponse(
+                resp.stream.iter_chunks(),
+                status=resp.status,
+                headers=resp.prepare_headers(),
+                content_type=resp.content_type,
+                direct_passthrough=True
+            )
+
+        response = WerkzeugResponse(
             resp.body,
             status=resp.status,
             headers=resp.prepare_headers(),
             content_type=resp.content_type,
         )
+        if resp.head:
+            # the length of the body that is not encoded for HEAD is unknown (not 0)
+            response.automatically_set_content_length = False
+        return response
 
     @classmethod
     def qualify(cls, obj):
@@ -4,10 +4,10 @@ from http.cookies import SimpleCookie
 from utilmeta.core.request import Request
 from utype.types import *
 from utilmeta.utils import Header,\
-    get_generator_result, get_doc, is_hop_by_hop, http_time, file_like, \
+    get_doc, is_hop_by_hop, http_time, file_like, \
     STATUS_WITHOUT_BODY, time_now
 from utilmeta.utils import exceptions as exc
-from utilmeta.utils import Headers
+from utilmeta.utils import Headers, JSONCodec, StdlibJSONCodec, get_json_codec
 from .backends.base import ResponseAdaptor
 from utilmeta.utils.error import Error
 from utype.parser.cls import ClassParser
@@ -15,6 +15,10 @@ from utype.utils.functional import get_obj_name
 import utype
 import re
 from ..file.base import File
+from .stream import ResponseStream
+from .sse import EventStream
+from .file import ResponseFile
+import os
 
 
 class ResponseClassParser(ClassParser):
@@ -29,26 +33,35 @@ PLAIN = 'text/plain'
 JSON = 'application/json'
 XML = 'text/xml'
 OCTET_STREAM = 'application/octet-stream'
+BYTES_TYPES = (bytes, bytearray, memoryview)
 
 
 class Response:
     __parser_cls__ = ResponseClassParser
     __parser__: ResponseClassParser
     __json_encoder_cls__ = utype.JSONEncoder
+    __stream_cls__ = ResponseStream
+    __file_cls__ = ResponseFile
+    # the codec of the customized __json_encoder_cls__, otherwise the codec of the service is used
+    _json_codec: Optional[JSONCodec] = None
 
     # -- params --
     result_key: str = None
     message_key: str = None
     count_key: str = None
     state_key: str = None
+    cursor_key: str = None
 
     message_header: str = None
     count_header: str = None
     state_header: str = None
+    cursor_header: str = None
     # ----
 
     result = None
     state = None
+    # the cursor of the next page (keyset pagination), None at the last page
+    cursor = None
     # when response is json type and __params__ specified result is the inner result key
     # otherwise result is an alias of data, but often be inherited and annotated
     strict: bool = None
@@ -96,13 +109,15 @@ class Response:
 
     def __init_subclass__(cls, **kwargs):
         cls.__parser__ = cls.__parser_cls__.apply_for(cls)
+        cls._json_codec = StdlibJSONCodec(cls.__json_encoder_cls__) \
+            if cls.__json_encoder_cls__ is not utype.JSONEncoder else None
         cls.description = cls.description or get_doc(cls)
-        cls.wrapped = bool(cls.result_key or cls.count_key or cls.message_key or cls.state_key)
+        cls.wrapped = bool(cls.result_key or cls.count_key or cls.message_key or cls.state_key or cls.cursor_key)
 
         if not cls.content_type and cls.wrapped:
             cls.content_type = JSON
 
-        keys = [cls.result_key, cls.message_key, cls.count_key, cls.state_key]
+        keys = [cls.result_key, cls.message_key, cls.count_key, cls.state_key, cls.cursor_key]
         wrap_keys = [k for k in keys if k is not None]
         if len(set(wrap_keys)) < len(wrap_keys):
             raise ValueError(f'{cls.__name__}: conflict response keys: {wrap_keys}')
@@ -113,6 +128,7 @@ class Response:
                  state=None,
                  message=None,      # can be str or error or dict/list of messages
                  count: int = None,
+                 cursor: str = None,
                  reason: str = None,
                  status: int = None,
                  extra: dict = None,
@@ -157,6 +173,7 @@ class Response:
         self.state = state or self.state
         self.message = message
         self.count = count
+        self.cursor = cursor or self.cursor
 
         self.init_headers(headers)
         self.cookies = SimpleCookie(cookies or {})
@@ -176,6 +193,10 @@ class Response:
 
         self._file = None
         self._error = None
+        # the encoded body, built once when accessed
+        self._body = None
+        # answered to a HEAD request, the body is not sent
+        self._head = False
         self._setup_time = time_now()
 
         self.init_error(error)
@@ -191,6 +212,8 @@ class Response:
 
         # build content at last
         self.build_content()
+        self.evaluate_file()
+        self.evaluate_head()
 
         # represent the loaded data
         self._data = None
@@ -219,6 +242,8 @@ class Response:
                 self.state = self._content.get(self.state_key)
             if self.count_key:
                 self.count = self._content.get(self.count_key)
+            if self.cursor_key:
+                self.cursor = self._content.get(self.cursor_key)
         else:
             self.result = self._content
 
@@ -252,10 +277,11 @@ class Response:
         self.headers = Headers(headers or {})
 
     def init_result(self, result):
-        if hasattr(result, '__next__'):
-            # convert generator yield result into list
-            # result = list(result)
-            result = get_generator_result(result)
+        if self.__stream_cls__.streamable(result):
+            # generators and async generators are kept lazy,
+            # the items are encoded when the body is consumed
+            self.result = result
+            return
 
         if isinstance(result, (Exception, Error)):
             self.init_error(result)
@@ -271,7 +297,7 @@ class Response:
             self.result = None
             return
 
-        if file_like(result):
+        if file_like(result) or isinstance(result, (ResponseFile, os.PathLike)):
             self.init_file(result)
             return
 
@@ -280,6 +306,10 @@ class Response:
     def init_file(self, file):
         if not file:
             return
+        if isinstance(file, str) or self.__file_cls__.servable(file):
+            # files on the file system (or the paths of them) are served by stat, Range and sendfile
+            self._file = file if isinstance(file, ResponseFile) else self.__file_cls__(file)
+            return
         if isinstance(file, File):
             self._file = file.file
             return
@@ -298,8 +328,11 @@ class Response:
             self.state = error.state
         if self.result is None:
             self.result = error.result
-        if self.headers is None:
-            self.headers = error.headers
+        if error.headers:
+            for key, value in error.headers.items():
+                # headers set explicitly by the response take precedence
+                if key not in self.headers:
+                    self.set_header(key, value)
         if not self.message:        # empty string ''
             self.message = str(error.exception)
         error.log(console=True)
@@ -317,6 +350,8 @@ class Response:
                 data[self.state_key] = self.state
             if self.count_key:
                 data[self.count_key] = self.count or 0
+            if self.cursor_key:
+                data[self.cursor_key] = self.cursor
             return data
         else:
             data = self.result
@@ -333,9 +368,18 @@ class Response:
             return
         if self._file:
             self._content = self._file
+            if isinstance(self._file, ResponseFile):
+                self.build_file()
+            return
+        if self.__stream_cls__.streamable(self.result):
+            self._content = self.build_stream()
+            self.build_content_type()
+            for key, value in self._content.headers.items():
+                if key not in self.headers:
+                    self.headers[key] = value
             return
         data = self.build_data()
-        if hasattr(data, '__iter__') and not isinstance(data, (bytes, memoryview, str, list, dict)):
+        if hasattr(data, '__iter__') and not isinstance(data, (*BYTES_TYPES, str, list, dict)):
             # must convert to list iterable
             # this data is guarantee that not file_like
             data = list(data)
@@ -344,6 +388,104 @@ class Response:
         self._content = data
         self.build_content_type()
 
+    def build_stream(self) -> ResponseStream:
+        if isinstance(self.result, ResponseStream):
+            # the stream constructed by the endpoint, such as the event stream
+            return self.result
+        if EventStream.accepts(self.content_type):
+            return EventStream(self.result, codec=self.get_json_codec())
+        stream_format = self.__stream_cls__.get_format(self.content_type)
+        codec = self.get_json_codec()
+        prefix = suffix = b''
+        if self.wrapped and self.result_key and stream_format == ResponseStream.JSON:
+            # stream the result inside the wrapped dict
+            # {"data": [...], "message": "", ...}
+            data = self.build_data()
+            data.pop(self.result_key, None)
+            prefix = b'{' + codec.encode(self.result_key, charset=self.charset) + b':'
+            suffix = (b',' + codec.encode(data, charset=self.charset)[1:]) if data else b'}'
+        return self.__stream_cls__(
+            self.result,
+            format=stream_format,
+            codec=codec,
+            charset=self.charset,
+            prefix=prefix,
+            suffix=suffix
+        )
+
+    def build_file(self):
+        file: ResponseFile = self._file
+        if not self.content_type:
+            self.content_type = file.content_type
+        for key, value in file.headers.items():
+            if key not in self.headers:
+                self.headers[key] = value
+        self.headers[Header.LENGTH] = file.size
+
+    def evaluate_file(self):
+        """
+        Answer the conditional and Range headers of the request by the stat of the file,
+        before any bytes of the file is read
+        """
+        file = self._file
+        if not isinstance(file, ResponseFile) or not self._request or self.status != 200:
+            return
+        status = file.evaluate(self._request.method, self._request.headers)
+        if status == 200:
+            return
+        self.status = status
+        if status == 206:
+            if file.boundary:
+                self.content_type = file.multipart_type
+            else:
+                self.headers[Header.CONTENT_RANGE] = file.content_range
+            self.headers[Header.LENGTH] = file.content_length
+            return
+        # 304 Not Modified / 416 Range Not Satisfiable, the file is not served
+        self._file = None
+        self.content = b''
+        self.headers.pop(Header.LENGTH)
+        if status == 416:
+            self.headers[Header.CONTENT_RANGE] = f'bytes */{file.size}'
+        file.close()
+
+    def evaluate_head(self):
+        """
+        Answer the HEAD request with the headers of the GET response and no body,
+        the content is released without being encoded (or the stream and file being read),
+        so Content-Length is kept only when it is known without encoding the body
+        """
+        if self._head or not self._request or not self._request.is_head:
+            return
+        self._head = True
+        content = self._content
+        length = self.headers.get(Header.LENGTH)
+        if length is None and not self.adaptor and self.status not in STATUS_WITHOUT_BODY:
+            if self._body is not None:
+                length = len(self._body)
+            elif isinstance(content, memoryview):
+                length = content.nbytes
+            elif isinstance(content, (bytes, bytearray)):
+                length = len(content)
+            elif isinstance(content, str):
+                length = len(content.encode(self.charset or 'utf-8', errors='replace'))
+        if isinstance(content, ResponseStream):
+            content.close()
+        file = self._file
+        if file is not None:
+            self._file = None
+            close = getattr(file, 'close', None)
+            if callable(close):
+                close()
+        self.content = b''
+        self._body = b''
+        if length is not None:
+            self.headers[Header.LENGTH] = length
+
+    @property
+    def head(self) -> bool:
+        return self._head
+
     def build_content_type(self):
         if self.content_type is not None:
             return
@@ -358,7 +500,7 @@ class Response:
             self.content_type = JSON
         elif isinstance(self._content, str):
             self.content_type = PLAIN
-        elif isinstance(self._content, bytes) or file_like(self._content):
+        elif isinstance(self._content, BYTES_TYPES) or file_like(self._content):
             self.content_type = OCTET_STREAM
 
     @property
@@ -370,7 +512,7 @@ class Response:
             return None
         if self.content_type:
             if self.content_type.startswith(JSON):
-                data = json.loads(data)
+                data = self.get_json_codec().loads(data)
             elif self.content_type.startswith('text/'):
                 data = data.decode(errors='ignore')
         self._data = data
@@ -407,10 +549,20 @@ class Response:
                 print(data)
         print('')
 
-    def dump_json(self, encoder=None, ensure_ascii: bool = False, **kwargs):
-        import json
+    @classmethod
+    def get_json_codec(cls) -> JSONCodec:
+        return cls._json_codec or get_json_codec()
+
+    def encode_json(self, content=None) -> bytes:
+        # encoded by the codec to bytes directly
+        return self.get_json_codec().encode(self._content if content is None else content, charset=self.charset)
+
+    def dump_json(self, encoder=None, ensure_ascii: bool = False, content=None, **kwargs) -> str:
+        if encoder is None and not ensure_ascii and not kwargs:
+            return self.get_json_codec().dumps(self._content if content is None else content).decode('utf-8')
         kwargs.update(ensure_ascii=ensure_ascii)
-        return json.dumps(self._content, cls=encoder or self.__json_encoder_cls__, **kwargs)
+        return json.dumps(self._content if content is None else content,
+                          cls=encoder or self.__json_encoder_cls__, **kwargs)
 
     def parse_headers(self):
         if self.message_header:
@@ -419,6 +571,8 @@ class Response:
             self.state = self.headers.get(self.state_header) or self.state
         if self.count_header:
             self.count = self.headers.get(self.count_header) or self.count
+        if self.cursor_header:
+            self.cursor = self.headers.get(self.cursor_header) or self.cursor
 
     def build_headers(self):
         if self.adaptor:
@@ -430,6 +584,8 @@ class Response:
             self.headers[self.state_header] = self.state
         if self.count_header and self.count is not None:
             self.headers[self.count_header] = self.count
+        if self.cursor_header and self.cursor:
+            self.headers[self.cursor_header] = self.cursor
 
     @property
     def request(self):
@@ -440,6 +596,8 @@ class Response:
         if self._request:
             return
         self._request = r
+        self.evaluate_file()
+        self.evaluate_head()
 
     @property
     def content(self):
@@ -449,6 +607,18 @@ class Response:
             return self.adaptor.get_content()
         return None
 
+    @content.setter
+    def content(self, content):
+        self._content = content
+        self._body = None
+        self._data = None
+
+    @property
+    def stream(self) -> Optional[ResponseStream]:
+        if isinstance(self._content, ResponseStream):
+            return self._content
+        return None
+
     @property
     def raw_response(self):
         # HTTPResponse: internal=False, outside API
@@ -505,7 +675,10 @@ class Response:
 
     @property
     def content_length(self):
-        return self.headers.get(Header.LENGTH)
+        length = self.headers.get(Header.LENGTH)
+        if length is None and self._body is not None:
+            return len(self._body)
+        return length
 
     @property
     def count(self):
@@ -622,8 +795,17 @@ class Response:
             return self.adaptor.body
         if self._file:
             return self._file
+        if isinstance(self._content, ResponseStream):
+            # consumed by the server adaptor chunk by chunk
+            return self._content
+        if isinstance(self._content, BYTES_TYPES):
+            # already encoded, pass through without copying
+            return self._content
+        if self._body is not None:
+            return self._body
         if self.content_type and self.content_type.startswith(JSON):
-            return self.dump_json()
+            self._body = self.encode_json()
+            return self._body
         # this content might not be bytes, leave the encoding to the adaptor
         return self._content
 
@@ -634,14 +816,30 @@ class Response:
     def body(self) -> bytes:
         if self.adaptor:
             return self.adaptor.body
+        if self._body is not None:
+            return self._body
+        if self.stream is not None:
+            # the stream is sent by the server adaptor chunk by chunk and can be consumed only once,
+            # it is not drained here, use stream.read() / stream.aread() to get the content
+            return b''
         body = self.prepare_body()
         if hasattr(body, 'read'):
-            return body.read()      # noqa
-        if isinstance(body, bytes):
-            return body
-        if not isinstance(body, str):
-            body = str(body)
-        return body.encode(self.charset or 'utf-8', errors='replace')
+            body = body.read()      # noqa
+        elif isinstance(body, (bytearray, memoryview)):
+            body = bytes(body)
+        elif not isinstance(body, bytes):
+            if not isinstance(body, str):
+                body = str(body)
+            body = body.encode(self.charset or 'utf-8', errors='replace')
+        self._body = body
+        return body
+
+    @property
+    def buffer(self) -> Union[bytes, memoryview]:
+        # the body for the server adaptors, bytearray and memoryview content is passed without copying
+        if not self.adaptor and not self._file and isinstance(self._content, (bytearray, memoryview)):
+            return memoryview(self._content)
+        return self.body
 
     @property
     def error(self) -> Optional[Error]:
@@ -718,32 +916,33 @@ class Response:
     def patch_vary_headers(self, *newheaders):
         """
         Add (or update) the "Vary" header in the given HttpResponse object.
-        newheaders is a list of header names that should be in "Vary". If headers
-        contains an asterisk, then "Vary" header will consist of a single asterisk
-        '*'. Otherwise, existing headers in "Vary" aren't removed.
+        newheaders is a list of header names (or comma separated names) that should be in "Vary".
+        If headers contains an asterisk, then "Vary" header will consist of a single asterisk
+        '*'. Otherwise, existing headers in "Vary" aren't removed,
+        so the plugins (cache, compression, session) can vary the response independently
         """
         # Note that we need to keep the original order intact, because cache
         # implementations may rely on the order of the Vary contents in, say,
         # computing an MD5 hash.
-
-        if "Vary" in self.headers:
-            vary_headers = re.compile(r"\s*,\s*").split(self.headers["Vary"])
-        else:
-            vary_headers = []
+        vary_headers = [v for v in re.compile(r"\s*,\s*").split(
+            str(self.headers.get("Vary") or '').strip()) if v]
+        if "*" in vary_headers:
+            return
         # Use .lower() here so we treat headers as case-insensitive.
         existing_headers = {header.lower() for header in vary_headers}
-        additional_headers = [
-            newheader
-            for newheader in newheaders
-            if newheader.lower() not in existing_headers
-        ]
-        vary_headers += additional_headers
+        for newheader in newheaders:
+            for header in re.compile(r"\s*,\s*").split(str(newheader).strip()):
+                if not header or header.lower() in existing_headers:
+                    continue
+                existing_headers.add(header.lower())
+                vary_headers.append(header)
+        if not vary_headers:
+            return
         if "*" in vary_headers:
             self.headers["Vary"] = "*"
         else:
             self.headers["Vary"] = ", ".join(vary_headers)
 
-
 @utype.register_transformer(Response)
 def transform_response(transformer, resp, cls):
     if isinstance(resp, ResponseAdaptor):
@@ -0,0 +1,352 @@
+import asyncio
+import io
+import os
+import mmap
+import stat
+import threading
+import secrets
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from utype.types import *
+from typing import AsyncIterator
+from utilmeta.utils import Header, http_time, guess_mime_type, match_etag
+from utilmeta.utils import exceptions as exc
+from ..file.base import File
+
+
+class ResponseFile:
+    """
+    File body served from the file system, the metadata (size, ETag, Last-Modified) is taken
+    from the stat of the file so the conditional requests are answered before any bytes are read,
+    the Range requests (single or multiple ranges) are served as 206 responses,
+
+    the whole file is handed to the server as a file (sendfile / ASGI pathsend / wsgi.file_wrapper)
+    where the server adaptor supports it, otherwise the sync servers slice the chunks from the memory map
+    of the file, and the async servers read the chunks in the worker thread
+    """
+    DEFAULT_CHUNK_SIZE = 256 * 1024
+    MAX_RANGES = 100
+    OCTET_STREAM = 'application/octet-stream'
+
+    @classmethod
+    def servable(cls, file) -> bool:
+        if isinstance(file, (cls, os.PathLike)):
+            return True
+        if isinstance(file, File):
+            file = file.file
+        try:
+            return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+        except (AttributeError, TypeError, ValueError, OSError, io.UnsupportedOperation):
+            # BytesIO, spooled files in memory, closed files
+            return False
+
+    def __init__(self, file,
+                 content_type: str = None,
+                 filename: str = None,
+                 chunk_size: int = None):
+        if isinstance(file, File):
+            try:
+                filename = filename or file.filename
+                content_type = content_type or file.content_type
+            except (AttributeError, NotImplementedError):
+                pass
+            file = file.file
+        if isinstance(file, (str, os.PathLike)):
+            self.path = os.fspath(file)
+            self.fileobj = None
+            try:
+                self.stat = os.stat(self.path)
+            except FileNotFoundError:
+                raise exc.NotFound(f'{self.__class__.__name__}: file not found')
+            if not stat.S_ISREG(self.stat.st_mode):
+                raise exc.NotFound(f'{self.__class__.__name__}: not a regular file')
+        else:
+            name = getattr(file, 'name', None)
+            self.path = name if isinstance(name, str) and os.path.isfile(name) else None
+            self.fileobj = file
+            self.stat = os.fstat(file.fileno())
+
+        self.filename = filename or (os.path.basename(self.path) if self.path else None)
+        self.content_type = content_type or guess_mime_type(self.filename)[0] or self.OCTET_STREAM
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.size = self.stat.st_size
+        # inclusive byte ranges selected by the Range header, empty for the whole file
+        self.ranges: List[Tuple[int, int]] = []
+        self.boundary: Optional[str] = None
+        self.consumed = False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.path or self.fileobj)}, size={self.size})'
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.stat.st_mtime_ns:x}-{self.size:x}"'
+
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(int(self.stat.st_mtime), tz=timezone.utc)
+
+    @property
+    def whole(self) -> bool:
+        # the whole file is served, so it can be handed to the server as a file (sendfile)
+        return not self.ranges
+
+    @property
+    def headers(self) -> dict:
+        return {
+            Header.ACCEPT_RANGES: 'bytes',
+            Header.ETAG: self.etag,
+            Header.LAST_MODIFIED: http_time(self.last_modified),
+        }
+
+    @property
+    def content_length(self) -> int:
+        if not self.ranges:
+            return self.size
+        if not self.boundary:
+            start, end = self.ranges[0]
+            return end - start + 1
+        # every part is followed by a CRLF
+        return sum(len(head) + end - start + 3 for head, start, end in self.parts()) + len(self.trailer)
+
+    def not_modified(self, headers) -> bool:
+        if_none_match = headers.get(Header.IF_NONE_MATCH)
+        if if_none_match:
+            # If-Modified-Since is ignored when If-None-Match is present
+            return match_etag(self.etag, if_none_match)
+        if_modified_since = headers.get(Header.IF_MODIFIED_SINCE)
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+    def parse_range(self, value: str) -> Optional[List[Tuple[int, int]]]:
+        """
+        Parse the Range header into the sorted and merged inclusive ranges,
+        return None if the header is invalid (so it is ignored and the whole file is served)
+        and an empty list if none of the ranges is satisfiable
+        """
+        unit, _, specs = value.partition('=')
+        if unit.strip().lower() != 'bytes' or not specs.strip():
+            return None
+        size = self.size
+        ranges = []
+        for spec in specs.split(','):
+            spec = spec.strip()
+            if not spec:
+                continue
+            start, sep, end = spec.partition('-')
+            if not sep:
+                return None
+            try:
+                if not start.strip():
+                    # suffix range: the last N bytes
+                    length = int(end)
+                    if length <= 0:
+                        continue
+                    start, end = max(size - length, 0), size - 1
+                else:
+                    start = int(start)
+                    end = int(end) if end.strip() else None
+            except ValueError:
+                return None
+            if start < 0 or end is not None and end < start:
+                return None
+            if start >= size:
+                continue
+            ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+        if len(ranges) > self.MAX_RANGES:
+            return None
+        ranges.sort()
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def evaluate(self, method: str, headers) -> int:
+        """
+        Evaluate the conditional and Range headers of the request, return the status of the response
+        """
+        method = str(method).lower()
+        if method not in ('get', 'head'):
+            return 200
+        if self.not_modified(headers):
+            return 304
+        value = headers.get(Header.RANGE)
+        if not value or method != 'get':
+            return 200
+        if_range = headers.get(Header.IF_RANGE)
+        if if_range:
+            if_range = if_range.strip()
+            if if_range.startswith('"') or if_range.startswith('W/'):
+                # strong comparison
+                if if_range != self.etag:
+                    return 200
+            elif if_range != http_time(self.last_modified):
+                return 200
+        ranges = self.parse_range(value)
+        if ranges is None:
+            return 200
+        if not ranges:
+            return 416
+        if ranges == [(0, self.size - 1)]:
+            return 200
+        self.ranges = ranges
+        if len(ranges) > 1:
+            self.boundary = secrets.token_hex(16)
+        return 206
+
+    @property
+    def multipart_type(self) -> str:
+        return f'multipart/byteranges; boundary={self.boundary}'
+
+    @property
+    def content_range(self) -> Optional[str]:
+        if len(self.ranges) != 1:
+            return None
+        start, end = self.ranges[0]
+        return f'bytes {start}-{end}/{self.size}'
+
+    @property
+    def trailer(self) -> bytes:
+        if not self.boundary:
+            return b''
+        return f'--{self.boundary}--\r\n'.encode()
+
+    def parts(self) -> List[Tuple[bytes, int, int]]:
+        # (part head, start, end) of the ranges
+        if not self.ranges:
+            return [(b'', 0, self.size - 1)] if self.size else []
+        if not self.boundary:
+            start, end = self.ranges[0]
+            return [(b'', start, end)]
+        parts = []
+        for start, end in self.ranges:
+            head = (f'--{self.boundary}\r\n'
+                    f'{Header.TYPE}: {self.content_type}\r\n'
+                    f'{Header.CONTENT_RANGE}: bytes {start}-{end}/{self.size}\r\n\r\n')
+            parts.append((head.encode(), start, end))
+        return parts
+
+    def open(self):
+        if self.fileobj is not None:
+            return self.fileobj
+        return open(self.path, 'rb')
+
+    def _consume(self):
+        if self.consumed:
+            raise RuntimeError(f'{self}: file is already consumed')
+        self.consumed = True
+
+    def _map(self, file) -> Optional[mmap.mmap]:
+        if not self.size:
+            return None
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # special files or file systems that does not support mapping
+            return None
+
+    def _iter_chunks(self, file, mapped: Optional[mmap.mmap], views: bool = False) -> Iterator[bytes]:
+        chunk_size = self.chunk_size
+        view = memoryview(mapped) if mapped is not None and views else None
+        boundary = bool(self.boundary)
+        for head, start, end in self.parts():
+            if head:
+                yield head
+            pos = start
+            stop = end + 1
+            while pos < stop:
+                size = min(chunk_size, stop - pos)
+                if view is not None:
+                    yield view[pos:pos + size]
+                elif mapped is not None:
+                    yield mapped[pos:pos + size]
+                else:
+                    file.seek(pos)
+                    chunk = file.read(size)
+                    if not chunk:
+                        break
+                    yield chunk
+                pos += size
+            if boundary:
+                yield b'\r\n'
+        if boundary:
+            yield self.trailer
+
+    def _release(self, file, mapped: Optional[mmap.mmap]):
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                # the views are still referenced by the server, the map is closed when they are released
+                pass
+        if file is not self.fileobj:
+            file.close()
+
+    def iter_chunks(self, views: bool = False) -> Iterator[bytes]:
+        """
+        Iterate the chunks of the selected ranges (or the whole file),
+        views=True yields the memoryview slices of the map instead of the bytes copies
+        """
+        self._consume()
+        file = self.open()
+        mapped = self._map(file)
+        try:
+            yield from self._iter_chunks(file, mapped, views=views)
+        finally:
+            self._release(file, mapped)
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes]:
+        """
+        Iterate the chunks asynchronously, the file is read in the worker thread chunk by chunk,
+        it is not mapped, the slices of the map can block the event loop by the page faults of a cold file
+        """
+        self._consume()
+        loop = asyncio.get_running_loop()
+        file = await loop.run_in_executor(None, self.open)
+        chunks = self._iter_chunks(file, None)
+        # the close waits for the pending read (if the consumer is cancelled) like ResponseStream.aiter_chunks
+        lock = threading.Lock()
+
+        def advance():
+            with lock:
+                return next(chunks, None)
+
+        def close():
+            with lock:
+                chunks.close()
+                self._release(file, None)
+
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, advance)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await loop.run_in_executor(None, close)
+
+    def __iter__(self):
+        return self.iter_chunks()
+
+    def __aiter__(self):
+        return self.aiter_chunks()
+
+    def read(self) -> bytes:
+        return b''.join(self.iter_chunks())
+
+    async def aread(self) -> bytes:
+        return b''.join([chunk async for chunk in self.aiter_chunks()])
+
+    def close(self):
+        if self.fileobj is not None:
+            self.fileobj.close()
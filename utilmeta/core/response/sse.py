@@ -0,0 +1,350 @@
+import asyncio
+import threading
+from collections import deque
+from utype.types import *
+from typing import AsyncIterator, Iterable, Deque, Set
+from utilmeta.utils import Header, JSONCodec
+from .stream import ResponseStream
+
+__all__ = ['Event', 'EventStream', 'EventHub', 'Subscription']
+
+
+class Event:
+    """
+    A server-sent event, the data that is not str or bytes is encoded as JSON,
+    the encoded frame is memoized so an event broadcast to N subscribers is encoded once
+    """
+    __slots__ = ('data', 'event', 'id', 'retry', 'comment', '_frame')
+
+    def __init__(self, data=None, *,
+                 event: str = None,
+                 id: Union[str, int] = None,
+                 retry: int = None,
+                 comment: str = None):
+        self.data = data
+        self.event = event
+        self.id = None if id is None else str(id)
+        self.retry = retry
+        self.comment = comment
+        self._frame: Optional[bytes] = None
+
+        for value in (self.event, self.id):
+            if value and ('\n' in value or '\r' in value):
+                raise ValueError(f'{self.__class__.__name__}: event and id must not contain newlines')
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(id={repr(self.id)}, event={repr(self.event)}, data={repr(self.data)})'
+
+    def encode(self, codec: JSONCodec) -> bytes:
+        if self._frame is not None:
+            return self._frame
+        lines = []
+        if self.comment is not None:
+            lines.extend(': ' + line for line in str(self.comment).splitlines() or [''])
+        if self.id is not None:
+            lines.append('id: ' + self.id)
+        if self.event:
+            lines.append('event: ' + self.event)
+        if self.retry is not None:
+            lines.append(f'retry: {int(self.retry)}')
+        data = self.data
+        if data is not None:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                data = bytes(data).decode()
+            elif not isinstance(data, str):
+                data = codec.dumps(data).decode()
+            # every line of the data is a data field, the client joins them with \n
+            lines.extend('data: ' + line for line in data.splitlines() or [''])
+        self._frame = ('\n'.join(lines) + '\n\n').encode()
+        return self._frame
+
+
+class EventStream(ResponseStream):
+    """
+    Body of the Server-Sent Events (text/event-stream), every item of the iterable is sent
+    as an event once it is produced (Event or the data of an event),
+    a heartbeat comment is sent when no event is produced in heartbeat seconds,
+    so the proxies and the clients keep the idle connection open,
+
+    the heartbeats are sent by the async consumers (ASGI servers),
+    the sync consumers (WSGI servers) block on the sync iterables between the events
+    """
+    SSE = 'sse'
+    CONTENT_TYPES = {SSE: 'text/event-stream'}
+    HEARTBEAT = b': ping\n\n'
+    DEFAULT_HEARTBEAT = 15
+
+    @classmethod
+    def accepts(cls, content_type: Optional[str]) -> bool:
+        if not content_type:
+            return False
+        return content_type.split(';')[0].strip().lower() == cls.CONTENT_TYPES[cls.SSE]
+
+    def __init__(self, iterable,
+                 heartbeat: Optional[float] = DEFAULT_HEARTBEAT,
+                 retry: int = None,
+                 codec: JSONCodec = None,
+                 compressor=None):
+        # the events are UTF-8 encoded by the specification
+        super().__init__(iterable, format=self.SSE, codec=codec, charset='utf-8', compressor=compressor)
+        self.heartbeat = heartbeat
+        self.retry = retry
+
+    @property
+    def headers(self) -> dict:
+        return {
+            Header.CACHE_CONTROL: 'no-cache',
+            # disable the response buffering of nginx
+            'X-Accel-Buffering': 'no',
+        }
+
+    @property
+    def head(self) -> bytes:
+        if self.retry is not None:
+            return f'retry: {int(self.retry)}\n\n'.encode()
+        return b''
+
+    @property
+    def tail(self) -> bytes:
+        return b''
+
+    def get_encoder(self) -> Callable[[Any], bytes]:
+        codec = self.codec
+
+        def encode(item):
+            if not isinstance(item, Event):
+                item = Event(item)
+            return item.encode(codec)
+        return encode
+
+    def _iter_chunks(self, iterator: Iterator) -> Iterator[bytes]:
+        encode = self.get_encoder()
+        compress = self.compressor.compressobj() if self.compressor else None
+        head = self.head
+        if head:
+            yield compress.compress(head) if compress else head
+        for item in iterator:
+            # every event is flushed at once
+            chunk = encode(item)
+            yield compress.compress(chunk) if compress else chunk
+        if compress:
+            yield compress.flush()
+
+    async def _aiter_chunks(self, iterator: AsyncIterator) -> AsyncIterator[bytes]:
+        encode = self.get_encoder()
+        compress = self.compressor.compressobj() if self.compressor else None
+        head = self.head
+        if head:
+            yield compress.compress(head) if compress else head
+        heartbeat = self.heartbeat
+        pending = None
+        try:
+            while True:
+                if not heartbeat:
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+                else:
+                    if pending is None:
+                        pending = asyncio.ensure_future(iterator.__anext__())
+                    # the pending item is kept (not cancelled) across the heartbeats
+                    done, _ = await asyncio.wait((pending,), timeout=heartbeat)
+                    if not done:
+                        yield compress.compress(self.HEARTBEAT) if compress else self.HEARTBEAT
+                        continue
+                    task, pending = pending, None
+                    try:
+                        item = task.result()
+                    except StopAsyncIteration:
+                        break
+                chunk = encode(item)
+                yield compress.compress(chunk) if compress else chunk
+        finally:
+            if pending is not None:
+                # the client is disconnected while waiting for the next event
+                pending.cancel()
+                try:
+                    await pending
+                except (Exception, asyncio.CancelledError):
+                    pass
+        if compress:
+            yield compress.flush()
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes]:
+        self._consume()
+        if self.asynchronous:
+            iterator = self.iterable.__aiter__()
+        else:
+            # the sync iterable is advanced in the worker thread item by item,
+            # so the heartbeats are sent while the producer blocks
+            iterator = self._athread(iter(self.iterable))
+        chunks = self._aiter_chunks(iterator)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+            if self.asynchronous:
+                await self.aclose()
+            else:
+                await iterator.aclose()
+                try:
+                    self.close()
+                except ValueError:
+                    # the generator is still blocked in the worker thread
+                    pass
+
+    @classmethod
+    async def _athread(cls, iterator: Iterator):
+        # asyncio.to_thread is not available in python 3.8
+        loop = asyncio.get_running_loop()
+        end = object()
+        while True:
+            item = await loop.run_in_executor(None, next, iterator, end)
+            if item is end:
+                break
+            yield item
+
+
+class Subscription:
+    """
+    A subscriber of the EventHub, the events are buffered in a bounded queue,
+    when the subscriber is slower than the producer, the oldest events are dropped
+    """
+    __slots__ = ('hub', 'queue', 'dropped', 'closed', '_loop', '_waiter')
+
+    def __init__(self, hub: 'EventHub', max_queue: int, events: Iterable[Event] = ()):
+        self.hub = hub
+        self.queue: Deque[Event] = deque(events, maxlen=max_queue)
+        self.dropped = 0
+        self.closed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(queued={len(self.queue)}, dropped={self.dropped})'
+
+    def put(self, event: Event, loop: asyncio.AbstractEventLoop = None):
+        queue = self.queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(event)
+        self._notify(loop)
+
+    def _notify(self, loop: asyncio.AbstractEventLoop = None):
+        target = self._loop
+        if target is None:
+            return
+        if target is loop:
+            self._wake()
+        elif not target.is_closed():
+            # published from another thread (or event loop)
+            target.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Event:
+        # the loop is set before the queue is checked, so an event put from another thread
+        # after the check always schedules the wake up (in the loop thread, after the waiter is created)
+        self._loop = asyncio.get_running_loop()
+        while not self.queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self.queue.popleft()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.hub.unsubscribe(self)
+        self._notify()
+
+    async def aclose(self):
+        self.close()
+
+
+class EventHub:
+    """
+    In-process broadcast of the events, one producer publishes to all the subscribers,
+    every subscriber has a bounded queue (max_queue) with the drop-oldest overflow,
+    so a slow subscriber never blocks the producer or the other subscribers,
+
+    the last history events are kept to resume the reconnected clients
+    by the Last-Event-ID (the events after it are replayed),
+    publish() can be called from any thread, the subscribers are consumed in the event loops
+    """
+    subscription_cls = Subscription
+    DEFAULT_MAX_QUEUE = 100
+    DEFAULT_HISTORY = 100
+
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE, history: int = DEFAULT_HISTORY):
+        if not max_queue or max_queue < 1:
+            raise ValueError(f'{self.__class__.__name__}: max_queue must be positive, got {max_queue}')
+        self.max_queue = max_queue
+        self.history: Deque[Event] = deque(maxlen=history or 0)
+        self.subscribers: Set[Subscription] = set()
+        self.published = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, last_event_id: Union[str, int] = None) -> Subscription:
+        with self._lock:
+            events = ()
+            if last_event_id is not None:
+                last_event_id = str(last_event_id)
+                history = list(self.history)
+                for i, event in enumerate(history):
+                    if event.id == last_event_id:
+                        events = history[i + 1:]
+                        break
+            subscription = self.subscription_cls(self, max_queue=self.max_queue, events=events)
+            try:
+                subscription._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # bound at the first wait
+                pass
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, data=None, *, event: str = None, id: Union[str, int] = None) -> Event:
+        """
+        Publish an event (or the data of an event) to all the subscribers,
+        the events without id are assigned with the increasing sequence
+        """
+        if not isinstance(data, Event):
+            data = Event(data, event=event, id=id)
+        with self._lock:
+            self.published += 1
+            if data.id is None:
+                data.id = str(self.published)
+            self.history.append(data)
+            subscribers = list(self.subscribers)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        for subscription in subscribers:
+            subscription.put(data, loop)
+        return data
+
+    def close(self):
+        for subscription in list(self.subscribers):
+            subscription.close()
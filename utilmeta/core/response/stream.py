@@ -0,0 +1,280 @@
+import asyncio
+import inspect
+import codecs
+import csv
+import io
+import threading
+from functools import partial
+from utype.types import *
+from typing import AsyncIterator
+from utilmeta.utils import file_like, JSONCodec, get_json_codec
+
+
+class ResponseStream:
+    """
+    Lazy body of the iterable results (generator, async generator, iterator),
+    the items are encoded incrementally as a JSON array, NDJSON lines or CSV rows
+    and merged into chunks of about chunk_size bytes, so the memory does not grow with the item count,
+    the next chunk is only produced when the server consumes the previous one
+    so the backpressure of the async servers is respected
+    """
+    JSON = 'json'
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+    CONTENT_TYPES = {
+        JSON: 'application/json',
+        NDJSON: 'application/x-ndjson',
+        CSV: 'text/csv',
+    }
+    # the content type of the response -> stream format
+    FORMATS = {
+        'application/json': JSON,
+        'application/x-ndjson': NDJSON,
+        'application/jsonl': NDJSON,
+        'application/jsonlines': NDJSON,
+        'text/csv': CSV,
+    }
+    DEFAULT_CHUNK_SIZE = 16 * 1024
+
+    @classmethod
+    def streamable(cls, result) -> bool:
+        if isinstance(result, ResponseStream):
+            return True
+        if inspect.isgenerator(result) or inspect.isasyncgen(result):
+            return True
+        if hasattr(result, '__anext__'):
+            return True
+        # file objects are iterators of lines, but they are handled as files
+        return hasattr(result, '__next__') and not file_like(result)
+
+    @classmethod
+    def get_format(cls, content_type: Optional[str]) -> str:
+        if not content_type:
+            return cls.JSON
+        return cls.FORMATS.get(content_type.split(';')[0].strip().lower(), cls.JSON)
+
+    def __init__(self, iterable,
+                 format: str = None,
+                 codec: JSONCodec = None,
+                 charset: str = None,
+                 chunk_size: int = None,
+                 prefix: bytes = b'',
+                 suffix: bytes = b'',
+                 compressor=None):
+        format = format or self.JSON
+        if format not in self.CONTENT_TYPES:
+            raise ValueError(f'{self.__class__.__name__}: invalid format: {repr(format)}, '
+                             f'must be one of {list(self.CONTENT_TYPES)}')
+        self.iterable = iterable
+        self.format = format
+        self.codec = codec or get_json_codec()
+        self.charset = charset or 'utf-8'
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.prefix = prefix
+        self.suffix = suffix
+        # set by the compression stage, the chunks are compressed with compressor.compressobj()
+        self.compressor = compressor
+        self.content_type = self.CONTENT_TYPES[format]
+        self.asynchronous = hasattr(iterable, '__anext__') or hasattr(iterable, '__aiter__')
+        self.consumed = False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.format}, iterable={self.iterable})'
+
+    def get_encoder(self) -> Callable[[Any], bytes]:
+        if self.format == self.CSV:
+            return self.get_csv_encoder(self.charset)
+        dumps = self.codec.dumps
+        if codecs.lookup(self.charset).name != 'utf-8':
+            dumps = partial(self.codec.encode, charset=self.charset)
+        if self.format == self.NDJSON:
+            return lambda item: dumps(item) + b'\n'
+        first = True
+
+        def encode(item):
+            nonlocal first
+            if first:
+                first = False
+                return dumps(item)
+            return b',' + dumps(item)
+        return encode
+
+    @classmethod
+    def get_csv_encoder(cls, charset: str = 'utf-8') -> Callable[[Any], bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        fields = None
+
+        def encode(item):
+            nonlocal fields
+            if isinstance(item, Mapping):
+                if fields is None:
+                    # the header is taken from the first row
+                    fields = list(item)
+                    writer.writerow(fields)
+                writer.writerow([item.get(f) for f in fields])
+            else:
+                writer.writerow(item)
+            value = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return value.encode(charset)
+        return encode
+
+    @property
+    def headers(self) -> dict:
+        # the headers that the stream format requires
+        return {}
+
+    @property
+    def head(self) -> bytes:
+        if self.format == self.JSON:
+            return self.prefix + b'['
+        return b''
+
+    @property
+    def tail(self) -> bytes:
+        if self.format == self.JSON:
+            return b']' + self.suffix
+        return b''
+
+    def _consume(self):
+        if self.consumed:
+            raise RuntimeError(f'{self}: stream is already consumed')
+        self.consumed = True
+
+    def _iter_chunks(self, iterator: Iterator) -> Iterator[bytes]:
+        encode = self.get_encoder()
+        chunk_size = self.chunk_size
+        compress = self.compressor.compressobj() if self.compressor else None
+        parts = [self.head]
+        size = 0
+        for item in iterator:
+            part = encode(item)
+            parts.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                chunk = b''.join(parts)
+                yield compress.compress(chunk) if compress else chunk
+                parts = []
+                size = 0
+        parts.append(self.tail)
+        chunk = b''.join(parts)
+        if compress:
+            chunk = compress.compress(chunk) + compress.flush()
+        if chunk:
+            yield chunk
+
+    async def _aiter_chunks(self, iterator: AsyncIterator) -> AsyncIterator[bytes]:
+        encode = self.get_encoder()
+        chunk_size = self.chunk_size
+        compress = self.compressor.compressobj() if self.compressor else None
+        parts = [self.head]
+        size = 0
+        async for item in iterator:
+            part = encode(item)
+            parts.append(part)
+            size += len(part)
+            if size >= chunk_size:
+                chunk = b''.join(parts)
+                yield compress.compress(chunk) if compress else chunk
+                parts = []
+                size = 0
+        parts.append(self.tail)
+        chunk = b''.join(parts)
+        if compress:
+            chunk = compress.compress(chunk) + compress.flush()
+        if chunk:
+            yield chunk
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """
+        Iterate the encoded chunks synchronously (WSGI servers),
+        an async iterable is driven by a private event loop of the current thread
+        """
+        self._consume()
+        if not self.asynchronous:
+            chunks = self._iter_chunks(iter(self.iterable))
+            try:
+                yield from chunks
+            finally:
+                chunks.close()
+                self.close()
+            return
+        loop = asyncio.new_event_loop()
+        chunks = self._aiter_chunks(self.iterable.__aiter__())
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(chunks.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(chunks.aclose())
+            loop.run_until_complete(self.aclose())
+            loop.close()
+
+    async def aiter_chunks(self) -> AsyncIterator[bytes]:
+        """
+        Iterate the encoded chunks asynchronously (ASGI servers),
+        a sync iterable is advanced in the worker thread chunk by chunk,
+        so the blocking producers (like database cursors) does not block the event loop
+        """
+        self._consume()
+        if self.asynchronous:
+            chunks = self._aiter_chunks(self.iterable.__aiter__())
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+                await self.aclose()
+            return
+        chunks = self._iter_chunks(iter(self.iterable))
+        # the generators can not be closed while executing in the worker thread (if the consumer is cancelled),
+        # so the close is also run in the executor, after the pending next() is returned
+        lock = threading.Lock()
+
+        def advance():
+            with lock:
+                return next(chunks, None)
+
+        def close():
+            with lock:
+                chunks.close()
+                self.close()
+
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, advance)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            await loop.run_in_executor(None, close)
+
+    def __iter__(self):
+        return self.iter_chunks()
+
+    def __aiter__(self):
+        return self.aiter_chunks()
+
+    def read(self) -> bytes:
+        return b''.join(self.iter_chunks())
+
+    async def aread(self) -> bytes:
+        return b''.join([chunk async for chunk in self.aiter_chunks()])
+
+    def close(self):
+        close = getattr(self.iterable, 'close', None)
+        if callable(close):
+            close()
+
+    async def aclose(self):
+        aclose = getattr(self.iterable, 'aclose', None)
+        if callable(aclose):
+            await aclose()
+        else:
+            self.close()
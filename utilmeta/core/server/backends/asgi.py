@@ -0,0 +1,250 @@
+import asyncio
+import utilmeta
+from utype.types import *
+from typing import AsyncIterator
+from .base import ServerAdaptor
+from utilmeta.core.response import Response
+from utilmeta.core.request.backends.asgi import ASGIRequestAdaptor
+from utilmeta.utils import Header
+from utilmeta.core.api import API
+
+
+class ASGIServerAdaptor(ServerAdaptor):
+    """
+    Serve the APIs as a plain ASGI application, the scope and the receive channel are adapted directly
+    and the response messages are built from the Response headers, without a framework in between,
+    the application runs under any ASGI server (uvicorn, hypercorn, daphne)
+
+        service = UtilMeta(__name__, name='demo', backend=ASGIServerAdaptor, api=RootAPI)
+        app = service.application()     # uvicorn server:app
+    """
+    backend = utilmeta
+    request_adaptor_cls = ASGIRequestAdaptor
+    default_asynchronous = True
+    DEFAULT_PORT = 8000
+    DEFAULT_HOST = '127.0.0.1'
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, config):
+        super().__init__(config=config)
+        self.api: Optional[Type[API]] = None
+        # (prefix, API class or ASGI application)
+        self.mounts: List[Tuple[str, Any]] = []
+        self._ready = False
+
+    @classmethod
+    def qualify(cls, obj):
+        # only by the class (backend=ASGIServerAdaptor), utilmeta itself is not a server backend
+        return False
+
+    def adapt(self, api: 'API', route: str, asynchronous: bool = None):
+        self.add_mount(api, route)
+
+    def mount(self, app, route: str):
+        if not self.is_asgi(app):
+            raise TypeError(f'{self.__class__.__name__}: only ASGI applications can be mounted, got {app}')
+        self.add_mount(app, route)
+
+    def add_mount(self, target, route: str):
+        prefix = '/' + str(route or '').strip('/')
+        if prefix == '/':
+            raise ValueError(f'{self.__class__.__name__}: mounting requires a not-empty route')
+        self.mounts.append((prefix, target))
+        # the longest prefix is matched first
+        self.mounts.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def setup(self):
+        if self._ready:
+            return
+        self.api = self.resolve()
+        self._ready = True
+
+    def application(self):
+        self.setup()
+        return self
+
+    def run(self, **kwargs):
+        self.setup()
+        if self.background:
+            return
+        host = self.config.host or self.DEFAULT_HOST
+        port = self.config.port or self.DEFAULT_PORT
+        try:
+            import uvicorn
+        except ImportError:
+            from hypercorn.config import Config
+            from hypercorn.asyncio import serve
+            config = Config()
+            config.bind = [f'{host}:{port}']
+            for key, val in kwargs.items():
+                setattr(config, key, val)
+            asyncio.run(serve(self, config))
+        else:
+            uvicorn.run(self, host=host, port=port, **kwargs)
+
+    def match(self, path: str) -> Tuple[Any, str]:
+        for prefix, target in self.mounts:
+            if path == prefix or path.startswith(prefix + '/'):
+                return target, prefix
+        return self.api, ''
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable):
+        scope_type = scope['type']
+        if scope_type == 'lifespan':
+            return await self.lifespan(scope, receive, send)
+        if not self._ready:
+            self.setup()
+        path = scope.get('path') or '/'
+        root_path = scope.get('root_path') or ''
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        target, prefix = self.match(path)
+        if prefix and not (isinstance(target, type) and issubclass(target, API)):
+            # mounted ASGI application
+            scope = dict(scope, root_path=root_path + prefix)
+            return await target(scope, receive, send)
+        if scope_type == 'http':
+            return await self.handle_http(target, path, prefix, scope, receive, send)
+        if scope_type == 'websocket':
+            return await self.handle_websocket(target, path, prefix, scope, receive, send)
+        raise NotImplementedError(f'{self.__class__.__name__}: unsupported scope type: {scope_type}')
+
+    async def lifespan(self, scope: dict, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            event = message['type'].rsplit('.', 1)[-1]
+            if event not in ('startup', 'shutdown'):
+                continue
+            try:
+                if event == 'startup':
+                    self.setup()
+                    await self.config.startup()
+                else:
+                    await self.config.shutdown()
+            except Exception as e:
+                await send({'type': f'lifespan.{event}.failed', 'message': str(e)})
+                if event == 'startup':
+                    raise
+            else:
+                await send({'type': f'lifespan.{event}.complete'})
+            if event == 'shutdown':
+                return
+
+    def get_route(self, path: str, prefix: str = '') -> str:
+        if prefix:
+            # the APIs mounted by adapt() are not under the root url
+            return path[len(prefix):]
+        return self.load_route(path)
+
+    async def handle_http(self, api: Type[API], path: str, prefix: str,
+                          scope: dict, receive: Callable, send: Callable):
+        try:
+            route = self.get_route(path, prefix)
+            resp = await api(self.request_adaptor_cls(scope, receive, route)).__acall__()
+        except Exception as e:
+            resp = getattr(api, 'response', Response)(error=e)
+        await self.send_response(resp, scope, receive, send)
+
+    async def handle_websocket(self, api: Type[API], path: str, prefix: str,
+                               scope: dict, receive: Callable, send: Callable):
+        from utilmeta.core.websocket.backends.asgi import ASGIWebsocketAdaptor, ASGIWebsocketRequestAdaptor
+        from utilmeta.core.request import var
+        adaptor = ASGIWebsocketAdaptor(scope, receive, send)
+        try:
+            route = self.get_route(path, prefix)
+            request_adaptor = ASGIWebsocketRequestAdaptor(scope, receive, route)
+            request_adaptor.update_context(**{var.websocket.key: adaptor})
+            await api(request_adaptor).__acall__()
+        except Exception as e:
+            # log the error like the HTTP requests, the connection is closed below
+            getattr(api, 'response', Response)(error=e)
+        finally:
+            if not adaptor.accepted:
+                # the route is not a websocket API or the connection is rejected
+                await adaptor.close(1008)
+
+    @classmethod
+    def encode_headers(cls, headers: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+        return [(key.lower().encode('latin-1'), val.encode('latin-1')) for key, val in headers]
+
+    async def send_response(self, resp: Response, scope: dict, receive: Callable, send: Callable):
+        from utilmeta.core.response.file import ResponseFile
+
+        if not isinstance(resp, Response):
+            resp = Response(resp)
+        headers = resp.prepare_headers(with_content_type=True)
+        file = resp.file
+        chunks = None
+        body = b''
+        if resp.stream:
+            chunks = resp.stream.aiter_chunks()
+        elif isinstance(file, ResponseFile):
+            if file.whole and file.path and 'http.response.pathsend' in (scope.get('extensions') or {}):
+                # the whole file is sent by the server (sendfile)
+                file.close()
+                await send({'type': 'http.response.start', 'status': resp.status,
+                            'headers': self.encode_headers(headers)})
+                await send({'type': 'http.response.pathsend', 'path': str(file.path)})
+                return
+            chunks = file.aiter_chunks()
+        elif file:
+            chunks = self.aiter_file(file)
+        else:
+            body = resp.buffer
+            if resp.headers.get(Header.LENGTH) is None and not resp.head:
+                headers.append((Header.LENGTH, str(len(body))))
+
+        await send({'type': 'http.response.start', 'status': resp.status, 'headers': self.encode_headers(headers)})
+        if chunks is None:
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        await self.send_chunks(chunks, receive, send)
+
+    @classmethod
+    async def aiter_file(cls, file):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, file.read, cls.CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            close = getattr(file, 'close', None)
+            if close:
+                close()
+
+    @classmethod
+    async def send_chunks(cls, chunks: AsyncIterator[bytes], receive: Callable, send: Callable):
+        """
+        Send the body chunk by chunk, the stream is stopped (and closed) once the client is disconnected
+        """
+        async def stream():
+            try:
+                async for chunk in chunks:
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                await chunks.aclose()
+
+        async def listen():
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+
+        streaming = asyncio.ensure_future(stream())
+        listener = asyncio.ensure_future(listen())
+        try:
+            await asyncio.wait((streaming, listener), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (streaming, listener):
+                if not task.done():
+                    task.cancel()
+                    try:
+                        await task
+                    except (Exception, asyncio.CancelledError):
+                        pass
+        if streaming.done() and not streaming.cancelled():
+            streaming.result()
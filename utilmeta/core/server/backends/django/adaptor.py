@@ -124,10 +124,10 @@ class DjangoServerAdaptor(ServerAdaptor):
                 try:
                     req = self.request_adaptor_cls(request, self.load_route(route), *args, **kwargs)
                     root = utilmeta_api_class(req)
-                    resp = await root()
+                    resp = await root.__acall__()
                 except Exception as e:
                     resp = getattr(utilmeta_api_class, 'response', Response)(error=e)
-                return self.response_adaptor_cls.reconstruct(resp)
+                return self.response_adaptor_cls.reconstruct(resp, asynchronous=True)
         else:
             def f(request, route: str = '', *args, **kwargs):
                 try:
@@ -136,7 +136,7 @@ class DjangoServerAdaptor(ServerAdaptor):
                     resp = root()
                 except Exception as e:
                     resp = getattr(utilmeta_api_class, 'response', Response)(error=e)
-                return self.response_adaptor_cls.reconstruct(resp)
+                return self.response_adaptor_cls.reconstruct(resp, asynchronous=False)
 
         update_wrapper(f, utilmeta_api_class, updated=())
         f.csrf_exempt = True  # noqa
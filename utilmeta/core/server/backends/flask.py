@@ -87,7 +87,7 @@ class FlaskServerAdaptor(ServerAdaptor):
                     path = self.load_route(path)
                     resp = await utilmeta_api_class(
                         self.request_adaptor_cls(request, path)
-                    )()
+                    ).__acall__()
                 except Exception as e:
                     resp = getattr(utilmeta_api_class, 'response', Response)(error=e)
                 return self.response_adaptor_cls.reconstruct(resp)
@@ -1,5 +1,6 @@
 import starlette
 from starlette.requests import Request
+from starlette.websockets import WebSocket
 from starlette.applications import Starlette
 # from starlette.routing import Route
 from .base import ServerAdaptor
@@ -90,7 +91,7 @@ class StarletteServerAdaptor(ServerAdaptor):
                     path = self.load_route(request.path_params['path'])
                     resp = await utilmeta_api_class(
                         self.request_adaptor_cls(request, path)
-                    )()
+                    ).__acall__()
                 except Exception as e:
                     resp = getattr(utilmeta_api_class, 'response', Response)(error=e)
                 return self.response_adaptor_cls.reconstruct(resp)
@@ -111,6 +112,33 @@ class StarletteServerAdaptor(ServerAdaptor):
             route=f,
             methods=self.HANDLED_METHODS
         )
+        self.add_websocket(app, utilmeta_api_class, route=route)
+
+    def add_websocket(self, app: Starlette, utilmeta_api_class, route: str = '/'):
+        """
+        Route the websocket connections to the Websocket APIs of the API tree,
+        the handshake request is resolved like a GET request
+        """
+        from utilmeta.core.websocket.backends.starlette import StarletteWebsocketAdaptor, \
+            StarletteWebsocketRequestAdaptor
+        from utilmeta.core.request import var
+
+        async def ws(websocket: WebSocket):
+            adaptor = StarletteWebsocketAdaptor(websocket)
+            try:
+                path = self.load_route(websocket.path_params['path'])
+                request_adaptor = StarletteWebsocketRequestAdaptor(websocket, path)
+                request_adaptor.update_context(**{var.websocket.key: adaptor})
+                await utilmeta_api_class(request_adaptor).__acall__()
+            except Exception as e:
+                # log the error like the HTTP requests, the connection is closed below
+                getattr(utilmeta_api_class, 'response', Response)(error=e)
+            finally:
+                if not adaptor.accepted:
+                    # the route is not a websocket API or the connection is rejected
+                    await adaptor.close(1008)
+
+        app.router.add_websocket_route('%s{path:path}' % route, ws)
 
     def application(self):
         self.setup()
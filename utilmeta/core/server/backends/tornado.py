@@ -1,6 +1,7 @@
 import tornado
 from tornado.web import RequestHandler, Application
 from utilmeta.core.response import Response
+from utilmeta.core.response.file import ResponseFile
 from utilmeta.core.request.backends.tornado import TornadoServerRequestAdaptor
 from .base import ServerAdaptor
 import asyncio
@@ -63,15 +64,23 @@ class TornadoServerAdaptor(ServerAdaptor):
                     try:
                         path = service.load_route(path)
                         request = request_adaptor_cls(self.request, path)
-                        response: Response = await utilmeta_api_class(request)()
+                        response: Response = await utilmeta_api_class(request).__acall__()
                         if not isinstance(response, Response):
                             response = Response(response)
                     except Exception as e:
                         response = getattr(utilmeta_api_class, 'response', Response)(error=e)
-                    self.write(response.prepare_body())
                     self.set_status(response.status, reason=response.reason)
                     for key, value in response.prepare_headers(with_content_type=True):
                         self.add_header(key, value)
+                    # the streams and the files are written chunk by chunk
+                    stream = response.stream or (response.file if isinstance(response.file, ResponseFile) else None)
+                    if stream:
+                        async for chunk in stream.aiter_chunks():
+                            self.write(chunk)
+                            # wait for the chunk to be written to the connection
+                            await self.flush()
+                    else:
+                        self.write(response.body)
         else:
             class Handler(RequestHandler):
                 @tornado.web.addslash
@@ -109,10 +118,16 @@ class TornadoServerAdaptor(ServerAdaptor):
                         response: Response = utilmeta_api_class(request)()
                     except Exception as e:
                         response = getattr(utilmeta_api_class, 'response', Response)(error=e)
-                    self.write(response.prepare_body())
                     self.set_status(response.status, reason=response.reason)
                     for key, value in response.prepare_headers(with_content_type=True):
                         self.add_header(key, value)
+                    stream = response.stream or (response.file if isinstance(response.file, ResponseFile) else None)
+                    if stream:
+                        for chunk in stream.iter_chunks():
+                            self.write(chunk)
+                            self.flush()
+                    else:
+                        self.write(response.body)
 
         return Handler
 
@@ -1,4 +1,6 @@
 from .base import Websocket
 from .request import WebsocketRequest
 from .properties import ClientEvent, ServerEvent
-
+from .connection import WebsocketConnection
+from .room import Room, RoomRegistry
+from .backends.base import ConnectionClosed
@@ -0,0 +1,92 @@
+from utype.types import *
+from utilmeta.core.request.backends.asgi import ASGIRequestAdaptor
+from .base import WebsocketAdaptor, ConnectionClosed
+
+
+class ASGIWebsocketAdaptor(WebsocketAdaptor):
+    """
+    The websocket connection of the raw ASGI server (scope, receive and send)
+    """
+    websocket: dict
+
+    def __init__(self, scope: dict, receive: Callable, send: Callable):
+        super().__init__(scope)
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self._connected = False
+
+    @property
+    def subprotocols(self) -> List[str]:
+        return list(self.scope.get('subprotocols') or [])
+
+    async def _connect(self):
+        # the websocket.connect message is received before the handshake is answered
+        if self._connected:
+            return
+        message = await self._receive()
+        if message['type'] == 'websocket.disconnect':
+            self.closed = True
+            raise ConnectionClosed(message.get('code') or 1006)
+        self._connected = True
+
+    async def accept(self, subprotocol: str = None, headers: Dict[str, str] = None):
+        await self._connect()
+        message = {'type': 'websocket.accept', 'subprotocol': subprotocol}
+        if headers:
+            message['headers'] = [(k.lower().encode('latin-1'), str(v).encode('latin-1'))
+                                  for k, v in headers.items()]
+        await self._send(message)
+        self.accepted = True
+
+    async def receive(self) -> Union[str, bytes]:
+        if self.closed:
+            raise ConnectionClosed(1006)
+        message = await self._receive()
+        if message['type'] == 'websocket.disconnect':
+            self.closed = True
+            raise ConnectionClosed(message.get('code') or 1000, message.get('reason'))
+        text = message.get('text')
+        if text is not None:
+            return text
+        return message.get('bytes') or b''
+
+    async def send(self, data: Union[str, bytes]):
+        if self.closed:
+            raise ConnectionClosed(1006)
+        try:
+            if isinstance(data, str):
+                await self._send({'type': 'websocket.send', 'text': data})
+            else:
+                await self._send({'type': 'websocket.send', 'bytes': bytes(data)})
+        except (OSError, RuntimeError) as e:
+            self.closed = True
+            raise ConnectionClosed(1006) from e
+
+    async def close(self, code: int = 1000, reason: str = None):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._connect()
+            await self._send({'type': 'websocket.close', 'code': code, 'reason': reason or ''})
+        except (ConnectionClosed, OSError, RuntimeError):
+            # the client is already gone
+            pass
+
+
+class ASGIWebsocketRequestAdaptor(ASGIRequestAdaptor):
+    """
+    The handshake request of the websocket on the raw ASGI server
+    """
+
+    @property
+    def request_method(self) -> str:
+        return 'GET'
+
+    @property
+    def body(self) -> bytes:
+        return b''
+
+    async def async_read(self):
+        return b''
@@ -0,0 +1,42 @@
+from utype.types import *
+from utilmeta.utils.adaptor import BaseAdaptor
+
+
+class ConnectionClosed(Exception):
+    """
+    The websocket connection is closed (by the client or the server)
+    """
+    def __init__(self, code: int = 1000, reason: str = None):
+        self.code = code
+        self.reason = reason
+        super().__init__(f'websocket connection closed with code {code}' + (f': {reason}' if reason else ''))
+
+
+class WebsocketAdaptor(BaseAdaptor):
+    """
+    The websocket connection of the server backend,
+    the messages are received and sent as str (text frames) or bytes (binary frames)
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.accepted = False
+        self.closed = False
+
+    @property
+    def subprotocols(self) -> List[str]:
+        # the subprotocols requested by the client
+        raise NotImplementedError
+
+    async def accept(self, subprotocol: str = None, headers: Dict[str, str] = None):
+        raise NotImplementedError
+
+    async def receive(self) -> Union[str, bytes]:
+        # raise ConnectionClosed when the client is disconnected
+        raise NotImplementedError
+
+    async def send(self, data: Union[str, bytes]):
+        raise NotImplementedError
+
+    async def close(self, code: int = 1000, reason: str = None):
+        raise NotImplementedError
@@ -0,0 +1,81 @@
+from utype.types import *
+from starlette.websockets import WebSocket, WebSocketDisconnect, WebSocketState
+from utilmeta.core.request.backends.starlette import StarletteRequestAdaptor
+from .base import WebsocketAdaptor, ConnectionClosed
+import starlette
+
+
+class StarletteWebsocketAdaptor(WebsocketAdaptor):
+    websocket: WebSocket
+    backend = starlette
+
+    @classmethod
+    def qualify(cls, obj):
+        return isinstance(obj, WebSocket)
+
+    @property
+    def subprotocols(self) -> List[str]:
+        return list(self.websocket.scope.get('subprotocols') or [])
+
+    async def accept(self, subprotocol: str = None, headers: Dict[str, str] = None):
+        await self.websocket.accept(
+            subprotocol=subprotocol,
+            headers=[(k.lower().encode('latin-1'), str(v).encode('latin-1'))
+                     for k, v in headers.items()] if headers else None
+        )
+        self.accepted = True
+
+    async def receive(self) -> Union[str, bytes]:
+        if self.closed:
+            raise ConnectionClosed(1006)
+        message = await self.websocket.receive()
+        if message['type'] == 'websocket.disconnect':
+            self.closed = True
+            raise ConnectionClosed(message.get('code') or 1000, message.get('reason'))
+        text = message.get('text')
+        if text is not None:
+            return text
+        return message.get('bytes') or b''
+
+    async def send(self, data: Union[str, bytes]):
+        if self.closed:
+            raise ConnectionClosed(1006)
+        try:
+            if isinstance(data, str):
+                await self.websocket.send({'type': 'websocket.send', 'text': data})
+            else:
+                await self.websocket.send({'type': 'websocket.send', 'bytes': bytes(data)})
+        except (WebSocketDisconnect, OSError, RuntimeError) as e:
+            self.closed = True
+            raise ConnectionClosed(getattr(e, 'code', 1006)) from e
+
+    async def close(self, code: int = 1000, reason: str = None):
+        if self.closed:
+            return
+        self.closed = True
+        if self.websocket.application_state == WebSocketState.DISCONNECTED:
+            return
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except (OSError, RuntimeError):
+            # the client is already gone
+            pass
+
+
+class StarletteWebsocketRequestAdaptor(StarletteRequestAdaptor):
+    """
+    The handshake request of the websocket, the connect-time params (query, headers, cookies)
+    and the authentication are resolved from it like the GET requests
+    """
+    request: WebSocket
+
+    @property
+    def request_method(self) -> str:
+        return 'GET'
+
+    @property
+    def body(self) -> bytes:
+        return b''
+
+    async def async_read(self):
+        return b''
@@ -1,28 +1,166 @@
+import inspect
+from utype.types import *
 from utilmeta.core.api import API
-from utilmeta.utils.common import awaitable
-from channels.generic.websocket import WebsocketConsumer
+from utilmeta.core.request import var
+from utilmeta.utils import awaitable, async_entry, Scheme
+from utilmeta.utils import exceptions as exc
+from utilmeta.utils.error import Error
+from .connection import WebsocketConnection
+from .room import RoomRegistry
+from .properties import EventHandler, ServerEvent
+import utype
 
 
 class Websocket(API):
-    def send(self):
-        pass
+    """
+    A websocket API, mounted in the API tree like the other APIs,
+    the class properties (query, headers, cookies and auth) are resolved from the handshake request,
+    so they can be checked in connect() before the connection is accepted (raise to reject it),
 
-    @awaitable(send)
-    async def send(self):
-        pass
+    the JSON messages are dispatched to the handlers of the ClientEvent by the event key
+    with the params parsed by utype, the other messages are passed to receive(),
+    the values returned by the handlers are sent back to the client
+    """
+    connection_cls = WebsocketConnection
+    # rooms of the process, shared by the websocket APIs that does not override it
+    rooms = RoomRegistry()
+    error_event = ServerEvent('error')
 
-    def accept(self):
-        pass
+    subprotocols = ()
+    max_queue = WebsocketConnection.DEFAULT_MAX_QUEUE
+    ping_interval = None
+    ping_timeout = None
+    ping_message = 'ping'
+    pong_message = 'pong'
 
-    @awaitable(accept)
-    async def accept(self):
-        pass
+    _event_handlers: Dict[str, Dict[str, EventHandler]] = {}
 
-    def receive(self):
-        pass
+    connection: WebsocketConnection
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handlers = {key: dict(names) for key, names in cls._event_handlers.items()}
+        for val in cls.__dict__.values():
+            handler = getattr(val, '__websocket_event__', None)
+            if not isinstance(handler, EventHandler):
+                continue
+            names = handlers.setdefault(handler.event.key, {})
+            for name in handler.names:
+                names[name] = handler
+        cls._event_handlers = handlers
 
     def connect(self):
+        # called before the connection is accepted, raise an error to reject the connection
         pass
 
-    def disconnect(self):
+    def receive(self, message):
+        # the message that is not dispatched to an event handler
+        raise exc.BadRequest(f'{self.__class__.__name__}: unhandled message')
+
+    def disconnect(self, code: int):
         pass
+
+    def select_subprotocol(self, subprotocols: List[str]) -> Optional[str]:
+        for protocol in subprotocols:
+            if protocol in self.subprotocols:
+                return protocol
+        return None
+
+    def make_connection(self, adaptor) -> WebsocketConnection:
+        return self.connection_cls(
+            adaptor,
+            max_queue=self.max_queue,
+            ping_interval=self.ping_interval,
+            ping_timeout=self.ping_timeout,
+            ping_message=self.ping_message,
+            pong_message=self.pong_message,
+        )
+
+    def __call__(self):
+        if var.websocket.setup(self.request).get() is None:
+            raise exc.UpgradeRequired(scheme=Scheme.WS)
+        raise exc.ServerError(f'{self.__class__.__name__}: websocket requires an asynchronous server')
+
+    @awaitable(__call__)
+    async def __call__(self):
+        if await var.unmatched_route.setup(self.request).aget():
+            raise exc.NotFound(path=self.request.path)
+        adaptor = await var.websocket.setup(self.request).aget()
+        if adaptor is None:
+            raise exc.UpgradeRequired(scheme=Scheme.WS)
+        self.connection = self.make_connection(adaptor)
+        try:
+            await self._call(self.connect)
+        except Exception:
+            # rejected before accepted, the handshake is answered with 403
+            await adaptor.close(WebsocketConnection.POLICY_VIOLATION)
+            raise
+        await self.connection.accept(subprotocol=self.select_subprotocol(adaptor.subprotocols))
+        try:
+            async for message in self.connection:
+                try:
+                    await self.dispatch(message)
+                except Exception as e:
+                    if not await self.handle_message_error(message, Error(e)):
+                        break
+        finally:
+            self.rooms.leave_all(self.connection)
+            await self.connection.close()
+            await self._call(self.disconnect, self.connection.close_code)
+        return None
+
+    __acall__ = async_entry('__call__')
+
+    @classmethod
+    async def _call(cls, func, *args):
+        r = func(*args)
+        while inspect.isawaitable(r):
+            r = await r
+        return r
+
+    async def dispatch(self, message):
+        if isinstance(message, Mapping):
+            for key, handlers in self._event_handlers.items():
+                name = message.get(key)
+                handler = handlers.get(name) if isinstance(name, str) else None
+                if handler:
+                    result = await self._call(handler, self, message)
+                    break
+            else:
+                result = await self._call(self.receive, message)
+        else:
+            result = await self._call(self.receive, message)
+        if result is not None:
+            await self.send(result)
+
+    async def handle_message_error(self, message, error: Error) -> bool:
+        """
+        Handle the error of a message, return False to close the connection,
+        the errors of the client (4xx) are sent back as the error event,
+        the other errors close the connection with 1011
+        """
+        e = error.exception
+        if isinstance(e, utype.exc.ParseError):
+            e = exc.BadRequest(str(e), detail=e.get_detail())
+        status = getattr(e, 'status', None)
+        if isinstance(status, int) and 400 <= status < 500:
+            await self.send(self.error_event(status=status, message=str(e)))
+            return True
+        error.log(console=True)
+        await self.connection.close(WebsocketConnection.INTERNAL_ERROR)
+        return False
+
+    async def send(self, data):
+        await self.connection.send(data)
+
+    async def close(self, code: int = WebsocketConnection.NORMAL_CLOSURE, reason: str = None):
+        await self.connection.close(code, reason)
+
+    def join(self, room: str):
+        return self.rooms.join(room, self.connection)
+
+    def leave(self, room: str):
+        return self.rooms.leave(room, self.connection)
+
+    def broadcast(self, room: str, data, exclude_self: bool = False) -> int:
+        return self.rooms.broadcast(room, data, exclude=self.connection if exclude_self else None)
@@ -0,0 +1,196 @@
+import asyncio
+from utype.types import *
+from time import monotonic
+from utilmeta.utils import JSONCodec, get_json_codec
+from .backends.base import WebsocketAdaptor, ConnectionClosed
+
+__all__ = ['WebsocketConnection', 'encode_message', 'decode_message']
+
+_CLOSE = object()
+
+
+def encode_message(data, codec: JSONCodec = None) -> Union[str, bytes]:
+    # bytes are sent as binary frames, str as text frames, the others are encoded as JSON text
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    if isinstance(data, str):
+        return data
+    return (codec or get_json_codec()).dumps(data).decode()
+
+
+def decode_message(message: Union[str, bytes], codec: JSONCodec = None):
+    # the JSON text messages are loaded, the other messages are kept as they are
+    if isinstance(message, str) and message[:1] in ('{', '['):
+        try:
+            return (codec or get_json_codec()).loads(message)
+        except ValueError:
+            pass
+    return message
+
+
+class WebsocketConnection:
+    """
+    A websocket connection of the server, the messages are sent by a sender task
+    through a bounded queue (max_queue) so the producers wait when the client reads slower (backpressure),
+    the broadcast that cannot wait (send_nowait) closes the connection once the queue overflows,
+
+    when ping_interval is set, the ping message is sent after the connection is idle for ping_interval seconds,
+    and the connection is closed (1011) if nothing is received in ping_timeout seconds after the ping,
+    ASGI does not expose the protocol-level ping frames, so the keepalive is done by the application messages
+    """
+    DEFAULT_MAX_QUEUE = 64
+    CLOSE_TIMEOUT = 5
+
+    NORMAL_CLOSURE = 1000
+    POLICY_VIOLATION = 1008
+    INTERNAL_ERROR = 1011
+
+    def __init__(self, adaptor: WebsocketAdaptor,
+                 max_queue: int = DEFAULT_MAX_QUEUE,
+                 ping_interval: float = None,
+                 ping_timeout: float = None,
+                 ping_message: Union[str, bytes] = 'ping',
+                 pong_message: Union[str, bytes] = 'pong',
+                 codec: JSONCodec = None):
+        self.adaptor = adaptor
+        self.queue = asyncio.Queue(maxsize=max_queue or 0)
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout or ping_interval
+        self.ping_message = ping_message
+        self.pong_message = pong_message
+        self.codec = codec or get_json_codec()
+        self.rooms: Set[str] = set()
+        self.last_received = monotonic()
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self.sent = 0
+        self.received = 0
+        self._sender: Optional[asyncio.Task] = None
+        self._keepalive: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Task] = None
+        self._shutdown = False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(queued={self.queue.qsize()}, closed={self.closed})'
+
+    @property
+    def accepted(self) -> bool:
+        return self.adaptor.accepted
+
+    async def accept(self, subprotocol: str = None, headers: Dict[str, str] = None):
+        await self.adaptor.accept(subprotocol=subprotocol, headers=headers)
+        self.last_received = monotonic()
+        loop = asyncio.get_running_loop()
+        self._sender = loop.create_task(self._send_loop())
+        if self.ping_interval:
+            self._keepalive = loop.create_task(self._keepalive_loop())
+
+    async def receive(self):
+        while True:
+            message = await self.adaptor.receive()
+            self.last_received = monotonic()
+            if self.pong_message is not None and message == self.pong_message:
+                # the keepalive response is not dispatched
+                continue
+            self.received += 1
+            return decode_message(message, self.codec)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.receive()
+        except ConnectionClosed as e:
+            self.closed = True
+            if self.close_code is None:
+                self.close_code = e.code
+            raise StopAsyncIteration
+
+    async def send(self, data):
+        """
+        Send a message, wait for the queue if it is full
+        """
+        if self.closed:
+            raise ConnectionClosed(self.close_code or 1006)
+        await self.queue.put(encode_message(data, self.codec))
+
+    def send_nowait(self, message: Union[str, bytes]) -> bool:
+        """
+        Enqueue an encoded message without waiting, the slow connection is closed when its queue overflows
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.abort(self.POLICY_VIOLATION, 'send queue overflow')
+            return False
+        return True
+
+    async def _send_loop(self):
+        queue = self.queue
+        send = self.adaptor.send
+        try:
+            while True:
+                message = await queue.get()
+                if message is _CLOSE:
+                    break
+                await send(message)
+                self.sent += 1
+        except ConnectionClosed as e:
+            self.closed = True
+            if self.close_code is None:
+                self.close_code = e.code
+
+    async def _keepalive_loop(self):
+        while not self.closed:
+            delay = self.last_received + self.ping_interval - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            pinged = monotonic()
+            self.send_nowait(self.ping_message)
+            await asyncio.sleep(self.ping_timeout)
+            if self.last_received < pinged:
+                await self.close(self.INTERNAL_ERROR, 'keepalive timeout')
+                return
+
+    def abort(self, code: int = INTERNAL_ERROR, reason: str = None):
+        # close from the sync context (such as the broadcast)
+        if self._shutdown or self._closing:
+            return
+        self._closing = asyncio.get_running_loop().create_task(self.close(code, reason))
+
+    async def close(self, code: int = NORMAL_CLOSURE, reason: str = None):
+        """
+        Close the connection (or release it after the client is disconnected),
+        the queued messages are sent before the close frame
+        """
+        if self._shutdown:
+            return
+        self._shutdown = True
+        if not self.closed:
+            self.closed = True
+            self.close_code = code
+        current = asyncio.current_task()
+        sender = self._sender
+        if sender is not None and not sender.done():
+            if self.adaptor.closed:
+                sender.cancel()
+            else:
+                try:
+                    self.queue.put_nowait(_CLOSE)
+                except asyncio.QueueFull:
+                    sender.cancel()
+                try:
+                    await asyncio.wait_for(asyncio.shield(sender), self.CLOSE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    sender.cancel()
+        while not self.queue.empty():
+            # release the producers waiting for the queue
+            self.queue.get_nowait()
+        keepalive = self._keepalive
+        if keepalive is not None and keepalive is not current and not keepalive.done():
+            keepalive.cancel()
+        await self.adaptor.close(code, reason)
@@ -1,26 +1,105 @@
-from utilmeta.types import *
-from utilmeta.core.context import Property
+import inspect
+from utype.types import *
+from utype.parser.func import FunctionParser
+
+
+class EventHandler:
+    """
+    A handler of the client event, the params are parsed from the message by utype
+    """
+    parser_cls = FunctionParser
+
+    def __init__(self, f: Callable, event: 'ClientEvent', name: str,
+                 aliases: List[str] = None,
+                 deprecated: bool = None):
+        if not inspect.isfunction(f):
+            raise TypeError(f'Invalid websocket event handler: {f}')
+        self.f = f
+        self.event = event
+        self.name = name
+        self.aliases = list(aliases or [])
+        self.deprecated = deprecated
+        self.parser = self.parser_cls.apply_for(f)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.name)}, f={self.f.__name__})'
+
+    @property
+    def names(self) -> List[str]:
+        return [self.name, *self.aliases]
+
+    def parse(self, message: dict) -> Tuple[tuple, dict]:
+        return self.parser.parse_params((), self.event.get_data(message), context=self.parser.options.make_context())
+
+    def __call__(self, websocket, message: dict):
+        args, kwargs = self.parse(message)
+        return self.f(websocket, *args, **kwargs)
 
 
 class ClientEvent:
+    """
+    The events sent by the client as the JSON objects, dispatched to the handlers by the value of the key,
+    the params of the handler are parsed from the message (or the data_key of the message if specified)
+
+        event = ClientEvent(key='type')
+
+        class ChatSocket(Websocket):
+            @event('chat')
+            async def chat(self, text: str, to: int = None):
+                ...
+    """
+    handler_cls = EventHandler
+
     def __init__(self,
-                 key='action',
-                 path_param=None,
-                 data_getter=None):
-        super().__init__()
+                 key: str = 'type',
+                 data_key: str = None):
+        self.key = key
+        self.data_key = data_key
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(key={repr(self.key)})'
+
+    def get_name(self, message) -> Optional[str]:
+        if not isinstance(message, Mapping):
+            return None
+        name = message.get(self.key)
+        return name if isinstance(name, str) else None
+
+    def get_data(self, message: Mapping) -> dict:
+        if self.data_key:
+            data = message.get(self.data_key)
+            return dict(data) if isinstance(data, Mapping) else {}
+        return {k: v for k, v in message.items() if k != self.key}
 
     def __call__(self, name: str,
                  aliases: List[str] = None,
                  deprecated: bool = None
                  ):
         def decorator(f):
-            pass
+            f.__websocket_event__ = self.handler_cls(
+                f, event=self, name=name, aliases=aliases, deprecated=deprecated)
+            return f
         return decorator
 
 
 class ServerEvent:
-    pass
+    """
+    The events sent by the server, built as the JSON objects with the name in the key
+
+        notice = ServerEvent('notice')
+        await self.send(notice(text='hello'))   # {"type": "notice", "text": "hello"}
+    """
+
+    def __init__(self, name: str, key: str = 'type', data_key: str = None):
+        self.name = name
+        self.key = key
+        self.data_key = data_key
 
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.name)})'
 
-class Data(Property):
-    pass
+    def __call__(self, data: Mapping = None, **kwargs) -> dict:
+        data = dict(data or {}, **kwargs)
+        if self.data_key:
+            return {self.key: self.name, self.data_key: data}
+        return {self.key: self.name, **data}
@@ -0,0 +1,103 @@
+import asyncio
+from utype.types import *
+from utilmeta.utils import JSONCodec, get_json_codec
+from .connection import WebsocketConnection, encode_message
+
+__all__ = ['Room', 'RoomRegistry']
+
+
+class Room:
+    """
+    A group of connections, the broadcast message is encoded once,
+    the broadcasts in the same loop iteration are batched and delivered to the members in one pass
+    (enqueued without waiting, the members that cannot keep up are closed by their queue overflow)
+    """
+
+    def __init__(self, name: str, codec: JSONCodec = None):
+        self.name = name
+        self.codec = codec or get_json_codec()
+        self.members: Set[WebsocketConnection] = set()
+        self.delivered = 0
+        self._pending: List[Tuple[Union[str, bytes], Optional[WebsocketConnection]]] = []
+        self._handle: Optional[asyncio.Handle] = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.name)}, members={len(self.members)})'
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, item):
+        return item in self.members
+
+    def add(self, connection: WebsocketConnection):
+        self.members.add(connection)
+
+    def discard(self, connection: WebsocketConnection):
+        self.members.discard(connection)
+
+    def broadcast(self, data, exclude: WebsocketConnection = None):
+        self._pending.append((encode_message(data, self.codec), exclude))
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        self._handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        for member in list(self.members):
+            for message, exclude in pending:
+                if member is exclude:
+                    continue
+                if not member.send_nowait(message):
+                    break
+                self.delivered += 1
+
+
+class RoomRegistry:
+    """
+    The rooms of the process by name, a room is created on the first join and removed when it is empty
+    """
+    room_cls = Room
+
+    def __init__(self, codec: JSONCodec = None):
+        self.codec = codec
+        self.rooms: Dict[str, Room] = {}
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def __contains__(self, item):
+        return item in self.rooms
+
+    def get(self, name: str) -> Optional[Room]:
+        return self.rooms.get(name)
+
+    def join(self, name: str, connection: WebsocketConnection) -> Room:
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = self.room_cls(name, codec=self.codec)
+        room.add(connection)
+        connection.rooms.add(name)
+        return room
+
+    def leave(self, name: str, connection: WebsocketConnection):
+        connection.rooms.discard(name)
+        room = self.rooms.get(name)
+        if room is None:
+            return
+        room.discard(connection)
+        if not room.members:
+            self.rooms.pop(name, None)
+
+    def leave_all(self, connection: WebsocketConnection):
+        for name in list(connection.rooms):
+            self.leave(name, connection)
+
+    def broadcast(self, name: str, data, exclude: WebsocketConnection = None) -> int:
+        room = self.rooms.get(name)
+        if room is None:
+            return 0
+        room.broadcast(data, exclude=exclude)
+        return len(room)
@@ -6,5 +6,7 @@ from .adaptor import BaseAdaptor
 from .context import ContextWrapper, Property
 from .base import Util, Meta
 from .error import Error
+from .deadline import *
+from .codec import *
 from .logical import LogicUtil
 from .plugin import PluginEvent, Plugin, PluginTarget
@@ -0,0 +1,182 @@
+"""
+JSON codecs used to encode the response bodies and decode the request / response bodies,
+the codec of the service is selected by the JSON config (utilmeta.conf.json),
+the stdlib codec (utype.JSONEncoder) is used by default,
+the faster codecs (orjson / msgspec, or "auto" for the fastest installed one) are opt-in,
+their output is equal in value but not in bytes: the separators are compact and NaN / Infinity are encoded as null,
+so the response bodies, Content-Length and ETags differ from the stdlib codec
+"""
+from typing import Union, Optional, Dict, Type
+from utype.utils.encode import encoder_registry
+import codecs
+import json
+
+__all__ = [
+    'JSONCodec',
+    'StdlibJSONCodec',
+    'OrjsonCodec',
+    'MsgspecCodec',
+    'get_json_codec',
+    'set_json_codec',
+]
+
+
+class JSONCodec:
+    name: str = None
+    # can be selected by "auto" (in the order of CODECS), the stdlib codec is the default
+    auto: bool = False
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def dumps(self, data) -> bytes:
+        # encode to UTF-8 bytes
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]):
+        raise NotImplementedError
+
+    def encode(self, data, charset: str = None) -> bytes:
+        content = self.dumps(data)
+        if charset and codecs.lookup(charset).name != 'utf-8':
+            return content.decode('utf-8').encode(charset, errors='replace')
+        return content
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({repr(self.name)})'
+
+
+class StdlibJSONCodec(JSONCodec):
+    name = 'json'
+    auto = True
+
+    def __init__(self, encoder_cls: Type[json.JSONEncoder] = None, decoder_cls: Type[json.JSONDecoder] = None):
+        from utype import JSONEncoder
+        self.encoder_cls = encoder_cls or JSONEncoder
+        self.decoder_cls = decoder_cls or json.JSONDecoder
+        self.encoder = self.encoder_cls(ensure_ascii=False)
+
+    def dumps(self, data) -> bytes:
+        return self.encoder.encode(data).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data, cls=self.decoder_cls)
+
+
+def default(o):
+    # the types that the codecs cannot encode natively are encoded by the utype encoders,
+    # including the encoders registered by the service configs (like the datetime formats of Time)
+    encoder = encoder_registry.resolve(type(o))
+    if encoder:
+        return encoder(o)
+    raise TypeError(f'Object of type {o.__class__.__name__} is not JSON serializable')
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    orjson with datetime, date and time passed through to the utype encoders,
+    so the values are encoded as utype.JSONEncoder, but with compact separators and NaN / Infinity as null,
+    the payloads that orjson rejects (like the integers exceeds 64-bit) are encoded by the stdlib
+    """
+    name = 'orjson'
+    auto = True
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import orjson   # noqa
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+        self.option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        self.fallback = StdlibJSONCodec()
+
+    def dumps(self, data) -> bytes:
+        try:
+            return self.orjson.dumps(data, default=default, option=self.option)
+        except TypeError:
+            return self.fallback.dumps(data)
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """
+    msgspec encodes datetime, date and time natively in RFC 3339,
+    so the datetime formats of the Time config are not applied,
+    it is not selected automatically and should be specified explicitly
+    """
+    name = 'msgspec'
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import msgspec   # noqa
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self):
+        import msgspec
+        self.encoder = msgspec.json.Encoder(enc_hook=default, decimal_format='number')
+        self.decoder = msgspec.json.Decoder()
+        self.fallback = StdlibJSONCodec()
+
+    def dumps(self, data) -> bytes:
+        try:
+            return self.encoder.encode(data)
+        except (TypeError, OverflowError):
+            return self.fallback.dumps(data)
+
+    def loads(self, data):
+        return self.decoder.decode(data)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecCodec.name: MsgspecCodec,
+    StdlibJSONCodec.name: StdlibJSONCodec,
+}
+
+_codec: Optional[JSONCodec] = None
+
+
+def resolve_codec(codec: Union[str, JSONCodec, Type[JSONCodec], None] = None) -> JSONCodec:
+    if isinstance(codec, JSONCodec):
+        return codec
+    if isinstance(codec, type) and issubclass(codec, JSONCodec):
+        return codec()
+    if not codec:
+        return StdlibJSONCodec()
+    if codec == 'auto':
+        for codec_cls in CODECS.values():
+            if codec_cls.auto and codec_cls.available():
+                return codec_cls()
+        return StdlibJSONCodec()
+    codec_cls = CODECS.get(str(codec).lower())
+    if not codec_cls:
+        raise ValueError(f'Invalid JSON codec: {repr(codec)}, must be one of {list(CODECS)} or "auto"')
+    if not codec_cls.available():
+        raise ImportError(f'JSON codec: {repr(codec)} is not installed')
+    return codec_cls()
+
+
+def get_json_codec() -> JSONCodec:
+    global _codec
+    if _codec is None:
+        _codec = resolve_codec()
+    return _codec
+
+
+def set_json_codec(codec: Union[str, JSONCodec, Type[JSONCodec], None]) -> JSONCodec:
+    global _codec
+    _codec = resolve_codec(codec)
+    return _codec
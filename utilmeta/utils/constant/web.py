@@ -130,12 +130,14 @@ class Header(Static):
     ACCEPT_LANGUAGE = 'Accept-Language'
     ACCEPT_ENCODING = 'Accept-Encoding'
     CONTENT_LANGUAGE = 'Content-Language'
+    CONTENT_ENCODING = 'Content-Encoding'
 
     REFERER = 'Referer'
     UPGRADE = 'Upgrade'
 
     SET_COOKIE = 'Set-Cookie'
     USER_AGENT = 'User-Agent'
+    RETRY_AFTER = 'Retry-After'
 
     VARY = 'Vary'
     EXPIRES = 'Expires'
@@ -148,6 +150,11 @@ class Header(Static):
     IF_MODIFIED_SINCE = 'If-Modified-Since'
     IF_NONE_MATCH = 'If-None-Match'
     IF_MATCH = 'If-Match'
+    IF_RANGE = 'If-Range'
+
+    RANGE = 'Range'
+    ACCEPT_RANGES = 'Accept-Ranges'
+    CONTENT_RANGE = 'Content-Range'
 
     LENGTH = 'Content-Length'
     TYPE = 'Content-Type'
@@ -3,7 +3,7 @@ from utype.parser.field import ParserField
 from utype.utils.datastructures import unprovided
 from utype import Field
 from typing import List, Union, Type
-from utilmeta.utils import awaitable
+from utilmeta.utils import awaitable, async_entry
 import inspect
 from functools import partial
 
@@ -115,3 +115,5 @@ class ContextWrapper:
             if not unprovided(value):
                 params[key] = value
         return params
+
+    aparse_context = async_entry('parse_context')
@@ -0,0 +1,70 @@
+"""
+The deadline of the current execution context (request), stored in a context var
+so that the downstream calls (database queries, cache calls, outbound requests) can
+read the remaining time budget without accessing the request
+"""
+from contextvars import ContextVar, Token
+from typing import Optional
+from .exceptions import GatewayTimeout
+import time
+
+__all__ = [
+    'DeadlineExceeded',
+    'get_deadline',
+    'set_deadline',
+    'reset_deadline',
+    'get_remaining',
+    'get_timeout',
+    'check_deadline',
+]
+
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(GatewayTimeout):
+    pass
+
+
+def get_deadline() -> Optional[float]:
+    # the deadline timestamp (time.time()), None if not set
+    return _deadline.get()
+
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token):
+    try:
+        _deadline.reset(token)
+    except ValueError:
+        # token created in another context
+        _deadline.set(None)
+
+
+def get_remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def check_deadline():
+    deadline = _deadline.get()
+    if deadline is not None and deadline <= time.time():
+        raise DeadlineExceeded('deadline exceeded')
+
+
+def get_timeout(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    The timeout bounded by the remaining time of the deadline (if set),
+    raise DeadlineExceeded if the deadline has passed
+    """
+    remaining = get_remaining()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded('deadline exceeded')
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
@@ -10,7 +10,7 @@ from utilmeta.utils.error import Error
 import warnings
 
 __all__ = ['omit', 'error_convert', 'handle_retries', 'cached_property',
-           'awaitable', 'async_to_sync',
+           'awaitable', 'async_entry', 'async_to_sync',
            'handle_parse', 'handle_timeout', 'ignore_errors', 'static_require']
 
 
@@ -204,12 +204,12 @@ class cached_property:
 
 
 import inspect
+from sys import _getframe
 _CO_NESTED = inspect.CO_NESTED
 _CO_FROM_COROUTINE = inspect.CO_COROUTINE | inspect.CO_ITERABLE_COROUTINE | inspect.CO_ASYNC_GENERATOR
 
 
 def from_coroutine(level=2, _cache={}):
-    from sys import _getframe
     f_code = _getframe(level).f_code
     if f_code in _cache:
         return _cache[f_code]
@@ -293,6 +293,44 @@ def awaitable(syncfunc, bind_service: bool = False):
     return decorate
 
 
+class async_entry:
+    """
+    Explicit asynchronous entry of an @awaitable method,
+    calling it will use the async implementation directly and skip the caller frame inspection
+    of the awaitable dispatch, which is meant for the hot paths that are known to be asynchronous
+        class Endpoint:
+            def serve(self, api): ...
+
+            @awaitable(serve)
+            async def serve(self, api): ...
+
+            aserve = async_entry('serve')
+
+        await endpoint.aserve(api)
+    The method is looked up on the class of the instance (and cached per class),
+    so the entry still follows the method override of the subclasses,
+    but it should not be accessed from super()
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.__doc__ = f'asynchronous entry of {name}'
+        self._funcs = {}
+
+    def __set_name__(self, owner, name):
+        if name == self.name:
+            raise ValueError(f'async_entry: {owner}.{name} cannot be the entry of itself')
+
+    def __get__(self, instance, owner=None):
+        owner = owner or type(instance)
+        func = self._funcs.get(owner)
+        if func is None:
+            func = getattr(owner, self.name)
+            func = self._funcs[owner] = getattr(func, '_asyncfunc', func)
+        if instance is None:
+            return func
+        return func.__get__(instance, owner)
+
+
 try:
     from asgiref.sync import async_to_sync
 except ImportError:
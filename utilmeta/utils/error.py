@@ -121,7 +121,7 @@ class Error:
 
     @property
     def headers(self):
-        return getattr(self.exc, 'headers', None)
+        return getattr(self.exc, 'headers', None) or getattr(self.exc, 'append_headers', None)
 
     def log(self, console: bool = False) -> int:
         if not self.full_info:
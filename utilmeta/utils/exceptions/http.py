@@ -192,6 +192,14 @@ class ServerError(HttpError):
         super().__init__(message=message)
 
 
+class ServiceUnavailable(ServerError):
+    status = 503
+
+
+class GatewayTimeout(ServerError):
+    status = 504
+
+
 class SessionRejected(RequestError):
     # an error for session IP/UA verification and allowed addresses / ua verification
     status = 403
@@ -28,7 +28,7 @@ __all__ = [
     'parse_raw_url', 'json_dumps', 'get_hostname', 'parse_query_string',
     'encode_multipart_form',
     'valid_url', 'encode_query', 'is_hop_by_hop',
-    'guess_mime_type', 'fast_digest',
+    'guess_mime_type', 'fast_digest', 'match_etag', 'weak_etag',
 ]
 
 
@@ -85,7 +85,7 @@ def handle_json_float(data):
 def fast_digest(value, compress: Union[bool, int] = False, case_insensitive: bool = False,
                 consistent: bool = True, mod: int = 2 ** 32):
     if consistent:
-        encoded = value if isinstance(value, bytes) else str(value).encode()
+        encoded = value if isinstance(value, (bytes, bytearray, memoryview)) else str(value).encode()
         dig_mod = int(hashlib.md5(encoded).hexdigest(), 16) % mod
         # if consistent required, we cannot use hash()
         # because every python restart will bring inconsistency to the same value hash
@@ -108,7 +108,7 @@ def etag(data, weak: bool = False) -> str:
             return data
     elif isinstance(data, (dict, list)):
         data = json_dumps(data)
-    elif not isinstance(data, str):
+    elif not isinstance(data, (bytes, bytearray, memoryview)):
         data = str(data)
     comp = fast_digest(data, compress=36, consistent=True).lower()
     quoted = f'"{comp}"'
@@ -117,6 +117,28 @@ def etag(data, weak: bool = False) -> str:
     return quoted
 
 
+def weak_etag(tag: Optional[str]) -> Optional[str]:
+    # the tag of a transformed (like compressed) body, that is no longer byte-to-byte equal
+    if not tag:
+        return tag
+    tag = str(tag)
+    return tag if tag.startswith('W/') else f'W/{tag}'
+
+
+def match_etag(tag: str, header: str) -> bool:
+    # weak comparison of the If-None-Match header (a list of tags or "*")
+    if not tag or not header:
+        return False
+    if header.strip() == '*':
+        return True
+    tag = tag[2:] if tag.startswith('W/') else tag
+    for value in header.split(','):
+        value = value.strip()
+        if (value[2:] if value.startswith('W/') else value) == tag:
+            return True
+    return False
+
+
 def localhost(host: str) -> bool:
     if not isinstance(host, str):
         return False
@@ -260,10 +282,10 @@ def normalize(data, _json: bool = False):
 
 
 def json_dumps(data) -> str:
-    from utype import JSONEncoder
+    from utilmeta.utils.codec import get_json_codec
     if data is None:
         return ''
-    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+    return get_json_codec().dumps(data).decode('utf-8')
 
 
 def dumps(data, exclude_types: Tuple[type, ...] = (), bulk_data: bool = False):
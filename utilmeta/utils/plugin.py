@@ -1,8 +1,8 @@
 import inspect
 import warnings
 from utilmeta.utils.base import Util
-from utilmeta.utils import awaitable
-from typing import Type, Dict, List, Callable, Iterator, Union
+from utilmeta.utils import awaitable, async_entry
+from typing import Type, Dict, List, Callable, Union, Tuple
 from functools import partial
 from utype.parser.func import FunctionParser
 # from .context import Property
@@ -144,14 +144,20 @@ class PluginEvent:
         self._hooks: Dict[Type, List[tuple]] = {}
         self._callback_hooks = {}
 
+    # version of the plugins and hooks, increase to invalidate the compiled handler chains
+    _version = 0
+
     def __call__(self, inst: Union['PluginTarget', Type['PluginTarget']], *args, **kwargs):
         # inst can be PluginTarget instance or class
+        handlers = self.iter(inst)
+        if not handlers:
+            return args[0] if self.streamline_result and args else None
         result = None
         if self.streamline_result:
             pos = list(args)
             if pos:
                 result = pos[0]
-            for handler in self.iter(inst):
+            for handler in handlers:
                 if result is not None:
                     # set the new result
                     pos[0] = result
@@ -159,19 +165,22 @@ class PluginEvent:
                 if result is None:
                     result = pos[0]
         else:
-            for handler in self.iter(inst):
+            for handler in handlers:
                 result = handler(*args, inst, **kwargs)
         return result
 
     @awaitable(__call__)
     async def __call__(self, inst: Union['PluginTarget', Type['PluginTarget']], *args, **kwargs):
         # inst can be PluginTarget instance or class
+        handlers = self.iter(inst)
+        if not handlers:
+            return args[0] if self.streamline_result and args else None
         result = None
         if self.streamline_result:
             pos = list(args)
             if pos:
                 result = pos[0]
-            for handler in self.iter(inst):
+            for handler in handlers:
                 if result is not None:
                     # set the new result
                     pos[0] = result
@@ -181,12 +190,14 @@ class PluginEvent:
                 if result is None:
                     result = pos[0]
         else:
-            for handler in self.iter(inst):
+            for handler in handlers:
                 result = handler(*args, inst, **kwargs)
                 if inspect.isawaitable(result):
                     await result
         return result
 
+    __acall__ = async_entry('__call__')
+
     def get_hooks(self, target):
         if not inspect.isclass(target):
             target_cls = target.__class__
@@ -200,10 +211,20 @@ class PluginEvent:
             cls_hooks.extend(self._hooks.get(target_cls))
         return cls_hooks
 
-    def iter(self, inst: 'PluginTarget') -> Iterator[Callable]:
-        plugins = getattr(inst, '_plugins', {})
-        if not plugins or not isinstance(plugins, dict):
-            return
+    @classmethod
+    def invalidate(cls):
+        """
+        Invalidate every compiled handler chain, called when plugins or plugin hooks are changed
+        """
+        PluginEvent._version += 1
+
+    def compile(self, inst: 'PluginTarget', plugins: dict) -> Tuple[Tuple[Callable, ...], bool]:
+        """
+        Compile the ordered handlers of this event for the target,
+        return the handler tuple and whether the handlers are bound to the target instance
+        """
+        handlers = []
+        bound = False
         hooks = self.get_hooks(inst)
         for plugin_cls, plugin in plugins.items():
             hooked = False
@@ -211,8 +232,11 @@ class PluginEvent:
                 if plugin_cls == plugin_class:
                     hooked = True
                     # from hook, should particle first argument to plugin instance
-                    partial_kw = {target_arg: inst} if target_arg else {}
-                    yield partial(func, plugin, **partial_kw)
+                    if target_arg:
+                        bound = True
+                        handlers.append(partial(func, plugin, **{target_arg: inst}))
+                    else:
+                        handlers.append(partial(func, plugin))
             if hooked:
                 continue
             handler = getattr(plugin, self.name, None)
@@ -221,17 +245,49 @@ class PluginEvent:
             # 2, plugin.<event_name>
             if callable(handler):
                 # already partial by instance method reference
-                yield handler
+                handlers.append(handler)
+        return tuple(handlers), bound
+
+    def iter(self, inst: 'PluginTarget') -> Tuple[Callable, ...]:
+        plugins = getattr(inst, '_plugins', None)
+        if not plugins or not isinstance(plugins, dict):
+            return ()
+        # the compiled chains are stored at the owner of the plugins dict
+        # (the instance for the instance-level plugins, otherwise the target class)
+        if inspect.isclass(inst):
+            owner = inst
+        else:
+            owner = inst if '_plugins' in inst.__dict__ else inst.__class__
+        chains = owner.__dict__.get('_plugin_chains')
+        if chains is None:
+            try:
+                chains = {}
+                setattr(owner, '_plugin_chains', chains)
+            except (AttributeError, TypeError):
+                return self.compile(inst, plugins)[0]
+        chain = chains.get(self)
+        if chain is not None:
+            version, chain_plugins, handlers = chain
+            if version == PluginEvent._version and chain_plugins is plugins:
+                return handlers
+        handlers, bound = self.compile(inst, plugins)
+        if bound and owner is not inst:
+            # handlers bound to the target instance cannot be shared by the class
+            return handlers
+        chains[self] = (PluginEvent._version, plugins, handlers)
+        return handlers
 
     def register(self, target_class):
         if not inspect.isclass(target_class):
             raise TypeError(f'Invalid register class: {target_class}, must be a class')
         if target_class not in self._hooks:
             self._hooks.setdefault(target_class, [])
+            self.invalidate()
 
     def unregister(self, target_class):
         if target_class in self._hooks:
             self._hooks.pop(target_class)
+            self.invalidate()
 
     def make_callable(self, func, target_class):
         func = self.function_parser_cls.apply_for(func)
@@ -290,6 +346,7 @@ class PluginEvent:
         if item not in self._hooks[target_class]:
             self._hooks[target_class].append(item)
             self._hooks[target_class].sort(key=lambda tup: -tup[-1])
+            self.invalidate()
 
     def hook_callback(self, target_class, priority=0):
         """
@@ -405,6 +462,7 @@ class PluginTarget:
                 continue
             warnings.warn(f'{cls}: add invalid plugin: {plugin}, must be a {Plugin} subclass of instance')
         cls._plugins.update(plugin_dict)
+        PluginEvent.invalidate()
 
     @classmethod
     def _get_plugin(cls, plugin_class):
@@ -420,6 +478,7 @@ class PluginTarget:
         for plugin_cls in plugin_classes:
             if plugin_cls in cls._plugins:
                 cls._plugins.pop(plugin_cls)
+        PluginEvent.invalidate()
 
     def _init_plugins(self, plugins: List[Union[Type[Plugin], Plugin]]):
         """